@@ -0,0 +1,50 @@
+"""Requests/sec of AsyncClient against the local MockServer.
+
+    python benchmarks/client_throughput.py [number] [latency]
+"""
+import asyncio
+import sys
+import time
+
+from tinvest import AsyncClient, MarketApi, ParseMode
+from tinvest.mock_server import MockServer, MockServerConfig
+
+
+async def fetch(
+    server: MockServer, number: int, concurrency: int, mode: ParseMode
+) -> float:
+    client = AsyncClient('token', base_url=server.url, parse_mode=mode)
+    api = MarketApi(client)
+    figis = list(server.market.instruments)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def orderbook(i: int) -> None:
+        async with semaphore:
+            async with api.market_orderbook_get(figis[i % len(figis)], 20) as response:
+                await response.parse_json()
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*[orderbook(i) for i in range(number)])
+    finally:
+        await client.close()
+    return time.perf_counter() - started
+
+
+async def main(number: int, latency: float) -> None:
+    async with MockServer(MockServerConfig(latency=latency, seed=0)) as server:
+        print(f'{number} orderbooks, {latency * 1000:.0f}ms server latency')
+        print(f'{"concurrency":<12} {"mode":<10} {"req/s":>10}')
+        for concurrency in (1, 16, 64):
+            for mode in (ParseMode.validate, ParseMode.construct):
+                seconds = await fetch(server, number, concurrency, mode)
+                print(f'{concurrency:<12} {mode.value:<10} {number / seconds:>10.0f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+            float(sys.argv[2]) if len(sys.argv) > 2 else 0.005,
+        )
+    )
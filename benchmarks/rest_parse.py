@@ -0,0 +1,118 @@
+"""Responses/sec of REST response parsing in each ParseMode.
+
+    python benchmarks/rest_parse.py [number]
+"""
+import sys
+import timeit
+
+from tinvest import (
+    MarketInstrumentListResponse,
+    OperationsResponse,
+    PortfolioResponse,
+)
+from tinvest.parsing import ParseMode, parse_obj
+
+ITEMS = 100
+
+MONEY = {'currency': 'RUB', 'value': 1.5}
+
+PORTFOLIO = {
+    'trackingId': 'id',
+    'status': 'Ok',
+    'payload': {
+        'positions': [
+            {
+                'figi': f'BBG{i:09}',
+                'ticker': f'T{i}',
+                'isin': f'RU{i:010}',
+                'instrumentType': 'Stock',
+                'balance': 10,
+                'blocked': 0,
+                'lots': 1,
+                'expectedYield': MONEY,
+                'averagePositionPrice': MONEY,
+                'averagePositionPriceNoNkd': MONEY,
+            }
+            for i in range(ITEMS)
+        ]
+    },
+}
+
+OPERATIONS = {
+    'trackingId': 'id',
+    'status': 'Ok',
+    'payload': {
+        'operations': [
+            {
+                'id': str(i),
+                'status': 'Done',
+                'trades': [
+                    {
+                        'tradeId': str(i),
+                        'date': '2020-01-01T10:00:00+03:00',
+                        'price': 10.5,
+                        'quantity': 1,
+                    }
+                ],
+                'commission': MONEY,
+                'currency': 'RUB',
+                'payment': -10.5,
+                'price': 10.5,
+                'quantity': 1,
+                'figi': f'BBG{i:09}',
+                'instrumentType': 'Stock',
+                'isMarginCall': False,
+                'date': '2020-01-01T10:00:00+03:00',
+                'operationType': 'Buy',
+            }
+            for i in range(ITEMS)
+        ]
+    },
+}
+
+INSTRUMENTS = {
+    'trackingId': 'id',
+    'status': 'Ok',
+    'payload': {
+        'total': ITEMS,
+        'instruments': [
+            {
+                'figi': f'BBG{i:09}',
+                'ticker': f'T{i}',
+                'isin': f'RU{i:010}',
+                'minPriceIncrement': 0.01,
+                'lot': 1,
+                'currency': 'RUB',
+                'name': f'Instrument {i}',
+            }
+            for i in range(ITEMS)
+        ],
+    },
+}
+
+
+def main(number: int) -> None:
+    documents = [
+        (PortfolioResponse, PORTFOLIO),
+        (OperationsResponse, OPERATIONS),
+        (MarketInstrumentListResponse, INSTRUMENTS),
+    ]
+    print(f'{ITEMS} items per response')
+    print(f'{"model":<30} {"mode":<10} {"resp/s":>10} {"speedup":>8}')
+    for model, document in documents:
+        baseline = None
+        for mode in (ParseMode.validate, ParseMode.construct):
+            seconds = timeit.timeit(
+                lambda: parse_obj(model, document, mode),  # pylint: disable=W0640
+                number=number,
+            )
+            rate = number / seconds
+            baseline = baseline or rate
+            print(
+                f'{model.__name__:<30} {mode.value:<10} {rate:>10.0f} '
+                f'{rate / baseline:>7.1f}x'
+            )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,54 @@
+"""Messages/sec of streaming orderbook decoding in each ParseMode.
+
+    python benchmarks/streaming_decode.py [number]
+"""
+import json
+import sys
+import timeit
+
+from tinvest import OrderbookStreamingSchema
+from tinvest.parsing import ParseMode, json_loads, parse_obj
+
+DEPTH = 20
+
+MESSAGE = json.dumps(
+    {
+        'event': 'orderbook',
+        'time': '2019-08-07T15:35:00.029721253Z',
+        'payload': {
+            'figi': 'BBG0013HGFT4',
+            'depth': DEPTH,
+            'bids': [[64.5 - i * 0.0025, 100 + i] for i in range(DEPTH)],
+            'asks': [[64.5 + i * 0.0025, 100 + i] for i in range(DEPTH)],
+        },
+    }
+)
+
+
+def decode(loads, mode, touch):
+    def run():
+        data = parse_obj(OrderbookStreamingSchema, loads(MESSAGE)['payload'], mode)
+        if touch:
+            data.bids  # pylint: disable=W0104
+
+    return run
+
+
+def main(number: int) -> None:
+    decoders = [('json', json.loads)]
+    if json_loads is not json.loads:
+        decoders.append(('orjson', json_loads))
+
+    print(f'{"decoder":<8} {"mode":<10} {"access":<7} {"msg/s":>10}')
+    for decoder_name, loads in decoders:
+        for mode in ParseMode:
+            for touch in (False, True):
+                seconds = timeit.timeit(decode(loads, mode, touch), number=number)
+                print(
+                    f'{decoder_name:<8} {mode.value:<10} {str(touch):<7} '
+                    f'{number / seconds:>10.0f}'
+                )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
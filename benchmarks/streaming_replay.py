@@ -0,0 +1,63 @@
+"""Messages/sec of Streaming dispatch of a recording replayed at max speed.
+
+    python benchmarks/streaming_replay.py [number]
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from tinvest import StreamingEvents
+from tinvest.parsing import ParseMode
+from tinvest.recording import StreamRecorder, StreamReplay
+from tinvest.streaming import Streaming
+
+DEPTH = 20
+FIGIS = 100
+
+
+def message(i: int) -> str:
+    return json.dumps(
+        {
+            'event': 'orderbook',
+            'time': '2019-08-07T15:35:00.029721253Z',
+            'payload': {
+                'figi': f'BBG{i % FIGIS:09}',
+                'depth': DEPTH,
+                'bids': [[64.5 - j * 0.0025, 100 + i + j] for j in range(DEPTH)],
+                'asks': [[64.5 + j * 0.0025, 100 + i + j] for j in range(DEPTH)],
+            },
+        }
+    )
+
+
+async def replay(path: str, mode: ParseMode) -> float:
+    events = StreamingEvents()
+
+    @events.orderbook()
+    async def handle_orderbook(api, payload):
+        pass
+
+    streaming = Streaming('token', parse_mode=mode).add_handlers(events)
+    started = time.perf_counter()
+    await streaming.replay(StreamReplay(path, speed=None))
+    return time.perf_counter() - started
+
+
+def main(number: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'session.rec')
+        with StreamRecorder(path) as recorder:
+            for i in range(number):
+                recorder.write(message(i))
+        print(f'{number} orderbooks, {os.path.getsize(path)} bytes recorded')
+        print(f'{"mode":<10} {"msg/s":>10}')
+        for mode in ParseMode:
+            seconds = asyncio.run(replay(path, mode))
+            print(f'{mode.value:<10} {number / seconds:>10.0f}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
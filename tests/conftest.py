@@ -1,6 +1,68 @@
+from contextlib import asynccontextmanager
+
 import pytest
 
 
 @pytest.fixture()
 def token():
     return '<TOKEN>'
+
+
+class FakeResponse:
+    """Response holding a parsed model, a list of items or an error to raise."""
+
+    def __init__(self, result):
+        self.result = result
+
+    def raise_for_status(self):
+        if isinstance(self.result, Exception):
+            raise self.result
+
+    async def parse_json(self):
+        return self.result
+
+    async def iter_items(self):
+        for item in self.result:
+            yield item
+
+
+class SyncFakeResponse(FakeResponse):
+    def parse_json(self):
+        return self.result
+
+
+class FakeClient:
+    """Client answering ``request`` with ``respond(path, params)``.
+
+    The params of every request are kept in ``calls``; requests for which
+    ``fail(params)`` is true raise ConnectionError.
+    """
+
+    def __init__(self, respond, fail=None):
+        self.calls = []
+        self._respond = respond
+        self._fail = fail
+
+    def _call(self, path, kwargs):
+        params = kwargs.get('params', {})
+        self.calls.append(params)
+        if self._fail is not None and self._fail(params):
+            raise ConnectionError
+        return self._respond(path, params)
+
+    @asynccontextmanager
+    async def request(self, method, path, response_model=None, **kwargs):
+        yield FakeResponse(self._call(path, kwargs))
+
+
+class SyncFakeClient(FakeClient):
+    def request(self, method, path, response_model=None, **kwargs):
+        return SyncFakeResponse(self._call(path, kwargs))
+
+
+@pytest.fixture()
+def fake_client():
+    def make(respond, fail=None, sync=False):
+        return (SyncFakeClient if sync else FakeClient)(respond, fail)
+
+    return make
@@ -1,6 +1,113 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from pydantic import BaseModel
+
+from tinvest.apis import MarketApi
+from tinvest.async_client import AsyncClient
+from tinvest.cache import ResponseCache
+from tinvest.retry import RetryPolicy
+
+
+class Status(BaseModel):
+    status: str
 
 
 @pytest.mark.asyncio
 async def test_idle():
     pass
+
+
+@asynccontextmanager
+async def serve(token, statuses, cache=None, coalesce=False):
+    async def handler(request):
+        await asyncio.sleep(0.01)
+        return web.json_response({'status': 'Ok'}, status=statuses.pop(0))
+
+    async def bonds(request):
+        instruments = [
+            {'figi': str(i), 'ticker': str(i), 'name': 'Bond', 'lot': 1}
+            for i in range(100)
+        ]
+        return web.json_response(
+            {'trackingId': 'id', 'payload': {'instruments': instruments, 'total': 100}}
+        )
+
+    app = web.Application()
+    app.router.add_get('/market/stocks', handler)
+    app.router.add_post('/orders/limit-order', handler)
+    app.router.add_route('HEAD', '/', handler)
+    app.router.add_get('/market/bonds', bonds)
+    server = TestServer(app)
+    await server.start_server()
+    client = AsyncClient(
+        token, retry_policy=RetryPolicy(backoff=0), cache=cache, coalesce=coalesce
+    )
+    client._base_url = str(server.make_url(''))
+    try:
+        yield client
+    finally:
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_client_request_retries(token):
+    async with serve(token, [503, 200]) as client:
+        async with client.request('GET', '/market/stocks') as response:
+            assert response.status == 200
+            assert await response.parse_json() == {'status': 'Ok'}
+        assert client._retry_policy.stats().retries == 1
+
+
+@pytest.mark.asyncio
+async def test_client_request_does_not_retry_post(token):
+    async with serve(token, [503, 200]) as client:
+        async with client.request('POST', '/orders/limit-order') as response:
+            assert response.status == 503
+
+
+@pytest.mark.asyncio
+async def test_client_request_cached(token):
+    async with serve(token, [200], ResponseCache()) as client:
+        for _ in range(2):
+            async with client.request('GET', '/market/stocks') as response:
+                assert await response.parse_json() == {'status': 'Ok'}
+        assert client._cache.stats().hits == 1
+
+
+@pytest.mark.asyncio
+async def test_client_request_coalesced(token):
+    async with serve(token, [200], coalesce=True) as client:
+
+        async def get():
+            async with client.request('GET', '/market/stocks', Status) as response:
+                return await response.parse_json()
+
+        results = await asyncio.gather(get(), get(), get())
+
+        assert results[0] == results[1] == results[2]
+        assert results[0] is not results[1]
+        assert client._single_flight.shared == 2
+
+
+@pytest.mark.asyncio
+async def test_client_warm_up(token):
+    async with serve(token, [200, 503, 200]) as client:
+        assert await client.warm_up(3) == 2
+        assert client.session.connector.limit_per_host == 100
+        with pytest.raises(ValueError):
+            await client.warm_up(0)
+
+
+@pytest.mark.asyncio
+async def test_client_iter_items(token):
+    async with serve(token, []) as client:
+        api = MarketApi(client)
+        async with api.market_bonds_get() as response:
+            figis = [item.figi async for item in response.iter_items(chunk_size=64)]
+
+    assert figis == [str(i) for i in range(100)]
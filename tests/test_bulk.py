@@ -0,0 +1,51 @@
+import pytest
+
+from tinvest.bulk import get_orderbooks, get_orderbooks_sync, iter_orderbooks
+from tinvest.shemas import OrderbookResponse
+
+
+def make_orderbook(figi, depth):
+    return OrderbookResponse.parse_obj(
+        {
+            'trackingId': 'id',
+            'payload': {
+                'figi': figi,
+                'depth': depth,
+                'asks': [{'price': 2, 'quantity': 1}],
+                'bids': [{'price': 1, 'quantity': 1}],
+                'minPriceIncrement': 0.01,
+                'tradeStatus': 'NormalTrading',
+            },
+        }
+    )
+
+
+def respond(path, params):
+    if params['figi'] == 'BAD':
+        return ValueError('bad figi')
+    return make_orderbook(params['figi'], params['depth'])
+
+
+@pytest.mark.asyncio
+async def test_get_orderbooks(fake_client):
+    results = await get_orderbooks(fake_client(respond), ['A', 'BAD', 'B', 'A'], 5)
+
+    assert sorted(results) == ['A', 'B', 'BAD']
+    assert results['A'].orderbook.depth == 5
+    assert not results['BAD'].ok
+    assert isinstance(results['BAD'].error, ValueError)
+
+
+@pytest.mark.asyncio
+async def test_iter_orderbooks_invalid_concurrency(fake_client):
+    with pytest.raises(ValueError):
+        async for _ in iter_orderbooks(fake_client(respond), ['A'], 1, concurrency=0):
+            pass
+
+
+def test_get_orderbooks_sync(fake_client):
+    client = fake_client(respond, sync=True)
+    results = get_orderbooks_sync(client, ['A', 'BAD'], 1, workers=2)
+
+    assert results['A'].orderbook.figi == 'A'
+    assert isinstance(results['BAD'].error, ValueError)
@@ -0,0 +1,79 @@
+import pytest
+
+from tinvest.cache import ResponseCache, ResponseData, SyncBufferedResponse, cache_key
+from tinvest.shemas import Empty
+
+
+def make_response(content=b'{"status": "Ok"}'):
+    return SyncBufferedResponse(ResponseData(200, {}, content))
+
+
+def test_cache_ttl():
+    cache = ResponseCache()
+
+    assert cache.ttl('GET', '/market/stocks') == 3600
+    assert cache.ttl('POST', '/market/stocks') is None
+    assert cache.ttl('GET', '/market/orderbook') is None
+
+
+def test_cache_key_params_order():
+    assert cache_key('get', 'url', {'a': 1, 'b': 2}) == cache_key(
+        'GET', 'url', {'b': 2, 'a': 1}
+    )
+
+
+def test_cache_key_token():
+    assert cache_key('GET', 'url', None, 'Bearer a') != cache_key(
+        'GET', 'url', None, 'Bearer b'
+    )
+    assert 'Bearer a' not in cache_key('GET', 'url', None, 'Bearer a')
+
+
+def test_cache_get_set(mocker):
+    monotonic = mocker.patch('tinvest.cache.time.monotonic', return_value=0)
+    cache = ResponseCache()
+    key = cache_key('GET', 'url', None)
+    response = make_response()
+
+    assert cache.get(key) is None
+    cache.set(key, response, 10)
+    assert cache.get(key) is response
+    monotonic.return_value = 11
+    assert cache.get(key) is None
+    assert cache.stats() == (1, 2, 0)
+
+
+def test_cache_maxsize():
+    cache = ResponseCache(maxsize=2)
+    keys = [cache_key('GET', str(i), None) for i in range(3)]
+    for key in keys:
+        cache.set(key, make_response(), 10)
+
+    assert len(cache) == 2
+    assert cache.get(keys[0]) is None
+
+
+def test_cache_invalidate():
+    cache = ResponseCache()
+    cache.set(cache_key('GET', 'http://api/market/stocks', None), make_response(), 10)
+    cache.set(cache_key('GET', 'http://api/market/bonds', None), make_response(), 10)
+
+    assert cache.invalidate('/market/stocks') == 1
+    assert cache.invalidate() == 1
+    assert len(cache) == 0
+
+
+def test_cache_invalid_maxsize():
+    with pytest.raises(ValueError):
+        ResponseCache(maxsize=0)
+
+
+def test_buffered_response_parse_model():
+    response = make_response(b'{"trackingId": "1", "status": "Ok", "payload": {}}')
+
+    first = response.parse_model(Empty)
+    first.status = 'Error'
+
+    assert response.parse_model(Empty) is not first
+    assert response.parse_model(Empty).status == 'Ok'
+    assert response.json() == {'trackingId': '1', 'status': 'Ok', 'payload': {}}
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tinvest.candles import CandleAggregator, CandleArrays, candle_start
+from tinvest.shemas import Candle, CandleResolution
+
+MSK = timezone(timedelta(hours=3))
+
+
+def make_candle(time, o, high, low, c, v):
+    return Candle(
+        figi='BBG0013HGFT4',
+        interval='1min',
+        time=time,
+        o=o,
+        h=high,
+        l=low,
+        c=c,
+        v=v,
+    )
+
+
+@pytest.mark.parametrize(
+    'resolution,expected',
+    [
+        (CandleResolution.min1, datetime(2020, 1, 23, 15, 37, tzinfo=MSK)),
+        (CandleResolution.min5, datetime(2020, 1, 23, 15, 35, tzinfo=MSK)),
+        (CandleResolution.min30, datetime(2020, 1, 23, 15, 30, tzinfo=MSK)),
+        (CandleResolution.hour, datetime(2020, 1, 23, 15, 0, tzinfo=MSK)),
+        (CandleResolution.day, datetime(2020, 1, 23, tzinfo=MSK)),
+        (CandleResolution.week, datetime(2020, 1, 20, tzinfo=MSK)),
+        (CandleResolution.month, datetime(2020, 1, 1, tzinfo=MSK)),
+    ],
+)
+def test_candle_start(resolution, expected):
+    value = datetime(2020, 1, 23, 15, 37, 12, tzinfo=MSK)
+    assert candle_start(value, resolution) == expected
+
+
+def test_candle_aggregator():
+    aggregator = CandleAggregator([CandleResolution.min5])
+
+    aggregator.update(make_candle('2020-01-23T12:35:00Z', 10, 11, 9, 10, 5))
+    aggregator.update(make_candle('2020-01-23T12:35:00Z', 10, 12, 9, 11, 7))
+    (candle,) = aggregator.update(make_candle('2020-01-23T12:36:00Z', 11, 11, 8, 9, 2))
+
+    assert (candle.o, candle.h, candle.l, candle.c, candle.v) == (10, 12, 8, 9, 9)
+    assert candle.time == '2020-01-23T12:35:00Z'
+    assert candle.interval == CandleResolution.min5
+
+    closed, candle = aggregator.update(
+        {
+            'figi': 'BBG0013HGFT4',
+            'interval': '1min',
+            'time': '2020-01-23T12:40:00Z',
+            'o': 9,
+            'h': 9,
+            'l': 9,
+            'c': 9,
+            'v': 1,
+        }
+    )
+    assert (closed.o, closed.h, closed.l, closed.c, closed.v) == (10, 12, 8, 9, 9)
+    assert closed.time == '2020-01-23T12:35:00Z'
+    assert candle.time == '2020-01-23T12:40:00Z'
+    assert candle.v == 1
+    assert aggregator.update(make_candle('2020-01-23T12:36:00Z', 1, 1, 1, 1, 1)) == []
+
+
+def test_candle_aggregator_rejects_min1():
+    with pytest.raises(ValueError):
+        CandleAggregator([CandleResolution.min1])
+
+
+def test_candle_arrays():
+    arrays = CandleArrays.parse_raw(
+        '{"trackingId": "id", "status": "Ok", "payload": {"figi": "BBG0013HGFT4", '
+        '"interval": "hour", "candles": [{"figi": "BBG0013HGFT4", '
+        '"interval": "hour", "time": "2020-01-23T12:00:00Z", '
+        '"o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": 10}]}}'
+    )
+
+    assert len(arrays) == 1
+    assert arrays.interval == CandleResolution.hour
+    assert arrays.time[0] == 1579780800 * 10 ** 9
+    assert list(arrays.v) == [10.0]
+
+    candle = make_candle('2020-01-23T12:00:00Z', 1, 2, 0.5, 1.5, 10)
+    assert list(CandleArrays.from_candles([candle]).time) == list(arrays.time)
+
+
+def test_candle_arrays_to_numpy():
+    np = pytest.importorskip('numpy')
+    arrays = CandleArrays('BBG0013HGFT4', CandleResolution.hour)
+    arrays.append('2020-01-23T12:00:00Z', 1, 2, 0.5, 1.5, 10)
+
+    columns = arrays.to_numpy()
+
+    assert columns['time'][0] == np.datetime64('2020-01-23T12:00:00', 'ns')
+    assert columns['c'][0] == 1.5
+    assert columns['l'][0] == arrays.low[0] == 0.5
+    columns['c'][0] = 3
+    assert arrays.c[0] == 3
+
+
+def test_candle_arrays_to_pandas():
+    pytest.importorskip('pandas')
+    arrays = CandleArrays('BBG0013HGFT4', CandleResolution.hour)
+    arrays.append('2020-01-23T12:00:00Z', 1, 2, 0.5, 1.5, 10)
+
+    frame = arrays.to_pandas()
+
+    assert list(frame.columns) == ['o', 'h', 'l', 'c', 'v']
+    assert str(frame.index[0]) == '2020-01-23 12:00:00+00:00'
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tinvest.candles_cache import CandlesCache
+from tinvest.shemas import Candle
+
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture()
+def cache():
+    _cache = CandlesCache()
+    yield _cache
+    _cache.close()
+
+
+def make_candle(hour):
+    time = (START + timedelta(hours=hour)).isoformat().replace('+00:00', 'Z')
+    return Candle(figi='A', interval='hour', time=time, o=1, h=2, l=0.5, c=1.5, v=10)
+
+
+def test_cache_missing_and_get(cache):
+    assert cache.missing('A', 'hour', START, START + timedelta(days=1)) == [
+        (START, START + timedelta(days=1))
+    ]
+
+    cache.put('A', 'hour', START, START + timedelta(hours=2), map(make_candle, [0, 1]))
+    cache.put(
+        'A',
+        'hour',
+        START + timedelta(hours=4),
+        START + timedelta(hours=6),
+        [make_candle(4)],
+    )
+
+    assert cache.missing('A', 'hour', START, START + timedelta(hours=8)) == [
+        (START + timedelta(hours=2), START + timedelta(hours=4)),
+        (START + timedelta(hours=6), START + timedelta(hours=8)),
+    ]
+    assert cache.missing('B', 'hour', START, START + timedelta(hours=1)) == [
+        (START, START + timedelta(hours=1))
+    ]
+    candles = cache.get('A', 'hour', START, START + timedelta(hours=8))
+    assert candles == [make_candle(0), make_candle(1), make_candle(4)]
+
+
+def test_cache_merges_coverage(cache):
+    cache.put('A', 'hour', START, START + timedelta(hours=2), [])
+    cache.put('A', 'hour', START + timedelta(hours=2), START + timedelta(hours=4), [])
+
+    assert cache.missing('A', 'hour', START, START + timedelta(hours=4)) == []
+    assert cache._db.execute('SELECT COUNT(*) FROM coverage').fetchone() == (1,)
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from tinvest.dispatcher import BackpressurePolicy, Dispatcher, WorkerMode
+from tinvest.utils import Func
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_calls_handlers():
+    calls = []
+
+    async def async_handler(api, data):
+        calls.append(('async', data))
+
+    def sync_handler(api, data):
+        calls.append(('sync', data))
+
+    dispatcher = Dispatcher(mode=WorkerMode.thread)
+    await dispatcher.put('candle', (Func(async_handler), Func(sync_handler)), None, 1)
+    await asyncio.sleep(0.1)
+    await dispatcher.close()
+
+    assert sorted(calls) == [('async', 1), ('sync', 1)]
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_drop_oldest():
+    dispatcher = Dispatcher(maxsize=2, policy=BackpressurePolicy.drop_oldest)
+    for i in range(5):
+        await dispatcher.put('orderbook', (), None, i)
+
+    stats = dispatcher.stats()['orderbook']
+    await dispatcher.close()
+
+    assert stats.depth == 2
+    assert stats.dropped == 3
+    assert stats.enqueued == 5
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_coalesce_latest_per_key():
+    received = []
+
+    async def handler(api, data):
+        received.append(data)
+
+    dispatcher = Dispatcher(policy=BackpressurePolicy.coalesce)
+    await dispatcher.put('orderbook', (Func(handler),), None, 1, key='A')
+    await dispatcher.put('orderbook', (Func(handler),), None, 2, key='B')
+    await dispatcher.put('orderbook', (Func(handler),), None, 3, key='A')
+    stats = dispatcher.stats()['orderbook']
+    await asyncio.sleep(0.01)
+    await dispatcher.close()
+
+    assert stats.coalesced == 1
+    assert received == [3, 2]
+
+
+def test_dispatcher_validates_arguments():
+    with pytest.raises(ValueError):
+        Dispatcher(maxsize=0)
+    with pytest.raises(ValueError):
+        Dispatcher(workers=0)
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tinvest.candles_cache import CandlesCache
+from tinvest.history import CandlesLoader, merge_candles, split_range
+from tinvest.shemas import Candle, CandleResolution, CandlesResponse
+from tinvest.utils import parse_datetime
+
+
+def respond(path, params):
+    start = parse_datetime(params['from'])
+    return CandlesResponse.parse_obj(
+        {
+            'trackingId': 'id',
+            'payload': {
+                'figi': params['figi'],
+                'interval': params['interval'],
+                'candles': [
+                    {
+                        'figi': params['figi'],
+                        'interval': params['interval'],
+                        'time': (start + timedelta(hours=i))
+                        .isoformat()
+                        .replace('+00:00', 'Z'),
+                        'o': 1,
+                        'h': 1,
+                        'l': 1,
+                        'c': 1,
+                        'v': 1,
+                    }
+                    for i in range(2)
+                ],
+            },
+        }
+    )
+
+
+def test_split_range():
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    windows = split_range(start, start + timedelta(days=2, hours=1), '1min')
+
+    assert windows == [
+        (start, start + timedelta(days=1)),
+        (start + timedelta(days=1), start + timedelta(days=2)),
+        (start + timedelta(days=2), start + timedelta(days=2, hours=1)),
+    ]
+    assert split_range(start, start, CandleResolution.hour) == []
+
+
+@pytest.mark.asyncio
+async def test_candles_loader_load_many(fake_client):
+    # the first request fails once and is retried
+    client = fake_client(respond, fail=lambda params: len(client.calls) == 1)
+    loader = CandlesLoader(client, concurrency=2, retry_delay=0)
+    start = datetime(2020, 1, 1)
+
+    result = await loader.load_many(
+        ['A', 'B'], start, start + timedelta(days=3), CandleResolution.hour
+    )
+
+    assert len(client.calls) == 3
+    assert client.calls[0]['interval'] == 'hour'
+    assert [candle.time for candle in result['A']] == [
+        '2020-01-01T00:00:00Z',
+        '2020-01-01T01:00:00Z',
+    ]
+    assert len(result['B']) == 2
+
+
+def test_merge_candles():
+    def candle(time, c):
+        return Candle(figi='A', interval='day', time=time, o=1, h=1, l=1, c=c, v=1)
+
+    merged = merge_candles(
+        [
+            candle('2020-01-02T00:00:00Z', 1),
+            candle('2020-01-01T00:00:00Z', 2),
+            candle('2020-01-02T00:00:00Z', 3),
+        ]
+    )
+    assert [(item.time, item.c) for item in merged] == [
+        ('2020-01-01T00:00:00Z', 2),
+        ('2020-01-02T00:00:00Z', 3),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_candles_loader_fetches_only_gaps(fake_client):
+    client = fake_client(respond)
+    loader = CandlesLoader(client, cache=CandlesCache())
+    start = datetime(2020, 1, 1)
+
+    first = await loader.load('A', start, start + timedelta(days=7), 'hour')
+    second = await loader.load('A', start, start + timedelta(days=14), 'hour')
+
+    assert len(client.calls) == 2
+    assert client.calls[1]['from'] == '2020-01-08T00:00:00Z'
+    assert [candle.time for candle in second[:2]] == [candle.time for candle in first]
+    assert len(second) == 4
@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+from tinvest.instruments import InstrumentRegistry
+from tinvest.shemas import (
+    InstrumentType,
+    MarketInstrument,
+    MarketInstrumentListResponse,
+)
+
+
+def make_instrument(figi, ticker, name, isin=None, lot=1):
+    return MarketInstrument(figi=figi, ticker=ticker, name=name, isin=isin, lot=lot)
+
+
+def instrument_list(instruments):
+    return MarketInstrumentListResponse.parse_obj(
+        {
+            'trackingId': 'id',
+            'payload': {
+                'instruments': [i.dict() for i in instruments],
+                'total': len(instruments),
+            },
+        }
+    )
+
+
+@pytest.fixture()
+def registry():
+    _registry = InstrumentRegistry()
+    _registry.update(
+        InstrumentType.stock,
+        [
+            make_instrument('BBG000B9XRY4', 'AAPL', 'Apple', 'US0378331005'),
+            make_instrument('BBG000BPH459', 'MSFT', 'Microsoft Corp'),
+            make_instrument('BBG000BCSST7', 'AMZN', 'Amazon.com'),
+        ],
+    )
+    return _registry
+
+
+def test_registry_lookup(registry):
+    assert registry.by_figi('BBG000B9XRY4').ticker == 'AAPL'
+    assert registry.by_ticker('aapl').figi == 'BBG000B9XRY4'
+    assert registry.by_isin('US0378331005').ticker == 'AAPL'
+    assert registry.type_of('BBG000B9XRY4') == InstrumentType.stock
+    assert registry.by_ticker('TSLA') is None
+
+
+def test_registry_search(registry):
+    assert [i.ticker for i in registry.search('a')] == ['AAPL', 'AMZN']
+    assert [i.ticker for i in registry.search('micro')] == ['MSFT']
+    assert len(registry.search('a', limit=1)) == 1
+
+
+def test_registry_update_is_incremental(registry):
+    changes = registry.update(
+        InstrumentType.stock,
+        [
+            make_instrument('BBG000B9XRY4', 'AAPL', 'Apple', 'US0378331005'),
+            make_instrument('BBG000BPH459', 'MSFT', 'Microsoft Corp', lot=10),
+        ],
+    )
+
+    assert changes == 2
+    assert registry.by_ticker('MSFT').lot == 10
+    assert registry.by_ticker('AMZN') is None
+    assert [i.ticker for i in registry.search('a')] == ['AAPL']
+
+
+def test_registry_snapshot(registry, tmp_path):
+    path = str(tmp_path / 'instruments.json')
+    registry.save(path)
+
+    restored = InstrumentRegistry()
+    assert restored.restore(path)
+    assert len(restored) == 3
+    assert restored.by_figi('BBG000B9XRY4') == registry.by_figi('BBG000B9XRY4')
+    assert not InstrumentRegistry().restore(str(tmp_path / 'missing.json'))
+
+    corrupt = tmp_path / 'corrupt.json'
+    corrupt.write_text('{"version": ')
+    assert not InstrumentRegistry().restore(str(corrupt))
+    corrupt.write_text('[]')
+    assert not InstrumentRegistry().restore(str(corrupt))
+
+
+@pytest.mark.parametrize(
+    'item',
+    [
+        {'figi': 'BBG000B9XRY4', 'ticker': 'AAPL'},
+        {'figi': 'BBG000B9XRY4', 'type': 'Stock'},
+        {'type': 'Stock', 'figi': 'BBG000B9XRY4', 'ticker': 'AAPL', 'lot': 'x'},
+        'BBG000B9XRY4',
+    ],
+)
+def test_registry_ignores_malformed_snapshot(registry, tmp_path, item):
+    path = tmp_path / 'instruments.json'
+    registry.save(str(path))
+    snapshot = json.loads(path.read_text())
+    snapshot['instruments'].append(item)
+    path.write_text(json.dumps(snapshot))
+
+    restored = InstrumentRegistry()
+    assert not restored.restore(str(path))
+    assert len(restored) == 0
+
+
+@pytest.mark.asyncio
+async def test_registry_refresh(fake_client):
+    lists = {
+        '/market/stocks': [make_instrument('BBG000B9XRY4', 'AAPL', 'Apple')],
+        '/market/currencies': [
+            make_instrument('BBG0013HGFT4', 'USD000UTSTOM', 'Dollar')
+        ],
+    }
+    client = fake_client(lambda path, params: instrument_list(lists.get(path, [])))
+    registry = InstrumentRegistry(client)
+
+    assert await registry.refresh() == 2
+    assert await registry.refresh() == 0
+    assert registry.type_of('BBG0013HGFT4') == InstrumentType.currency
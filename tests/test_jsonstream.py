@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from tinvest.jsonstream import iter_array_items, list_field
+from tinvest.shemas import MarketInstrument, MarketInstrumentListResponse
+
+
+def chunked(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+DOCUMENT = json.dumps(
+    {
+        'trackingId': '"instruments": [1]',
+        'payload': {
+            'instruments': [{'name': 'Тинькофф', 'n': i} for i in range(3)] + [12345],
+            'total': 4,
+        },
+        'status': 'Ok',
+    },
+    ensure_ascii=False,
+).encode()
+
+
+@pytest.mark.parametrize('size', [1, 7, len(DOCUMENT)])
+def test_iter_array_items(size):
+    items = list(iter_array_items(chunked(DOCUMENT, size), 'instruments'))
+
+    assert items == [{'name': 'Тинькофф', 'n': i} for i in range(3)] + [12345]
+
+
+def test_iter_array_items_truncated():
+    with pytest.raises(ValueError):
+        list(iter_array_items([DOCUMENT[:60]], 'instruments'))
+
+
+@pytest.mark.parametrize('size', [1, 5, 100])
+def test_iter_array_items_partial_literals(size):
+    document = b'{"items": [true, false, null, -1.5e+3, "\\u00e9\\"", {"a": [1]}]}'
+
+    assert list(iter_array_items(chunked(document, size), 'items')) == [
+        True,
+        False,
+        None,
+        -1500.0,
+        '\u00e9"',
+        {'a': [1]},
+    ]
+
+
+def test_iter_array_items_malformed():
+    chunks = [b'{"items": [1, {"a": 1 "b": 2}, 3', b']}']
+    items = iter_array_items(chunks, 'items')
+
+    with pytest.raises(ValueError, match='at character 22'):
+        next(items)
+
+
+def test_list_field():
+    assert list_field(MarketInstrumentListResponse) == ('instruments', MarketInstrument)
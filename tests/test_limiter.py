@@ -0,0 +1,32 @@
+import pytest
+
+from tinvest.limiter import RateLimiter, TokenBucket, endpoint_group
+
+
+def test_endpoint_group():
+    assert endpoint_group('/market/orderbook') == 'market'
+    assert endpoint_group('/orders') == 'orders'
+
+
+def test_token_bucket_reserve():
+    bucket = TokenBucket(2, 1)
+    now = bucket._updated
+
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == pytest.approx(0.5)
+    assert bucket.reserve(now) == pytest.approx(1.0)
+    assert bucket.reserve(now + 10) == 0
+
+
+def test_rate_limiter_groups():
+    limiter = RateLimiter({'market': (1, 60)})
+
+    assert limiter.reserve('/market/stocks') == 0
+    assert limiter.reserve('/market/bonds') > 0
+    assert limiter.reserve('/orders') == 0
+
+
+def test_token_bucket_validates_limit():
+    with pytest.raises(ValueError):
+        TokenBucket(0, 60)
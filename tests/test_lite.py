@@ -0,0 +1,96 @@
+from tinvest.lite import (
+    CandleLite,
+    OperationLite,
+    OperationTradeLite,
+    OrderbookLite,
+    from_lite,
+    to_lite,
+)
+from tinvest.parsing import ParseMode, parse_obj
+from tinvest.shemas import (
+    Candle,
+    CandleResolution,
+    CandlesResponse,
+    Currency,
+    Operation,
+    OperationsResponse,
+    OrderbookStreamingSchema,
+)
+
+CANDLE = {
+    'figi': 'BBG0013HGFT4',
+    'interval': '1min',
+    'time': '2019-08-07T15:35:00Z',
+    'o': 64.0,
+    'h': 64.5,
+    'l': 63.5,
+    'c': 64.1,
+    'v': 100,
+}
+
+OPERATION = {
+    'id': '1',
+    'status': 'Done',
+    'currency': 'RUB',
+    'payment': -10.5,
+    'date': '2020-01-01T10:00:00+03:00',
+    'isMarginCall': False,
+    'operationType': 'Buy',
+    'commission': {'currency': 'RUB', 'value': -0.1},
+    'trades': [
+        {
+            'tradeId': '2',
+            'date': '2020-01-01T10:00:00+03:00',
+            'price': 10.5,
+            'quantity': 1,
+        }
+    ],
+}
+
+
+def test_parse_lite_nested():
+    response = parse_obj(
+        CandlesResponse,
+        {
+            'trackingId': 'id',
+            'payload': {'candles': [CANDLE], 'figi': 'F', 'interval': '1min'},
+        },
+        ParseMode.lite,
+    )
+
+    candle = response.payload.candles[0]
+    assert isinstance(candle, CandleLite)
+    assert candle.interval is CandleResolution.min1
+    assert not hasattr(candle, '__dict__')
+
+
+def test_candle_lite_round_trip():
+    model = Candle.parse_obj(CANDLE)
+    lite = to_lite(model)
+
+    assert lite == CandleLite.from_dict(CANDLE)
+    assert from_lite(lite) == model
+
+
+def test_operation_lite_round_trip():
+    model = Operation.parse_obj(OPERATION)
+    lite = parse_obj(
+        OperationsResponse,
+        {'trackingId': 'id', 'payload': {'operations': [OPERATION]}},
+        ParseMode.lite,
+    ).payload.operations[0]
+
+    assert isinstance(lite, OperationLite)
+    assert lite == to_lite(model)
+    assert lite.commission.currency is Currency.rub
+    assert isinstance(lite.trades[0], OperationTradeLite)
+    assert lite.trades[0].trade_id == '2'
+    assert from_lite(lite) == model
+
+
+def test_orderbook_lite():
+    payload = {'figi': 'F', 'depth': 1, 'bids': [[1.0, 2.0]], 'asks': [[2.0, 1.0]]}
+    lite = parse_obj(OrderbookStreamingSchema, payload, ParseMode.lite)
+
+    assert isinstance(lite, OrderbookLite)
+    assert lite.to_model().bids == [[1.0, 2.0]]
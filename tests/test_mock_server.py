@@ -0,0 +1,167 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tinvest.apis import MarketApi, OperationsApi, OrdersApi, PortfolioApi
+from tinvest.async_client import AsyncClient
+from tinvest.mock_server import MockServer, MockServerConfig
+from tinvest.shemas import LimitOrderRequest
+from tinvest.streaming import Streaming, StreamingEvents
+from tinvest.utils import format_datetime
+
+
+async def parse(request):
+    async with request as response:
+        assert response.status == 200, await response.text()
+        return (await response.parse_json()).payload
+
+
+@pytest.mark.asyncio
+async def test_rest_routes(token):
+    async with MockServer(MockServerConfig(instruments=8, seed=1)) as server:
+        client = AsyncClient(token, base_url=server.url)
+        market = MarketApi(client)
+        orders = OrdersApi(client)
+        to = datetime(2020, 1, 3, tzinfo=timezone.utc)
+        from_ = to - timedelta(days=2)
+        try:
+            stocks = await parse(market.market_stocks_get())
+            figi = stocks.instruments[0].figi
+            book = await parse(market.market_orderbook_get(figi, 5))
+            candles = await parse(
+                market.market_candles_get(
+                    figi, format_datetime(from_), format_datetime(to), 'hour'
+                )
+            )
+            await parse(PortfolioApi(client).portfolio_get())
+            operations = await parse(
+                OperationsApi(client).operations_get(
+                    format_datetime(from_), format_datetime(to), figi
+                )
+            )
+            body = LimitOrderRequest(lots=1, operation='Buy', price=book.bids[0].price)
+            placed = await parse(orders.orders_limit_order_post(figi, body))
+            assert [o.order_id for o in await parse(orders.orders_get())] == [
+                placed.order_id
+            ]
+            await parse(orders.orders_cancel_post(placed.order_id))
+            assert await parse(orders.orders_get()) == []
+        finally:
+            await client.close()
+
+    assert stocks.total == 2
+    assert len(book.bids) == len(book.asks) == 5
+    assert book.bids[0].price < book.asks[0].price
+    assert len(candles.candles) == 48
+    assert len(operations.operations) == 2
+    assert server.stats().requests == 9
+
+
+@pytest.mark.asyncio
+async def test_error_injection(token):
+    config = MockServerConfig(throttle_rate=0.5, error_rate=0.5, retry_after=1)
+    async with MockServer(config) as server:
+        client = AsyncClient(token, base_url=server.url)
+        statuses = []
+        try:
+            for _ in range(20):
+                async with MarketApi(client).market_stocks_get() as response:
+                    statuses.append(response.status)
+                    if response.status == 429:
+                        assert response.headers['Retry-After'] == '1'
+        finally:
+            await client.close()
+
+    stats = server.stats()
+    assert set(statuses) == {429, 500}
+    assert statuses.count(429) == stats.throttled
+    assert stats.throttled + stats.errors == 20
+
+
+@pytest.mark.asyncio
+async def test_client_errors(token):
+    async with MockServer(MockServerConfig(instruments=2)) as server:
+        client = AsyncClient(token, base_url=server.url)
+        market = MarketApi(client)
+        requests = [
+            market.market_search_by_figi_get('UNKNOWN'),
+            market.market_orderbook_get('UNKNOWN', 5),
+            OrdersApi(client).orders_cancel_post('missing'),
+            client.request('GET', '/market/orderbook', params={'depth': 5}),
+            market.market_orderbook_get('BBG000000001', 'deep'),
+        ]
+        statuses = []
+        try:
+            for request in requests:
+                async with request as response:
+                    statuses.append(response.status)
+        finally:
+            await client.close()
+
+    assert statuses == [404, 404, 404, 400, 400]
+    assert server.stats().errors == 0
+
+
+@pytest.mark.asyncio
+async def test_streaming(token):
+    events = StreamingEvents()
+    candles = []
+    errors = []
+    done = asyncio.Event()
+
+    @events.startup()
+    async def startup(api):
+        await api.candle.subscribe('BBG000000001', '1min')
+        await api.orderbook.subscribe('UNKNOWN', 5, request_id='r1')
+
+    @events.candle()
+    def on_candle(api, candle):
+        candles.append(candle)
+        if len(candles) == 2:
+            done.set()
+
+    @events.error()
+    def on_error(api, error):
+        errors.append(error)
+
+    async with MockServer(MockServerConfig(stream_interval=0.01)) as server:
+        streaming = Streaming(token, url=server.streaming_url)
+        task = asyncio.ensure_future(streaming.add_handlers(events).run())
+        try:
+            await asyncio.wait_for(done.wait(), 5)
+        finally:
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    assert {c.figi for c in candles} == {'BBG000000001'}
+    assert [e.request_id for e in errors] == ['r1']
+
+
+@pytest.mark.asyncio
+async def test_streaming_subscribe_many_in_startup(token):
+    events = StreamingEvents()
+    summaries = []
+    done = asyncio.Event()
+
+    @events.startup()
+    async def startup(api):
+        figis = ['BBG000000001', 'BBG000000002', 'UNKNOWN']
+        summaries.append(await api.candle.subscribe_many(figis, '1min'))
+        done.set()
+
+    async with MockServer(MockServerConfig(stream_interval=0.01)) as server:
+        streaming = Streaming(token, url=server.streaming_url)
+        task = asyncio.ensure_future(streaming.add_handlers(events).run())
+        try:
+            await asyncio.wait_for(done.wait(), 5)
+        finally:
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    [summary] = summaries
+    assert [r.ok for r in summary.results] == [True, True, False]
+    assert list(summary.errors) == ['UNKNOWN']
+    assert not summary.timed_out
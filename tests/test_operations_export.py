@@ -0,0 +1,103 @@
+import csv
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from tinvest.operations_export import ExportFormat, OperationsExporter
+from tinvest.shemas import Operation
+from tinvest.utils import parse_datetime
+
+
+def respond(path, params):
+    start = parse_datetime(params['from'])
+    # the first operation of every window is also returned by the previous one
+    return [
+        Operation.parse_obj(
+            {
+                'id': date.strftime('%Y%m%d'),
+                'currency': 'RUB',
+                'date': date.isoformat(),
+                'isMarginCall': False,
+                'payment': -10,
+                'status': 'Done',
+                'commission': {'currency': 'RUB', 'value': -0.1},
+            }
+        )
+        for date in (start + timedelta(days=day) for day in (-1, 0, 1))
+    ]
+
+
+def fails_from(date):
+    return lambda params: params['from'] >= date
+
+
+FROM = datetime(2020, 1, 1)
+TO = datetime(2020, 1, 11)
+
+
+@pytest.mark.asyncio
+async def test_export_jsonl(tmp_path, fake_client):
+    path = str(tmp_path / 'operations.jsonl')
+    exporter = OperationsExporter(fake_client(respond), window=timedelta(days=2))
+
+    assert await exporter.export(path, FROM, TO) == 11
+
+    with open(path) as f:
+        ids = [json.loads(line)['id'] for line in f]
+    assert len(ids) == len(set(ids)) == 11
+
+
+@pytest.mark.asyncio
+async def test_export_csv(tmp_path, fake_client):
+    path = str(tmp_path / 'operations.csv')
+    exporter = OperationsExporter(fake_client(respond), window=timedelta(days=5))
+
+    await exporter.export(path, FROM, TO, fmt=ExportFormat.csv)
+
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]['commission'] == '-0.1'
+    assert rows[0]['currency'] == 'RUB'
+
+
+@pytest.mark.asyncio
+async def test_export_resume(tmp_path, fake_client):
+    path = str(tmp_path / 'operations.jsonl')
+    failing = fake_client(respond, fails_from('2020-01-07'))
+    exporter = OperationsExporter(
+        failing, window=timedelta(days=2), concurrency=1, retries=0
+    )
+    with pytest.raises(ConnectionError):
+        await exporter.export(path, FROM, TO)
+
+    client = fake_client(respond)
+    exporter = OperationsExporter(client, window=timedelta(days=2))
+    await exporter.export(path, FROM, TO)
+
+    assert all(call['from'] >= '2020-01-07' for call in client.calls)
+    with open(path) as f:
+        ids = [json.loads(line)['id'] for line in f]
+    assert len(ids) == len(set(ids)) == 11
+
+
+@pytest.mark.asyncio
+async def test_export_resume_truncated_line(tmp_path, fake_client):
+    path = str(tmp_path / 'operations.jsonl')
+    exporter = OperationsExporter(
+        fake_client(respond, fails_from('2020-01-07')),
+        window=timedelta(days=2),
+        concurrency=1,
+        retries=0,
+    )
+    with pytest.raises(ConnectionError):
+        await exporter.export(path, FROM, TO)
+    with open(path, 'a') as f:
+        f.write('{"id": "2020')
+
+    exporter = OperationsExporter(fake_client(respond), window=timedelta(days=2))
+    await exporter.export(path, FROM, TO)
+
+    with open(path) as f:
+        ids = [json.loads(line)['id'] for line in f]
+    assert len(ids) == len(set(ids)) == 11
@@ -0,0 +1,96 @@
+import pytest
+
+from tinvest.dispatcher import Dispatcher
+from tinvest.orderbook import (
+    ColumnarOrderbook,
+    ColumnarOrderbooks,
+    LevelChange,
+    OrderbookStore,
+)
+from tinvest.streaming import EventName, Streaming, StreamingOptions
+
+BIDS = [[10.0, 1], [9.0, 2], [8.0, 3]]
+ASKS = [[11.0, 2], [12.0, 2]]
+
+
+@pytest.fixture(params=[True, False], ids=['numpy', 'array'])
+def book(request):
+    return ColumnarOrderbook('BBG0013HGFT4', 3, use_numpy=request.param).update(
+        BIDS, ASKS
+    )
+
+
+def test_orderbook_helpers(book):
+    assert book.mid() == 10.5
+    assert book.spread() == 1.0
+    assert list(book.bids.cumulative_depth()) == [1.0, 3.0, 6.0]
+    assert book.asks.vwap(3) == pytest.approx((11 * 2 + 12) / 3)
+    assert book.asks.vwap(5) is None
+    assert book.imbalance() == pytest.approx((6 - 4) / 10)
+    assert book.imbalance(1) == pytest.approx((1 - 2) / 3)
+
+
+def test_orderbook_update_reuses_buffers(book):
+    prices = book.bids
+    book.update([[5.0, 1]], [])
+
+    assert book.bids is prices
+    assert list(book.bids) == [(5.0, 1.0)]
+    assert book.mid() is None
+    assert book.imbalance() == 1.0
+
+
+def test_orderbook_copy_is_independent(book):
+    snapshot = book.copy()
+    book.update([[5.0, 1]], [])
+
+    assert list(snapshot.bids) == [(10.0, 1.0), (9.0, 2.0), (8.0, 3.0)]
+    assert snapshot.mid() == 10.5
+    assert book.mid() is None
+
+
+def test_streaming_snapshots_orderbooks_for_dispatcher(token, mocker):
+    payload = {'figi': 'BBG0013HGFT4', 'depth': 2, 'bids': BIDS[:2], 'asks': ASKS}
+    books = ColumnarOrderbooks()
+    session = mocker.Mock()
+    direct = Streaming(
+        token, session=session, options=StreamingOptions(orderbooks=books)
+    )
+    options = StreamingOptions(orderbooks=books, dispatcher=Dispatcher())
+    queued = Streaming(token, session=session, options=options)
+
+    assert direct._parse(EventName.orderbook, payload) is books.get(payload['figi'], 2)
+    snapshot = queued._parse(EventName.orderbook, payload)
+    assert snapshot is not books.get(payload['figi'], 2)
+    assert snapshot.updates == 2
+
+
+def test_orderbooks_keyed_by_figi_and_depth():
+    books = ColumnarOrderbooks()
+    payload = {'figi': 'BBG0013HGFT4', 'depth': 2, 'bids': BIDS[:2], 'asks': ASKS}
+    first = books.update(payload)
+    second = books.update(payload)
+
+    assert first is second
+    assert first.updates == 2
+    assert books.get('BBG0013HGFT4', 2) is first
+    assert books.get('BBG0013HGFT4', 5) is None
+
+
+def test_orderbook_store_detects_changes():
+    store = OrderbookStore(watch_depth=1)
+    payload = {'figi': 'BBG0013HGFT4', 'depth': 2, 'bids': BIDS[:2], 'asks': ASKS}
+
+    delta = store.update(payload)
+    assert delta.top_changed
+    assert len(delta.changes) == 4
+
+    assert store.update(dict(payload)) is None
+    assert store.update({**payload, 'bids': [BIDS[0], [9.0, 5]]}) is None
+    assert store.delta('BBG0013HGFT4', 2).changes == (
+        LevelChange('bids', 1, [9.0, 2], [9.0, 5]),
+    )
+
+    delta = store.update({**payload, 'asks': [[10.5, 1], *ASKS]})
+    assert delta.top_changed
+    assert store.get('BBG0013HGFT4', 2)[1][0] == [10.5, 1]
@@ -0,0 +1,77 @@
+import copy
+import pickle
+
+import pytest
+
+from tinvest.parsing import LazyModel, ParseMode, compile_model, json_loads, parse_obj
+from tinvest.shemas import (
+    Currency,
+    InstrumentType,
+    OrderbookStreamingSchema,
+    PortfolioResponse,
+)
+
+
+@pytest.fixture()
+def payload():
+    return json_loads(
+        '{"figi": "BBG0013HGFT4", "depth": 1, '
+        '"bids": [[64.5, 10]], "asks": [[64.6, 3]]}'
+    )
+
+
+def test_parse_obj_validate(payload):
+    data = parse_obj(OrderbookStreamingSchema, payload)
+    assert data.bids == [(64.5, 10.0)]
+
+
+def test_parse_obj_construct(payload):
+    data = parse_obj(OrderbookStreamingSchema, payload, ParseMode.construct)
+    assert isinstance(data, OrderbookStreamingSchema)
+    assert data.bids == [[64.5, 10]]
+
+
+def test_parse_obj_lazy(payload):
+    data = parse_obj(OrderbookStreamingSchema, payload, ParseMode.lazy)
+    assert isinstance(data, LazyModel)
+    assert data.raw is payload
+    assert data.asks == [(64.6, 3.0)]
+    assert data.validate() is data.validate()
+
+
+@pytest.mark.parametrize('clone', [copy.copy, lambda x: pickle.loads(pickle.dumps(x))])
+def test_lazy_model_copies(payload, clone):
+    data = parse_obj(OrderbookStreamingSchema, payload, ParseMode.lazy)
+    cloned = clone(data)
+    assert isinstance(cloned, LazyModel)
+    assert cloned.raw == payload
+    assert cloned.bids == [(64.5, 10.0)]
+    assert not hasattr(cloned, '_missing')
+
+
+def test_compile_model():
+    obj = {
+        'trackingId': 'id',
+        'payload': {
+            'positions': [
+                {
+                    'figi': 'BBG000B9XRY4',
+                    'instrumentType': 'Stock',
+                    'balance': 1,
+                    'lots': 1,
+                    'expectedYield': {'currency': 'USD', 'value': 1.5},
+                }
+            ]
+        },
+    }
+
+    data = compile_model(PortfolioResponse)(obj)
+
+    assert data == PortfolioResponse.parse_obj(obj)
+    position = data.payload.positions[0]
+    assert position.instrument_type is InstrumentType.stock
+    assert position.expected_yield.currency is Currency.usd
+    assert position.ticker is None
+    assert data.status == 'Ok'
+    assert data.__fields_set__ == {'payload', 'tracking_id'}
+    assert compile_model(PortfolioResponse) is compile_model(PortfolioResponse)
@@ -0,0 +1,106 @@
+import json
+import time
+
+import pytest
+
+from tinvest.recording import StreamRecorder, StreamReplay, read_frames
+from tinvest.streaming import Streaming, StreamingEvents, StreamingOptions
+
+
+def candle(figi, i):
+    payload = {
+        'figi': figi,
+        'interval': '1min',
+        'o': i,
+        'c': i,
+        'h': i,
+        'l': i,
+        'v': 1,
+        'time': '2019-08-07T15:35:00Z',
+    }
+    return json.dumps({'event': 'candle', 'payload': payload, 'time': ''})
+
+
+def test_recording_roundtrip(tmp_path):
+    path = str(tmp_path / 'session.rec')
+    frames = [candle('A', i) for i in range(100)]
+    with StreamRecorder(path, block_size=1024) as recorder:
+        for frame in frames:
+            recorder.write(frame)
+    with StreamRecorder(path) as recorder:
+        recorder.write('{"ä": 1}')
+
+    recorded = list(read_frames(path))
+
+    assert [text for _, text in recorded] == frames + ['{"ä": 1}']
+    offsets = [offset for offset, _ in recorded]
+    assert offsets == sorted(offsets)
+
+
+def test_recording_ignores_truncated_block(tmp_path):
+    path = tmp_path / 'session.rec'
+    with StreamRecorder(str(path), block_size=1) as recorder:
+        recorder.write('first')
+        recorder.write('second')
+    path.write_bytes(path.read_bytes()[:-3])
+
+    assert [text for _, text in read_frames(str(path))] == ['first']
+
+
+def test_read_frames_rejects_other_files(tmp_path):
+    path = tmp_path / 'other'
+    path.write_bytes(b'not a recording at all')
+
+    with pytest.raises(ValueError):
+        list(read_frames(str(path)))
+
+
+def test_replay_validates_speed(tmp_path):
+    with pytest.raises(ValueError):
+        StreamReplay(str(tmp_path / 'session.rec'), speed=0)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('speed', [None, 20])
+async def test_streaming_replays_recording(tmp_path, token, speed):
+    path = str(tmp_path / 'session.rec')
+    with StreamRecorder(path) as recorder:
+        recorder.write(candle('A', 1))
+        time.sleep(0.1)
+        recorder.write(candle('B', 2))
+
+    events = StreamingEvents()
+    received = []
+
+    @events.startup()
+    async def startup(api):
+        await api.candle.subscribe('A', '1min')
+
+    @events.candle()
+    def on_candle(api, payload):
+        received.append((payload.figi, payload.c))
+
+    replay = StreamReplay(path, speed=speed)
+    streaming = Streaming(token).add_handlers(events)
+    started = time.monotonic()
+    await streaming.replay(replay)
+
+    assert received == [('A', 1), ('B', 2)]
+    assert replay.frames == 2
+    elapsed = time.monotonic() - started
+    assert elapsed < 0.1 if speed is None else 0.004 < elapsed < 0.1
+
+
+@pytest.mark.asyncio
+async def test_streaming_records_received_frames(tmp_path, token):
+    source = str(tmp_path / 'source.rec')
+    path = str(tmp_path / 'session.rec')
+    frames = [candle('A', i) for i in range(3)]
+    with StreamRecorder(source) as recorder:
+        for frame in frames:
+            recorder.write(frame)
+
+    with StreamRecorder(path) as recorder:
+        streaming = Streaming(token, options=StreamingOptions(recorder=recorder))
+        await streaming.replay(StreamReplay(source, None))
+        assert [text for _, text in read_frames(path)] == frames
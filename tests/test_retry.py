@@ -0,0 +1,38 @@
+import pytest
+
+from tinvest.retry import RetryPolicy, parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('2') == 2
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+    assert parse_retry_after('soon') is None
+
+
+def test_retry_policy_next_delay():
+    policy = RetryPolicy(retries=2, backoff=1, jitter=0)
+
+    assert policy.next_delay('GET', 0, 200) is None
+    assert policy.next_delay('GET', 0, 503) == 1
+    assert policy.next_delay('get', 1, None) == 2
+    assert policy.next_delay('GET', 2, 503) is None
+    assert policy.next_delay('GET', 0, 429, retry_after='5') == 5
+    assert policy.next_delay('POST', 0, 503) is None
+    assert policy.next_delay('GET', 0, 404) is None
+
+    assert policy.stats() == (5, 3, 1, 8.0)
+
+
+def test_retry_policy_caps_retry_after():
+    policy = RetryPolicy(max_backoff=30)
+
+    assert policy.next_delay('GET', 0, 429, retry_after='86400') == 30
+    assert policy.stats().delay == 30
+
+
+def test_retry_policy_validates_arguments():
+    with pytest.raises(ValueError):
+        RetryPolicy(retries=-1)
+    with pytest.raises(ValueError):
+        RetryPolicy(jitter=2)
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tinvest.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_single_flight_shares_result():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        started.set()
+        release.wait(1)
+        return object()
+
+    with ThreadPoolExecutor(4) as executor:
+        first = executor.submit(flight.do, 'key', func)
+        started.wait(1)
+        others = [executor.submit(flight.do, 'key', func) for _ in range(3)]
+        deadline = time.monotonic() + 5
+        while flight.shared < 3 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        release.set()
+        results = {id(f.result()) for f in [first, *others]}
+
+    assert flight.shared == 3
+    assert len(calls) == 1
+    assert len(results) == 1
+    assert flight.do('key', lambda: 2) == 2
+
+
+def test_single_flight_shares_error():
+    flight = SingleFlight()
+
+    def func():
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        flight.do('key', func)
+    assert flight.do('key', lambda: 1) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_single_flight():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return object()
+
+    results = await asyncio.gather(*[flight.do('key', func) for _ in range(5)])
+
+    assert len(calls) == 1
+    assert len({id(result) for result in results}) == 1
+    assert flight.shared == 4
+    await flight.do('key', func)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_single_flight_waiter_cancelled():
+    flight = AsyncSingleFlight()
+
+    async def func():
+        await asyncio.sleep(0.01)
+        return 1
+
+    owner = asyncio.ensure_future(flight.do('key', func))
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(flight.do('key', func))
+    await asyncio.sleep(0)
+    owner.cancel()
+
+    assert await waiter == 1
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from tinvest.candles import CandleAggregator
+from tinvest.limiter import TokenBucket
+from tinvest.orderbook import OrderbookStore
+from tinvest.shemas import CandleResolution
+from tinvest.streaming import (
+    Streaming,
+    StreamingApi,
+    StreamingEvents,
+    StreamingOptions,
+)
+from tinvest.subscriptions import Subscriptions
+
+
+@pytest.fixture()
+def events():
+    return StreamingEvents()
+
+
+@pytest.fixture()
+def streaming(token, mocker):
+    return Streaming(token, session=mocker.Mock())
+
+
+def test_routes_are_compiled(streaming, events):
+    @events.candle()
+    def handle_any(api, payload):
+        pass
+
+    @events.candle('BBG0013HGFT4')
+    def handle_figi(api, payload):
+        pass
+
+    @events.candle()
+    def handle_any_after(api, payload):
+        pass
+
+    streaming.add_handlers(events)
+
+    funcs = streaming._get_handlers('candle', 'BBG0013HGFT4')
+    assert [func.func for func in funcs] == [handle_any, handle_any_after, handle_figi]
+    funcs = streaming._get_handlers('candle', 'BBG000B9XRY4')
+    assert [func.func for func in funcs] == [handle_any, handle_any_after]
+    assert streaming._get_handlers('orderbook') == ()
+
+
+@pytest.mark.asyncio
+async def test_handle_message_parses_payload(streaming, events):
+    received = []
+
+    @events.orderbook()
+    async def handle_orderbook(api, payload):
+        received.append(payload)
+
+    streaming.add_handlers(events)
+    await streaming._handle_message(
+        None,
+        '{"event": "orderbook", "payload": '
+        '{"figi": "BBG0013HGFT4", "depth": 1, "bids": [[1, 2]], "asks": []}}',
+    )
+
+    assert received[0].bids == [(1.0, 2.0)]
+
+
+@pytest.mark.asyncio
+async def test_orderbook_store_suppresses_unchanged_books(token, mocker, events):
+    received = []
+
+    @events.orderbook()
+    def handle_orderbook(api, payload):
+        received.append(payload)
+
+    options = StreamingOptions(orderbook_store=OrderbookStore())
+    streaming = Streaming(token, session=mocker.Mock(), options=options)
+    streaming.add_handlers(events)
+    message = (
+        '{"event": "orderbook", "payload": '
+        '{"figi": "BBG0013HGFT4", "depth": 1, "bids": [[1, 2]], "asks": []}}'
+    )
+    await streaming._handle_message(None, message)
+    await streaming._handle_message(None, message)
+
+    assert len(received) == 1
+
+
+@pytest.mark.asyncio
+async def test_candle_aggregator_emits_to_candle_handlers(token, mocker, events):
+    received = []
+
+    @events.candle()
+    def handle_candle(api, payload):
+        received.append(payload.interval)
+
+    options = StreamingOptions(
+        candle_aggregator=CandleAggregator([CandleResolution.hour])
+    )
+    streaming = Streaming(token, session=mocker.Mock(), options=options)
+    streaming.add_handlers(events)
+    await streaming._handle_message(
+        None,
+        '{"event": "candle", "payload": {"figi": "BBG0013HGFT4", "interval": "1min", '
+        '"time": "2020-01-23T12:35:00Z", "o": 1, "h": 1, "l": 1, "c": 1, "v": 1}}',
+    )
+
+    assert received == [CandleResolution.min1, CandleResolution.hour]
+
+
+@pytest.mark.asyncio
+async def test_subscribe_many_tracks_request_ids(streaming):
+    sent = []
+
+    async def reply(message):
+        if message['figi'] == 'BAD':
+            payload = {'error': 'unknown figi', 'request_id': message['request_id']}
+            text = json.dumps({'event': 'error', 'payload': payload, 'time': ''})
+        elif message['figi'] == 'A':
+            payload = {'figi': 'A', 'interval': '1min', 'o': 1, 'c': 1, 'h': 1}
+            text = json.dumps({'event': 'candle', 'payload': payload, 'time': ''})
+        else:
+            return
+        await streaming._handle_message(None, text)
+
+    class WebSocket:
+        async def send_json(self, message):
+            sent.append(message)
+            asyncio.ensure_future(reply(message))
+
+    bucket = TokenBucket(2, 0.1)
+    api = StreamingApi(
+        WebSocket(), None, Subscriptions(), streaming.acknowledgements, bucket
+    )
+    started = time.monotonic()
+    summary = await api.candle.subscribe_many(
+        ['A', 'BAD', 'B', 'A'], '1min', confirm_timeout=0.1
+    )
+
+    assert time.monotonic() - started >= 0.15
+    assert [m['figi'] for m in sent] == ['A', 'BAD', 'B']
+    assert len({m['request_id'] for m in sent}) == 3
+    assert [r.figi for r in summary.results] == ['A', 'BAD', 'B']
+    assert summary.errors == {'BAD': 'unknown figi'}
+    assert summary.timed_out == ['B']
+    assert [r.ok for r in summary.results] == [True, False, False]
+    assert not summary.ok
+    assert not streaming.acknowledgements
+
+    with pytest.raises(ValueError):
+        await api.candle.subscribe_many(['A'], '7min')
+
+
+@pytest.mark.asyncio
+async def test_run_resubscribes_after_reconnect(token, events):
+    received = []
+    connections = []
+
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        connections.append(ws)
+        if len(connections) == 1:
+            received.append(await ws.receive_json())
+            await ws.close()
+        else:
+            received.append(await ws.receive_json())
+            await ws.send_json(
+                {'event': 'error', 'payload': {'error': 'test'}, 'time': ''}
+            )
+            await asyncio.sleep(10)
+        return ws
+
+    app = web.Application()
+    app.router.add_get('/', handler)
+    server = TestServer(app)
+    await server.start_server()
+
+    reconnected = asyncio.Event()
+    infos = []
+
+    @events.startup()
+    async def startup(api):
+        if not connections[1:]:
+            await api.candle.subscribe('F', '1min')
+
+    @events.reconnect()
+    async def on_reconnect(api, info):
+        infos.append(info)
+
+    @events.error()
+    async def on_error(api, payload):
+        reconnected.set()
+
+    streaming = Streaming(token, receive_timeout=None, heartbeat=None)
+    streaming._api = str(server.make_url('/'))
+    streaming.add_handlers(events)
+    task = asyncio.ensure_future(streaming.run())
+    try:
+        await asyncio.wait_for(reconnected.wait(), 5)
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await server.close()
+
+    assert (
+        received == [{'event': 'candle:subscribe', 'figi': 'F', 'interval': '1min'}] * 2
+    )
+    assert infos[0].attempts == 1
+    assert infos[0].resubscribed == 1
+    assert infos[0].downtime < 1
+
+
+@pytest.mark.asyncio
+async def test_run_backs_off_when_connections_close_at_once(token, mocker):
+    connections = []
+
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        connections.append(ws)
+        if len(connections) == 4:
+            await ws.send_json({'event': 'error', 'payload': {}, 'time': ''})
+        await ws.close()
+        return ws
+
+    app = web.Application()
+    app.router.add_get('/', handler)
+    server = TestServer(app)
+    await server.start_server()
+
+    streaming = Streaming(
+        token,
+        receive_timeout=None,
+        heartbeat=None,
+        reconnect_timeout=0.01,
+        reconnect_jitter=0,
+        url=str(server.make_url('/')),
+    )
+    delay = mocker.spy(streaming, '_reconnect_delay')
+    task = asyncio.ensure_future(streaming.run())
+    try:
+        while delay.call_count < 5:
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await server.close()
+
+    # the fourth connection delivered a frame, so only its drop is retried at once
+    attempts = [call.args[0] for call in delay.call_args_list[:5]]
+    assert attempts == [0, 1, 2, 0, 1]
@@ -0,0 +1,178 @@
+import asyncio
+from collections import Counter
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from tinvest.streaming import StreamingEvents
+from tinvest.streaming_pool import HashRing, StreamingPool
+
+FIGIS = [f'BBG{i:09d}' for i in range(40)]
+
+
+def test_hash_ring_moves_few_keys():
+    ring = HashRing(4)
+    grown = HashRing(5)
+    keys = [f'BBG{i:09d}' for i in range(2000)]
+
+    counts = Counter(ring.node(key) for key in keys)
+    moved = sum(ring.node(key) != grown.node(key) for key in keys)
+
+    assert set(counts) == {0, 1, 2, 3}
+    assert min(counts.values()) > 250
+    assert moved < len(keys) / 3
+    assert [ring.node(key) for key in keys] == [HashRing(4).node(key) for key in keys]
+
+
+def test_hash_ring_validates_nodes():
+    with pytest.raises(ValueError):
+        HashRing(0)
+
+
+async def candle_server(connections):
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        figis = connections.setdefault(len(connections), [])
+        async for msg in ws:
+            message = msg.json()
+            figis.append(message['figi'])
+            await ws.send_json(
+                {
+                    'event': 'candle',
+                    'time': '2019-08-07T15:35:00.029721253Z',
+                    'payload': {
+                        'figi': message['figi'],
+                        'interval': '1min',
+                        'o': 1,
+                        'c': 1,
+                        'h': 1,
+                        'l': 1,
+                        'v': 1,
+                        'time': '2019-08-07T15:35:00Z',
+                    },
+                }
+            )
+        return ws
+
+    app = web.Application()
+    app.router.add_get('/', handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+async def run_pool(token, processes):
+    connections = {}
+    server = await candle_server(connections)
+    events = StreamingEvents()
+    received = []
+    done = asyncio.Event()
+    summaries = []
+
+    @events.startup()
+    async def startup(api):
+        summaries.append(
+            await api.candle.subscribe_many(FIGIS, '1min', confirm_timeout=20)
+        )
+
+    @events.candle()
+    def on_candle(api, payload):
+        received.append(payload.figi)
+        if len(received) == len(FIGIS):
+            done.set()
+
+    pool = StreamingPool(
+        token,
+        shards=3,
+        processes=processes,
+        receive_timeout=None,
+        heartbeat=None,
+        url=str(server.make_url('/')),
+    )
+    pool.add_handlers(events)
+    task = asyncio.ensure_future(pool.run())
+    try:
+        await asyncio.wait_for(done.wait(), 30)
+        while not summaries:
+            await asyncio.sleep(0.01)
+        stats = pool.stats()
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await server.close()
+    return pool, connections, received, stats, summaries[0]
+
+
+def assert_sharded(pool, connections, received, stats, summary):
+    assert summary.ok
+    assert sorted(r.figi for r in summary.results) == FIGIS
+    assert sorted(received) == FIGIS
+    assert len(connections) == 3
+    for figis in connections.values():
+        assert len({pool.shard_for(figi) for figi in figis}) == 1
+    assert sum(s.subscriptions for s in stats) == len(FIGIS)
+    assert sum(s.messages for s in stats) == len(FIGIS)
+    assert all(s.connected and s.lag is not None for s in stats)
+
+
+@pytest.mark.asyncio
+async def test_pool_shards_subscriptions(token):
+    assert_sharded(*await run_pool(token, processes=False))
+
+
+@pytest.mark.asyncio
+async def test_pool_shards_in_processes(token):
+    assert_sharded(*await run_pool(token, processes=True))
+
+
+@pytest.mark.asyncio
+async def test_pool_process_forwards_reconnect(token):
+    connections = []
+
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        connections.append(ws)
+        if len(connections) == 1:
+            await ws.close()
+            return ws
+        async for _ in ws:
+            pass
+        return ws
+
+    app = web.Application()
+    app.router.add_get('/', handler)
+    server = TestServer(app)
+    await server.start_server()
+    events = StreamingEvents()
+    reconnected = asyncio.Event()
+    infos = []
+
+    @events.reconnect()
+    async def on_reconnect(api, info):
+        infos.append(info)
+        reconnected.set()
+
+    pool = StreamingPool(
+        token,
+        shards=1,
+        processes=True,
+        receive_timeout=None,
+        heartbeat=None,
+        url=str(server.make_url('/')),
+    )
+    pool.add_handlers(events)
+    task = asyncio.ensure_future(pool.run())
+    try:
+        await asyncio.wait_for(reconnected.wait(), 30)
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await server.close()
+    assert len(infos) == 1
+    assert infos[0].attempts == 1
+    assert pool.stats()[0].reconnects == 1
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from tinvest.limiter import TokenBucket
+from tinvest.subscriptions import Acknowledgements, Subscriptions, send_many
+
+
+def test_subscriptions_track_and_reset():
+    subscriptions = Subscriptions()
+    message = {'event': 'candle:subscribe', 'figi': 'F', 'interval': '1min'}
+
+    assert subscriptions.track(dict(message, request_id='1'))
+    assert not subscriptions.track(message)
+    assert subscriptions.reset() == [message]
+    assert not subscriptions.track(message)
+    assert subscriptions.track(
+        {'event': 'candle:unsubscribe', 'figi': 'F', 'interval': '1min'}
+    )
+    assert len(subscriptions) == 0
+
+
+@pytest.mark.asyncio
+async def test_send_many_does_not_wait_for_unsubscribes():
+    sent = []
+    acknowledgements = Acknowledgements()
+
+    async def send(message):
+        sent.append(message)
+
+    summary = await asyncio.wait_for(
+        send_many(
+            send,
+            acknowledgements,
+            'candle:unsubscribe',
+            ['A', 'B'],
+            {'interval': '1min'},
+            TokenBucket(10, 1.0),
+            confirm_timeout=60,
+        ),
+        1,
+    )
+
+    assert [m['figi'] for m in sent] == ['A', 'B']
+    assert summary.ok
+    assert not summary.timed_out
+    assert not acknowledgements
@@ -1,13 +1,22 @@
+from io import BytesIO
+
 import pytest
 
+from tinvest.cache import ResponseCache
+from tinvest.connection import ConnectionConfig
 from tinvest.constants import PRODUCTION
-from tinvest.sync_client import Session, SyncClient
+from tinvest.limiter import RateLimiter
+from tinvest.parsing import ParseMode
+from tinvest.retry import RetryPolicy
+from tinvest.shemas import Operation, OperationsResponse
+from tinvest.sync_client import Response, Session, SyncClient
 
 
 @pytest.fixture()
 def session(mocker):
     _session = Session()
     mocker.patch.object(_session, 'request', autospec=True)
+    mocker.patch.object(_session, 'head', autospec=True)
     return _session
 
 
@@ -29,3 +38,105 @@ def test_client_response(client):
     response = client.request('get', '/some_url')
     assert 'parse_json' in dir(response)
     assert 'parse_error' in dir(response)
+
+
+def test_client_request_rate_limited(token, session, mocker):
+    limiter = RateLimiter()
+    mocker.patch.object(limiter, 'acquire', autospec=True)
+    client = SyncClient(token, session=session, rate_limiter=limiter)
+
+    client.request('get', '/market/stocks')
+
+    limiter.acquire.assert_called_once_with('/market/stocks')
+
+
+def make_response(status_code):
+    response = Response()
+    response.status_code = status_code
+    response.raw = BytesIO()
+    return response
+
+
+def test_client_request_retries(token, session, mocker):
+    mocker.patch('tinvest.sync_client.time.sleep')
+    session.request.side_effect = [make_response(503), make_response(200)]
+    policy = RetryPolicy(backoff=0)
+    client = SyncClient(token, session=session, retry_policy=policy)
+
+    assert client.request('GET', '/market/stocks').status_code == 200
+    assert session.request.call_count == 2
+    assert policy.stats().retries == 1
+
+
+def test_client_request_does_not_retry_post(token, session):
+    session.request.return_value = make_response(503)
+    client = SyncClient(token, session=session, retry_policy=RetryPolicy())
+
+    assert client.request('POST', '/orders/limit-order').status_code == 503
+    assert session.request.call_count == 1
+
+
+def test_client_request_cached(token, session):
+    response = make_response(200)
+    response._content = b'{"status": "Ok"}'
+    response.reason = 'OK'
+    response.encoding = 'utf-8'
+    session.request.return_value = response
+    cache = ResponseCache()
+    client = SyncClient(token, session=session, cache=cache)
+
+    first = client.request('GET', '/market/stocks')
+    second = client.request('GET', '/market/stocks')
+
+    assert first.json() == second.json() == {'status': 'Ok'}
+    assert session.request.call_count == 1
+    assert (second.reason, second.encoding) == ('OK', 'utf-8')
+    assert len(second.cookies) == 0
+    assert b''.join(second.iter_content(4)) == b'{"status": "Ok"}'
+    client.request('GET', '/market/orderbook')
+    assert session.request.call_count == 2
+    SyncClient('other', session=session, cache=cache).request('GET', '/market/stocks')
+    assert session.request.call_count == 3
+
+
+def test_client_connection_pool(token):
+    client = SyncClient(token, connection=ConnectionConfig(pool_maxsize=7))
+
+    assert client.session.get_adapter(PRODUCTION)._pool_maxsize == 7
+
+
+def test_client_warm_up(client, session):
+    session.head.side_effect = [make_response(200), make_response(503)]
+
+    assert client.warm_up(2) == 1
+    assert session.head.call_count == 2
+    with pytest.raises(ValueError):
+        client.warm_up(0)
+
+
+def test_client_iter_items(client, session):
+    response = make_response(200)
+    response.raw = BytesIO(
+        b'{"trackingId": "id", "status": "Ok", "payload": {"operations": ['
+        b'{"id": "1", "currency": "RUB", "date": "2020-01-01T00:00:00Z", '
+        b'"isMarginCall": false, "payment": 10, "status": "Done"}]}}'
+    )
+    session.request.return_value = response
+
+    response = client.request('GET', '/operations', OperationsResponse, stream=True)
+    operations = list(response.iter_items(chunk_size=16))
+
+    assert [operation.id for operation in operations] == ['1']
+    assert isinstance(operations[0], Operation)
+
+
+def test_client_parse_mode(token, session):
+    response = make_response(200)
+    response._content = b'{"trackingId": "id", "payload": {"operations": []}}'
+    session.request.return_value = response
+    client = SyncClient(token, session=session, parse_mode=ParseMode.construct)
+
+    response = client.request('GET', '/operations', OperationsResponse)
+
+    assert response.parse_json().payload.operations == []
+    assert response.parse_json(mode=ParseMode.validate).tracking_id == 'id'
@@ -1,4 +1,6 @@
-from tinvest.utils import set_default_headers
+from datetime import datetime, timedelta, timezone
+
+from tinvest.utils import format_datetime, parse_datetime, set_default_headers
 
 
 def test_set_default_headers(token):
@@ -21,3 +23,16 @@ def test_set_default_headers_with_headers(token):
             'X-Custom-Header': 'value',
         }
     }
+
+
+def test_parse_datetime():
+    value = parse_datetime('2019-08-07T15:35:00.029721253Z')
+    assert value == datetime(2019, 8, 7, 15, 35, 0, 29721, tzinfo=timezone.utc)
+    value = parse_datetime('2019-08-07T15:35:00.1+03:00')
+    assert value.microsecond == 100000
+    assert value.utcoffset() == timedelta(hours=3)
+
+
+def test_format_datetime():
+    value = datetime(2019, 8, 7, 15, 35, tzinfo=timezone.utc)
+    assert format_datetime(value) == '2019-08-07T15:35:00Z'
@@ -1,5 +1,42 @@
 from .apis import MarketApi, OperationsApi, OrdersApi, PortfolioApi, SandboxApi
 from .async_client import AsyncClient
+from .bulk import (
+    OrderbookResult,
+    get_orderbooks,
+    get_orderbooks_sync,
+    iter_orderbooks,
+    iter_orderbooks_sync,
+)
+from .cache import CacheStats, ResponseCache
+from .candles import CandleAggregator, CandleArrays
+from .candles_cache import CandlesCache
+from .connection import ConnectionConfig
+from .dispatcher import BackpressurePolicy, Dispatcher, QueueStats, WorkerMode
+from .history import CandlesLoader
+from .instruments import InstrumentRegistry
+from .limiter import EndpointGroup, RateLimiter
+from .lite import (
+    CandleLite,
+    MoneyAmountLite,
+    OperationLite,
+    OperationTradeLite,
+    OrderbookLite,
+    OrderResponseLite,
+    from_lite,
+    to_lite,
+)
+from .operations_export import ExportFormat, OperationsExporter
+from .orderbook import (
+    ColumnarOrderbook,
+    ColumnarOrderbooks,
+    LevelChange,
+    OrderbookDelta,
+    OrderbookSide,
+    OrderbookStore,
+)
+from .parsing import LazyModel, ParseMode
+from .recording import StreamRecorder, StreamReplay
+from .retry import RetryPolicy, RetryStats
 from .shemas import (
     Candle,
     CandleResolution,
@@ -46,7 +83,15 @@ from .shemas import (
     SandboxSetPositionBalanceRequest,
     TradeStatus,
 )
-from .streaming import Streaming, StreamingApi, StreamingEvents
+from .streaming import (
+    ReconnectInfo,
+    Streaming,
+    StreamingApi,
+    StreamingEvents,
+    StreamingOptions,
+)
+from .streaming_pool import HashRing, ShardStats, StreamingPool
+from .subscriptions import SubscribeResult, SubscribeSummary, Subscriptions
 from .sync_client import SyncClient
 
 __all__ = (
@@ -55,6 +100,55 @@ __all__ = (
     'Streaming',
     'StreamingApi',
     'StreamingEvents',
+    'StreamingOptions',
+    'ReconnectInfo',
+    'Subscriptions',
+    'SubscribeResult',
+    'SubscribeSummary',
+    'StreamingPool',
+    'ShardStats',
+    'HashRing',
+    'StreamRecorder',
+    'StreamReplay',
+    'Dispatcher',
+    'BackpressurePolicy',
+    'WorkerMode',
+    'QueueStats',
+    'ParseMode',
+    'LazyModel',
+    'ColumnarOrderbook',
+    'ColumnarOrderbooks',
+    'OrderbookSide',
+    'OrderbookStore',
+    'OrderbookDelta',
+    'LevelChange',
+    'CandleAggregator',
+    'CandleArrays',
+    'CandlesLoader',
+    'CandlesCache',
+    'RateLimiter',
+    'EndpointGroup',
+    'RetryPolicy',
+    'RetryStats',
+    'ResponseCache',
+    'CacheStats',
+    'InstrumentRegistry',
+    'ConnectionConfig',
+    'OrderbookResult',
+    'get_orderbooks',
+    'get_orderbooks_sync',
+    'iter_orderbooks',
+    'iter_orderbooks_sync',
+    'OperationsExporter',
+    'ExportFormat',
+    'CandleLite',
+    'MoneyAmountLite',
+    'OperationLite',
+    'OperationTradeLite',
+    'OrderbookLite',
+    'OrderResponseLite',
+    'from_lite',
+    'to_lite',
     'Candle',
     'CandleResolution',
     'Candles',
@@ -1,38 +1,79 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
-from typing import Any, AsyncIterator
+from functools import partial
+from typing import Any, AsyncIterator, Optional, Union, cast
 
-from aiohttp import ClientResponse, ClientSession
+from aiohttp import ClientConnectionError, ClientError, ClientResponse, ClientSession
 
-from .base_client import BaseClient
+from .base_client import BaseClient, BaseResponseWrapper
+from .cache import AsyncBufferedResponse, BufferedResponse, CacheKey, ResponseData
+from .connection import make_connector
+from .jsonstream import ArrayItemDecoder, list_field
+from .parsing import ParseMode, parse_obj
 from .shemas import Error
+from .singleflight import AsyncSingleFlight
 from .utils import set_default_headers
 
+logger = logging.getLogger(__name__)
 
-class ResponseWrapper:
-    def __init__(self, response: ClientResponse, response_model: Any):
-        self._response = response
-        self._response_model = response_model
 
-    def __getattr__(self, name):
-        return getattr(self._response, name)
+class ResponseWrapper(BaseResponseWrapper):
+    _response: Union[ClientResponse, AsyncBufferedResponse]
 
-    async def parse_json(self, **kwargs: Any) -> Any:
-        return await self._parse_json(self._response_model, **kwargs)
+    async def parse_json(
+        self, *, mode: Optional[ParseMode] = None, **kwargs: Any
+    ) -> Any:
+        """``mode`` overrides the ``parse_mode`` of the client for this call."""
+        return await self._parse_json(self._response_model, mode, **kwargs)
 
-    async def parse_error(self, **kwargs: Any) -> Any:
-        return await self._parse_json(Error, **kwargs)
+    async def parse_error(
+        self, *, mode: Optional[ParseMode] = None, **kwargs: Any
+    ) -> Any:
+        return await self._parse_json(Error, mode, **kwargs)
 
-    async def _parse_json(self, response_model: Any, **kwargs: Any) -> Any:
+    async def iter_items(
+        self, mode: Optional[ParseMode] = None, chunk_size: int = 65536
+    ) -> AsyncIterator[Any]:
+        """Yield the items of the payload list, e.g. ``Operation``, one by one.
+
+        The body is decoded while it is read, so only one chunk and one item are
+        held in memory.
+        """
+        key, model = list_field(self._response_model)
+        mode = mode or self._parse_mode
+        decoder = ArrayItemDecoder(key)
+        async for chunk in self._iter_chunks(chunk_size):
+            for item in decoder.feed(chunk):
+                yield parse_obj(model, item, mode)
+            if decoder.done:
+                return
+        decoder.close()
+
+    async def _iter_chunks(self, chunk_size: int) -> AsyncIterator[bytes]:
+        if isinstance(self._response, BufferedResponse):
+            yield self._response.content
+            return
+        async for chunk in self._response.content.iter_chunked(chunk_size):
+            yield chunk
+
+    async def _parse_json(
+        self, response_model: Any, mode: Optional[ParseMode], **kwargs: Any
+    ) -> Any:
+        mode = mode or self._parse_mode
         if response_model is None:
             return await self._response.json(**kwargs)
-        return response_model.parse_obj(await self._response.json(**kwargs))
+        if not kwargs and isinstance(self._response, BufferedResponse):
+            return self._response.parse_model(response_model, mode)
+        return parse_obj(response_model, await self._response.json(**kwargs), mode)
 
 
 class AsyncClient(BaseClient[ClientSession]):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if self._session is None:
-            self._session = ClientSession()
+            self._session = ClientSession(connector=make_connector(self._connection))
+        self._single_flight = AsyncSingleFlight() if self._coalesce else None
 
     @asynccontextmanager
     async def request(
@@ -41,8 +82,92 @@ class AsyncClient(BaseClient[ClientSession]):
         url = self._base_url + path
         set_default_headers(kwargs, self._token)
 
-        async with self.session.request(method, url, **kwargs) as response:
-            yield ResponseWrapper(response, response_model)
+        ttl = self._cache_ttl(method, path)
+        response: Union[ClientResponse, AsyncBufferedResponse]
+        if self._is_shared(method, ttl):
+            response = await self._shared(method, path, url, ttl, **kwargs)
+        else:
+            response = await self._send(method, path, url, **kwargs)
+        async with response:
+            yield ResponseWrapper(response, response_model, self._parse_mode)
+
+    async def _shared(  # pylint: disable=R0913
+        self, method: str, path: str, url: str, ttl: Optional[float], **kwargs: Any
+    ) -> AsyncBufferedResponse:
+        """Response from the cache or shared with identical in-flight requests."""
+        key, cached = self._cached(method, url, ttl, kwargs)
+        if cached is not None:
+            return cast(AsyncBufferedResponse, cached)
+        fetch = partial(self._fetch, key, ttl, method, path, url, **kwargs)
+        if self._single_flight is None:
+            return await fetch()
+        return await self._single_flight.do(key, fetch)
+
+    async def _fetch(  # pylint: disable=R0913
+        self,
+        key: CacheKey,
+        ttl: Optional[float],
+        method: str,
+        path: str,
+        url: str,
+        **kwargs: Any,
+    ) -> AsyncBufferedResponse:
+        response = await self._send(method, path, url, **kwargs)
+        async with response:
+            data = ResponseData(
+                response.status,
+                response.headers,
+                await response.read(),
+                str(response.url),
+                response.request_info,
+            )
+        buffered = AsyncBufferedResponse(data, response)
+        self._store(key, ttl, buffered)
+        return buffered
+
+    async def _send(
+        self, method: str, path: str, url: str, **kwargs: Any
+    ) -> ClientResponse:
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire_async(path)
+            try:
+                response = await self.session.request(method, url, **kwargs)
+            except (ClientConnectionError, asyncio.TimeoutError) as e:
+                await asyncio.sleep(self._error_delay(method, attempt, e))
+                attempt += 1
+                continue
+            delay = self._retry_delay(
+                method, attempt, response.status, response.headers
+            )
+            if delay is None:
+                return response
+            response.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def warm_up(self, connections: int = 4) -> int:
+        """Open up to ``connections`` keep-alive connections to the API host.
+
+        Returns the number of 2xx/3xx HEAD responses, errors are only logged.
+        """
+        if connections <= 0:
+            raise ValueError(f'connections must be positive, got {connections}')
+
+        async def touch() -> bool:
+            try:
+                async with self.session.head(self._base_url) as response:
+                    await response.read()
+            except (ClientError, asyncio.TimeoutError) as e:
+                logger.warning('Warm up failed: %s', e)
+                return False
+            if response.status >= 400:
+                logger.warning('Warm up failed: HTTP %s', response.status)
+                return False
+            return True
+
+        return sum(await asyncio.gather(*[touch() for _ in range(connections)]))
 
     async def close(self) -> None:
         await self.session.close()
@@ -1,25 +1,108 @@
-from typing import Generic, Optional, TypeVar
+from typing import Any, Generic, Mapping, Optional, Tuple, TypeVar
 
+from .cache import BufferedResponse, CacheKey, ResponseCache, cache_key
+from .connection import ConnectionConfig
 from .constants import PRODUCTION, SANDBOX
+from .limiter import RateLimiter
+from .parsing import ParseMode
+from .retry import RetryPolicy
+from .typedefs import AnyDict
 
 T = TypeVar('T')
 
 
-class BaseClient(Generic[T]):
+class BaseResponseWrapper:
     def __init__(
-        self, token: str, *, use_sandbox: bool = False, session: Optional[T] = None
+        self,
+        response: Any,
+        response_model: Any,
+        parse_mode: ParseMode = ParseMode.validate,
+    ):
+        self._response = response
+        self._response_model = response_model
+        self._parse_mode = parse_mode
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
+class BaseClient(Generic[T]):
+    def __init__(  # pylint: disable=R0913
+        self,
+        token: str,
+        *,
+        use_sandbox: bool = False,
+        base_url: Optional[str] = None,
+        session: Optional[T] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        cache: Optional[ResponseCache] = None,
+        coalesce: bool = False,
+        connection: Optional[ConnectionConfig] = None,
+        parse_mode: ParseMode = ParseMode.validate,
     ):
         if not token:
             raise ValueError('Token cannot be empty')
         self._base_url: str = PRODUCTION
         if use_sandbox:
             self._base_url = SANDBOX
+        if base_url:
+            self._base_url = base_url.rstrip('/')
 
         self._token: str = token
         self._session = session
+        self._rate_limiter = rate_limiter
+        self._retry_policy = retry_policy
+        self._cache = cache
+        self._coalesce = coalesce
+        self._connection = connection or ConnectionConfig()
+        self._parse_mode = parse_mode
 
     @property
     def session(self) -> T:
         if self._session:
             return self._session
         raise AttributeError
+
+    def _cache_ttl(self, method: str, path: str) -> Optional[float]:
+        """TTL of a cached request, None when it is not cached."""
+        if self._cache is None:
+            return None
+        return self._cache.ttl(method, path)
+
+    def _is_shared(self, method: str, ttl: Optional[float]) -> bool:
+        """Whether the response is buffered for the cache or coalescing."""
+        return bool(ttl) or (self._coalesce and method.upper() == 'GET')
+
+    def _cached(
+        self, method: str, url: str, ttl: Optional[float], kwargs: AnyDict
+    ) -> Tuple[CacheKey, Optional[BufferedResponse]]:
+        """Key of a request and its cached response, if any."""
+        authorization = kwargs['headers'].get('Authorization')
+        key = cache_key(method, url, kwargs.get('params'), authorization)
+        if not ttl or self._cache is None:
+            return key, None
+        return key, self._cache.get(key)
+
+    def _store(
+        self, key: CacheKey, ttl: Optional[float], response: BufferedResponse
+    ) -> None:
+        if ttl and response.ok and self._cache is not None:
+            self._cache.set(key, response, ttl)
+
+    def _retry_delay(
+        self, method: str, attempt: int, status: int, headers: Mapping[str, str]
+    ) -> Optional[float]:
+        """Delay before retrying a response, None to return it."""
+        if self._retry_policy is None:
+            return None
+        retry_after = headers.get('Retry-After')
+        return self._retry_policy.next_delay(method, attempt, status, retry_after)
+
+    def _error_delay(self, method: str, attempt: int, error: Exception) -> float:
+        """Delay before retrying a connection ``error``, raised when not retried."""
+        if self._retry_policy is not None:
+            delay = self._retry_policy.next_delay(method, attempt)
+            if delay is not None:
+                return delay
+        raise error
@@ -0,0 +1,91 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, NamedTuple, Optional
+
+from .apis import MarketApi
+from .shemas import Orderbook
+
+
+class OrderbookResult(NamedTuple):
+    figi: str
+    orderbook: Optional[Orderbook] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def iter_orderbooks(
+    client: Any, figis: Iterable[str], depth: int, concurrency: int = 16
+) -> AsyncIterator[OrderbookResult]:
+    """Fetch orderbooks on an ``AsyncClient``, yield them as they complete.
+
+    At most ``concurrency`` requests are in flight; the client ``rate_limiter``
+    spaces them out. A failed figi is yielded with its ``error`` set.
+    """
+    if concurrency <= 0:
+        raise ValueError(f'concurrency must be positive, got {concurrency}')
+    api = MarketApi(client)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(figi: str) -> OrderbookResult:
+        async with semaphore:
+            try:
+                async with api.market_orderbook_get(figi, depth) as response:
+                    response.raise_for_status()
+                    return OrderbookResult(figi, (await response.parse_json()).payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # pylint: disable=W0703
+                return OrderbookResult(figi, error=e)
+
+    tasks = [asyncio.ensure_future(fetch(figi)) for figi in dict.fromkeys(figis)]
+    try:
+        for future in asyncio.as_completed(tasks):
+            yield await future
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def get_orderbooks(
+    client: Any, figis: Iterable[str], depth: int, concurrency: int = 16
+) -> Dict[str, OrderbookResult]:
+    return {
+        result.figi: result
+        async for result in iter_orderbooks(client, figis, depth, concurrency)
+    }
+
+
+def iter_orderbooks_sync(
+    client: Any, figis: Iterable[str], depth: int, workers: int = 16
+) -> Iterator[OrderbookResult]:
+    """``iter_orderbooks`` for a ``SyncClient`` using a pool of ``workers``."""
+    api = MarketApi(client)
+
+    def fetch(figi: str) -> OrderbookResult:
+        try:
+            response = api.market_orderbook_get(figi, depth)
+            response.raise_for_status()
+            return OrderbookResult(figi, response.parse_json().payload)
+        except Exception as e:  # pylint: disable=W0703
+            return OrderbookResult(figi, error=e)
+
+    with ThreadPoolExecutor(workers) as executor:
+        futures = [executor.submit(fetch, figi) for figi in dict.fromkeys(figis)]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def get_orderbooks_sync(
+    client: Any, figis: Iterable[str], depth: int, workers: int = 16
+) -> Dict[str, OrderbookResult]:
+    return {
+        result.figi: result
+        for result in iter_orderbooks_sync(client, figis, depth, workers)
+    }
@@ -0,0 +1,217 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional, Tuple
+
+from aiohttp import ClientResponseError
+from multidict import CIMultiDict, CIMultiDictProxy
+from requests import HTTPError
+
+from .parsing import ParseMode, json_loads, parse_obj
+
+DEFAULT_TTLS: Dict[str, float] = {
+    '/market/stocks': 3600,
+    '/market/bonds': 3600,
+    '/market/etfs': 3600,
+    '/market/currencies': 3600,
+    '/market/search/by-figi': 3600,
+    '/market/search/by-ticker': 3600,
+}
+
+CacheKey = Tuple[str, str, Tuple[Tuple[str, str], ...], str]
+
+
+def cache_key(
+    method: str,
+    url: str,
+    params: Optional[Mapping[str, Any]],
+    authorization: Optional[str] = None,
+) -> CacheKey:
+    """Key of a request; ``authorization`` is hashed so tokens never share hits."""
+    items = tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    digest = hashlib.sha256((authorization or '').encode()).hexdigest()
+    return method.upper(), url, items, digest
+
+
+class ResponseData(NamedTuple):
+    status: int
+    headers: Mapping[str, str]
+    content: bytes
+    url: str = ''
+    request_info: Any = None
+
+
+class BufferedResponse:
+    """Fully read response that can be parsed many times and shared.
+
+    Parsed models are memoized per response model and every caller gets its
+    own deep copy, so the body is decoded once and callers cannot see each
+    other's mutations. Attributes not buffered here, e.g. ``reason`` or
+    ``cookies``, are read from the original ``response``.
+    """
+
+    def __init__(self, data: ResponseData, response: Any = None) -> None:
+        self.status = data.status
+        self.headers = CIMultiDictProxy(CIMultiDict(data.headers))
+        self.content = data.content
+        self.url = data.url
+        self.request_info = data.request_info
+        self._response = response
+        self._models: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        response = self.__dict__.get('_response')
+        if response is None:
+            raise AttributeError(name)
+        return getattr(response, name)
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def parse_model(
+        self, response_model: Any, mode: ParseMode = ParseMode.validate
+    ) -> Any:
+        key = response_model, mode
+        with self._lock:
+            if key not in self._models:
+                obj = json_loads(self.content)
+                self._models[key] = parse_obj(response_model, obj, mode)
+            model = self._models[key]
+        return copy.deepcopy(model)
+
+
+class SyncBufferedResponse(BufferedResponse):
+    """``requests.Response`` look-alike."""
+
+    @property
+    def status_code(self) -> int:
+        return self.status
+
+    @property
+    def text(self) -> str:
+        return self.content.decode()
+
+    def json(self, **kwargs: Any) -> Any:
+        if kwargs:
+            return json.loads(self.content, **kwargs)
+        return json_loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise HTTPError(f'{self.status} Error for url: {self.url}', response=self)
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncBufferedResponse(BufferedResponse):
+    """``aiohttp.ClientResponse`` look-alike."""
+
+    async def read(self) -> bytes:
+        return self.content
+
+    async def text(self) -> str:
+        return self.content.decode()
+
+    async def json(self, *, loads: Callable = json_loads) -> Any:
+        return loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise ClientResponseError(
+                self.request_info, (), status=self.status, headers=self.headers
+            )
+
+    def release(self) -> None:
+        pass
+
+    async def __aenter__(self) -> 'AsyncBufferedResponse':
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+
+
+class ResponseCache:
+    """LRU cache of successful GET responses with per-path TTLs.
+
+    Only paths listed in ``ttls`` are cached, by default the reference data
+    endpoints of ``MarketApi``. The cache is thread-safe and holds buffered
+    responses, so one instance can be shared by sync and async clients.
+    """
+
+    def __init__(
+        self, ttls: Optional[Mapping[str, float]] = None, maxsize: int = 256
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError(f'maxsize must be positive, got {maxsize}')
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[CacheKey, Tuple[float, BufferedResponse]]'
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ttl(self, method: str, path: str) -> Optional[float]:
+        if method.upper() != 'GET':
+            return None
+        return self.ttls.get(path)
+
+    def get(self, key: CacheKey) -> Optional[BufferedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def set(self, key: CacheKey, response: BufferedResponse, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(
+        self,
+        path: Optional[str] = None,
+        predicate: Optional[Callable[[CacheKey], bool]] = None,
+    ) -> int:
+        """Drop entries whose URL ends with ``path`` and/or match ``predicate``.
+
+        Without arguments the whole cache is cleared. Returns the number of
+        dropped entries.
+        """
+        with self._lock:
+            keys = [
+                key
+                for key in self._entries
+                if (path is None or key[1].endswith(path))
+                and (predicate is None or predicate(key))
+            ]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, len(self._entries))
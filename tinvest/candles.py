@@ -0,0 +1,245 @@
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .parsing import JsonLoads, json_loads
+from .shemas import Candle, CandleResolution
+from .utils import epoch_ns, format_datetime, parse_datetime
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+# minutes per candle of the resolutions that split a day evenly
+_MINUTES = {
+    CandleResolution.min1: 1,
+    CandleResolution.min2: 2,
+    CandleResolution.min3: 3,
+    CandleResolution.min5: 5,
+    CandleResolution.min10: 10,
+    CandleResolution.min15: 15,
+    CandleResolution.min30: 30,
+    CandleResolution.hour: 60,
+    CandleResolution.day: 24 * 60,
+}
+
+
+def candle_start(value: datetime, resolution: CandleResolution) -> datetime:
+    """Start of the ``resolution`` candle containing ``value``.
+
+    Day, week and month boundaries are taken in the timezone of ``value``.
+    """
+    value = value.replace(second=0, microsecond=0)
+    step = _MINUTES.get(resolution)
+    if step is not None:
+        minutes = value.hour * 60 + value.minute
+        minutes -= minutes % step
+        return value.replace(hour=minutes // 60, minute=minutes % 60)
+    value = value.replace(hour=0, minute=0)
+    if resolution == CandleResolution.week:
+        return value - timedelta(days=value.weekday())
+    return value.replace(day=1)
+
+
+class _Bucket:
+    __slots__ = (
+        'start',
+        'open',
+        'high',
+        'low',
+        'close',
+        'closed_volume',
+        'minute',
+        'volume',
+    )
+
+    def __init__(self, start: datetime, minute: datetime, candle: Candle) -> None:
+        self.start = start
+        self.open = candle.o
+        self.high = candle.h
+        self.low = candle.l
+        self.close = candle.c
+        self.closed_volume = 0
+        self.minute = minute
+        self.volume = candle.v
+
+    def update(self, minute: datetime, candle: Candle) -> None:
+        if minute != self.minute:
+            self.closed_volume += self.volume
+            self.minute = minute
+        self.high = max(self.high, candle.h)
+        self.low = min(self.low, candle.l)
+        self.close = candle.c
+        self.volume = candle.v
+
+
+class CandleAggregator:
+    """Builds coarser candles from the ``1min`` candle stream.
+
+    Streaming sends repeated updates of the current minute, so the volume of a
+    minute is only added to the bucket once the next minute starts. Each
+    ``update`` is O(1) per resolution and returns the updated coarse candles.
+    When a minute starts a new bucket, the final candle of the previous bucket
+    is returned once more right before the new one, so a candle followed by a
+    later ``time`` of the same figi and interval is closed.
+    Passed as ``StreamingOptions(candle_aggregator=...)`` the aggregated candles are
+    delivered to the candle handlers like candles received from the server.
+    """
+
+    def __init__(self, resolutions: Iterable[CandleResolution]) -> None:
+        self.resolutions = tuple(CandleResolution(value) for value in resolutions)
+        if CandleResolution.min1 in self.resolutions:
+            raise ValueError(f'{CandleResolution.min1} cannot be aggregated')
+        self._buckets: Dict[Tuple[str, CandleResolution], _Bucket] = {}
+
+    def get(self, figi: str, resolution: CandleResolution) -> Optional[Candle]:
+        bucket = self._buckets.get((figi, resolution))
+        if bucket is None:
+            return None
+        return self._candle(figi, resolution, bucket)
+
+    def update(self, candle: Any) -> List[Candle]:
+        if isinstance(candle, dict):
+            candle = Candle.construct(**candle)
+        if candle.interval != CandleResolution.min1:
+            return []
+
+        minute = parse_datetime(candle.time)
+        candles: List[Candle] = []
+        for resolution in self.resolutions:
+            candles.extend(self._update(resolution, minute, candle))
+        return candles
+
+    def _update(
+        self, resolution: CandleResolution, minute: datetime, candle: Candle
+    ) -> List[Candle]:
+        key = candle.figi, resolution
+        start = candle_start(minute, resolution)
+        bucket = self._buckets.get(key)
+        candles = []
+        if bucket is None or start > bucket.start:
+            if bucket is not None:
+                candles.append(self._candle(candle.figi, resolution, bucket))
+            bucket = self._buckets[key] = _Bucket(start, minute, candle)
+        elif start < bucket.start or minute < bucket.minute:
+            return []
+        else:
+            bucket.update(minute, candle)
+        candles.append(self._candle(candle.figi, resolution, bucket))
+        return candles
+
+    @staticmethod
+    def _candle(figi: str, resolution: CandleResolution, bucket: _Bucket) -> Candle:
+        return Candle.construct(
+            o=bucket.open,
+            h=bucket.high,
+            l=bucket.low,
+            c=bucket.close,
+            v=bucket.closed_volume + bucket.volume,
+            figi=figi,
+            interval=resolution,
+            time=format_datetime(bucket.start),
+        )
+
+
+class CandleArrays:
+    """Candles stored column-wise: int64 epoch-ns ``time`` and float64 o/h/l/c/v.
+
+    ``parse_raw``/``parse_obj`` read a ``/market/candles`` response straight into
+    the columns without building a ``Candle`` per row. ``to_numpy`` wraps the
+    column buffers without copying them. The ``l`` column is stored as ``low``.
+    """
+
+    __slots__ = ('figi', 'interval', 'time', 'o', 'h', 'low', 'c', 'v')
+
+    def __init__(
+        self, figi: Optional[str] = None, interval: Optional[CandleResolution] = None
+    ) -> None:
+        self.figi = figi
+        self.interval = interval
+        self.time = array('q')
+        self.o = array('d')
+        self.h = array('d')
+        self.low = array('d')
+        self.c = array('d')
+        self.v = array('d')
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __repr__(self) -> str:
+        return (
+            f'CandleArrays(figi={self.figi!r}, interval={self.interval}, '
+            f'len={len(self)})'
+        )
+
+    @classmethod
+    def parse_raw(
+        cls, data: Union[str, bytes], loads: JsonLoads = json_loads
+    ) -> 'CandleArrays':
+        return cls.parse_obj(loads(data))
+
+    @classmethod
+    def parse_obj(cls, obj: Dict[str, Any]) -> 'CandleArrays':
+        """Accepts a ``CandlesResponse`` document or its ``payload``."""
+        payload = obj.get('payload', obj)
+        interval = payload.get('interval')
+        arrays = cls(
+            payload.get('figi'), CandleResolution(interval) if interval else None
+        )
+        for candle in payload['candles']:
+            arrays.append(
+                candle['time'],
+                candle['o'],
+                candle['h'],
+                candle['l'],
+                candle['c'],
+                candle['v'],
+            )
+        return arrays
+
+    @classmethod
+    def from_candles(cls, candles: Iterable[Candle]) -> 'CandleArrays':
+        arrays = cls()
+        for candle in candles:
+            arrays.figi, arrays.interval = candle.figi, candle.interval
+            arrays.append(candle.time, candle.o, candle.h, candle.l, candle.c, candle.v)
+        return arrays
+
+    def append(  # pylint: disable=R0913
+        self,
+        time: Union[str, datetime, int],
+        o: float,
+        h: float,
+        low: float,
+        c: float,
+        v: float,
+    ) -> None:
+        if isinstance(time, str):
+            time = parse_datetime(time)
+        if isinstance(time, datetime):
+            time = epoch_ns(time)
+        self.time.append(time)
+        self.o.append(o)
+        self.h.append(h)
+        self.low.append(low)
+        self.c.append(c)
+        self.v.append(v)
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """Column name -> ndarray views of the buffers, ``time`` as datetime64[ns]."""
+        if np is None:
+            raise ImportError('to_numpy requires numpy')
+        columns = {'time': np.frombuffer(self.time, dtype='datetime64[ns]')}
+        for name, values in zip('ohlcv', (self.o, self.h, self.low, self.c, self.v)):
+            columns[name] = np.frombuffer(values, dtype=np.float64)
+        return columns
+
+    def to_pandas(self) -> Any:
+        """DataFrame with o/h/l/c/v columns indexed by UTC ``time``."""
+        import pandas as pd  # pylint: disable=C0415
+
+        columns = self.to_numpy()
+        index = pd.DatetimeIndex(columns.pop('time'), name='time').tz_localize('UTC')
+        return pd.DataFrame(columns, index=index, copy=False)
@@ -0,0 +1,142 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Tuple
+
+from .shemas import Candle, CandleResolution
+from .utils import epoch_ns, parse_datetime
+
+Window = Tuple[datetime, datetime]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    figi TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    time TEXT NOT NULL,
+    o REAL NOT NULL,
+    h REAL NOT NULL,
+    l REAL NOT NULL,
+    c REAL NOT NULL,
+    v INTEGER NOT NULL,
+    PRIMARY KEY (figi, interval, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    figi TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coverage_idx ON coverage (figi, interval, start);
+"""
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _ts(value: datetime) -> int:
+    return epoch_ns(value) // 1000
+
+
+def _datetime(ts: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=ts)
+
+
+class CandlesCache:
+    """SQLite store of candles and of the time ranges already downloaded.
+
+    ``missing`` returns the gaps of a request that are not covered yet, ``put``
+    saves fetched candles and marks their window as covered, ``get`` reads a
+    range back. Used by ``CandlesLoader(cache=...)`` so that repeated backfills
+    only hit the API for the gaps.
+    """
+
+    def __init__(self, path: str = ':memory:') -> None:
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def missing(
+        self, figi: str, interval: CandleResolution, from_: datetime, to: datetime
+    ) -> List[Window]:
+        start, end = _ts(from_), _ts(to)
+        with self._lock:
+            covered = self._db.execute(
+                'SELECT start, end FROM coverage '
+                'WHERE figi = ? AND interval = ? AND start < ? AND end > ? '
+                'ORDER BY start',
+                (figi, CandleResolution(interval).value, end, start),
+            ).fetchall()
+
+        gaps = []
+        for covered_start, covered_end in covered:
+            if covered_start > start:
+                gaps.append((_datetime(start), _datetime(covered_start)))
+            start = max(start, covered_end)
+        if start < end:
+            gaps.append((_datetime(start), _datetime(end)))
+        return gaps
+
+    def get(
+        self, figi: str, interval: CandleResolution, from_: datetime, to: datetime
+    ) -> List[Candle]:
+        interval = CandleResolution(interval)
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT time, o, h, l, c, v FROM candles '
+                'WHERE figi = ? AND interval = ? AND ts >= ? AND ts < ? ORDER BY ts',
+                (figi, interval.value, _ts(from_), _ts(to)),
+            ).fetchall()
+        return [
+            Candle.construct(
+                figi=figi, interval=interval, time=time, o=o, h=h, l=l, c=c, v=v
+            )
+            for time, o, h, l, c, v in rows
+        ]
+
+    def put(  # pylint: disable=R0913
+        self,
+        figi: str,
+        interval: CandleResolution,
+        from_: datetime,
+        to: datetime,
+        candles: Iterable[Candle],
+    ) -> None:
+        """Save ``candles`` and mark ``[from_, to)`` as covered."""
+        interval_value = CandleResolution(interval).value
+        rows = [
+            (
+                figi,
+                interval_value,
+                _ts(parse_datetime(candle.time)),
+                candle.time,
+                candle.o,
+                candle.h,
+                candle.l,
+                candle.c,
+                candle.v,
+            )
+            for candle in candles
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows,
+            )
+            if from_ < to:
+                self._cover(figi, interval_value, _ts(from_), _ts(to))
+
+    def _cover(self, figi: str, interval: str, start: int, end: int) -> None:
+        key = (figi, interval, end, start)
+        where = 'WHERE figi = ? AND interval = ? AND start <= ? AND end >= ?'
+        merged = self._db.execute(
+            f'SELECT MIN(start), MAX(end) FROM coverage {where}', key
+        ).fetchone()
+        if merged[0] is not None:
+            start, end = min(start, merged[0]), max(end, merged[1])
+        self._db.execute(f'DELETE FROM coverage {where}', key)
+        self._db.execute(
+            'INSERT INTO coverage VALUES (?, ?, ?, ?)', (figi, interval, start, end)
+        )
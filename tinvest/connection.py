@@ -0,0 +1,44 @@
+from typing import NamedTuple, Optional
+
+from aiohttp import TCPConnector
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+
+class ConnectionConfig(NamedTuple):
+    """Connection pool settings of ``SyncClient`` and ``AsyncClient``.
+
+    ``limit``, ``limit_per_host``, ``ttl_dns_cache`` and ``keepalive_timeout``
+    configure the aiohttp connector, ``pool_connections``, ``pool_maxsize`` and
+    ``pool_block`` the requests adapter. All requests of a client go to one
+    host, so ``limit_per_host`` and ``pool_maxsize`` bound the concurrency.
+    """
+
+    limit: int = 100
+    limit_per_host: int = 100
+    ttl_dns_cache: Optional[int] = 300
+    keepalive_timeout: float = 60
+    pool_connections: int = 4
+    pool_maxsize: int = 100
+    pool_block: bool = False
+
+
+def make_connector(config: ConnectionConfig) -> TCPConnector:
+    return TCPConnector(
+        limit=config.limit,
+        limit_per_host=config.limit_per_host,
+        ttl_dns_cache=config.ttl_dns_cache,
+        keepalive_timeout=config.keepalive_timeout,
+    )
+
+
+def make_session(config: ConnectionConfig) -> Session:
+    adapter = HTTPAdapter(
+        pool_connections=config.pool_connections,
+        pool_maxsize=config.pool_maxsize,
+        pool_block=config.pool_block,
+    )
+    session = Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
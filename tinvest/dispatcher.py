@@ -0,0 +1,222 @@
+import asyncio
+import functools
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from itertools import count
+from typing import (
+    Any,
+    Awaitable,
+    Dict,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .utils import Func
+
+logger = logging.getLogger(__name__)
+
+_Item = Tuple[Sequence[Func], Tuple[Any, ...]]
+
+
+class BackpressurePolicy(str, Enum):
+    block = 'block'
+    drop_oldest = 'drop_oldest'
+    coalesce = 'coalesce'
+
+
+class WorkerMode(str, Enum):
+    async_ = 'async'
+    thread = 'thread'
+
+
+class QueueStats(NamedTuple):
+    depth: int
+    maxsize: int
+    high_watermark: int
+    enqueued: int
+    processed: int
+    dropped: int
+    coalesced: int
+
+
+class _QueueCounters:
+    __slots__ = ('high_watermark', 'enqueued', 'processed', 'dropped', 'coalesced')
+
+    def __init__(self) -> None:
+        self.high_watermark = 0
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+
+class _EventQueue:
+    """Bounded FIFO of handler calls.
+
+    With the coalesce policy an item put under a key that is already queued
+    replaces the queued data in place, so only the latest event per key waits.
+    """
+
+    def __init__(self, maxsize: int, policy: BackpressurePolicy) -> None:
+        self.maxsize = maxsize
+        self.policy = policy
+        self.counters = _QueueCounters()
+        self._items: 'OrderedDict[Hashable, _Item]' = OrderedDict()
+        self._ids = count()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def put(self, key: Optional[Hashable], item: _Item) -> None:
+        coalesce = self.policy == BackpressurePolicy.coalesce and key is not None
+        if coalesce and key in self._items:
+            self._items[key] = item
+            self.counters.coalesced += 1
+            return
+
+        while len(self._items) >= self.maxsize:
+            if self.policy == BackpressurePolicy.block:
+                self._not_full.clear()
+                await self._not_full.wait()
+            else:
+                self._items.popitem(last=False)
+                self.counters.dropped += 1
+
+        self._items[key if coalesce else next(self._ids)] = item
+        counters = self.counters
+        counters.enqueued += 1
+        counters.high_watermark = max(counters.high_watermark, len(self._items))
+        self._not_empty.set()
+
+    async def get(self) -> _Item:
+        while not self._items:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        _, item = self._items.popitem(last=False)
+        self._not_full.set()
+        return item
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._not_full.set()
+
+    def stats(self) -> QueueStats:
+        counters = self.counters
+        return QueueStats(
+            depth=len(self._items),
+            maxsize=self.maxsize,
+            high_watermark=counters.high_watermark,
+            enqueued=counters.enqueued,
+            processed=counters.processed,
+            dropped=counters.dropped,
+            coalesced=counters.coalesced,
+        )
+
+
+class Dispatcher:
+    """Runs streaming handlers on a worker pool behind per-event bounded queues.
+
+    ``put`` only enqueues, so the websocket read loop is not held up by slow
+    handlers unless the ``block`` policy is chosen and the queue is full.
+    In ``thread`` mode the sync handlers of one event are called together in a
+    dedicated thread pool instead of one default-executor hop per handler.
+    """
+
+    def __init__(  # pylint: disable=R0913
+        self,
+        maxsize: int = 1024,
+        workers: int = 1,
+        policy: BackpressurePolicy = BackpressurePolicy.block,
+        mode: WorkerMode = WorkerMode.async_,
+        policies: Optional[Dict[str, BackpressurePolicy]] = None,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError(f'maxsize must be positive, got {maxsize}')
+        if workers <= 0:
+            raise ValueError(f'workers must be positive, got {workers}')
+        self._maxsize = maxsize
+        self._workers = workers
+        self._policy = BackpressurePolicy(policy)
+        self._mode = WorkerMode(mode)
+        self._policies = {
+            name: BackpressurePolicy(value) for name, value in (policies or {}).items()
+        }
+        self._queues: Dict[str, _EventQueue] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def put(
+        self,
+        event_name: str,
+        funcs: Sequence[Func],
+        *args: Any,
+        key: Optional[Hashable] = None,
+    ) -> None:
+        queue = self._queues.get(event_name)
+        if queue is None:
+            queue = self._start(event_name)
+        await queue.put(key, (funcs, args))
+
+    def stats(self) -> Dict[str, QueueStats]:
+        return {name: queue.stats() for name, queue in self._queues.items()}
+
+    async def close(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for queue in self._queues.values():
+            queue.clear()
+        self._queues.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _start(self, event_name: str) -> _EventQueue:
+        policy = self._policies.get(event_name, self._policy)
+        queue = self._queues[event_name] = _EventQueue(self._maxsize, policy)
+        if self._mode == WorkerMode.thread and self._executor is None:
+            self._executor = ThreadPoolExecutor(self._workers)
+        for _ in range(self._workers):
+            self._tasks.append(asyncio.ensure_future(self._work(event_name, queue)))
+        return queue
+
+    async def _work(self, event_name: str, queue: _EventQueue) -> None:
+        while True:
+            funcs, args = await queue.get()
+            try:
+                await self._call(funcs, args)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # pylint: disable=W0703
+                logger.error('Handler error on %s: %s', event_name, e)
+            queue.counters.processed += 1
+
+    async def _call(self, funcs: Sequence[Func], args: Tuple[Any, ...]) -> None:
+        if self._mode == WorkerMode.async_:
+            await asyncio.gather(*[func(*args) for func in funcs])
+            return
+
+        sync_funcs = [func for func in funcs if not func.is_async]
+        coros: List[Awaitable] = [func(*args) for func in funcs if func.is_async]
+        if sync_funcs:
+            loop = asyncio.get_event_loop()
+            coros.append(
+                loop.run_in_executor(
+                    self._executor, functools.partial(_call_all, sync_funcs, args)
+                )
+            )
+        await asyncio.gather(*coros)
+
+
+def _call_all(funcs: Sequence[Func], args: Tuple[Any, ...]) -> None:
+    for func in funcs:
+        func.func(*func.args, *args, **func.kwargs)
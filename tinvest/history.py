@@ -0,0 +1,178 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from itertools import chain
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .apis import MarketApi
+from .candles import candle_start
+from .candles_cache import CandlesCache
+from .shemas import Candle, CandleResolution
+from .utils import format_datetime, parse_datetime, utc_aware, with_retries
+
+logger = logging.getLogger(__name__)
+
+Window = Tuple[datetime, datetime]
+_Fetch = Callable[[str, Window], Awaitable[List[Candle]]]
+
+_DAY = timedelta(days=1)
+
+MAX_WINDOWS: Dict[CandleResolution, timedelta] = {
+    CandleResolution.min1: _DAY,
+    CandleResolution.min2: _DAY,
+    CandleResolution.min3: _DAY,
+    CandleResolution.min5: _DAY,
+    CandleResolution.min10: _DAY,
+    CandleResolution.min15: _DAY,
+    CandleResolution.min30: _DAY,
+    CandleResolution.hour: 7 * _DAY,
+    CandleResolution.day: 365 * _DAY,
+    CandleResolution.week: 2 * 365 * _DAY,
+    CandleResolution.month: 10 * 365 * _DAY,
+}
+
+
+def split_range(
+    from_: datetime, to: datetime, interval: CandleResolution
+) -> List[Window]:
+    """Split ``[from_, to)`` into windows accepted by ``/market/candles``."""
+    return split_windows(from_, to, MAX_WINDOWS[CandleResolution(interval)])
+
+
+def split_windows(from_: datetime, to: datetime, step: timedelta) -> List[Window]:
+    from_, to = utc_aware(from_), utc_aware(to)
+    windows = []
+    while from_ < to:
+        windows.append((from_, min(from_ + step, to)))
+        from_ += step
+    return windows
+
+
+class _Pacer:
+    """Spaces calls at least ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate: Optional[float]) -> None:
+        self._delay = 1 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self._delay:
+            return
+        async with self._lock:
+            loop = asyncio.get_event_loop()
+            now = loop.time()
+            delay = self._next - now
+            self._next = max(now, self._next) + self._delay
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class CandlesLoader:
+    """Backfills historical candles through ``MarketApi.market_candles_get``.
+
+    The requested range is split into the widest windows the API accepts for the
+    interval, windows are fetched concurrently on an ``AsyncClient`` and failed
+    windows are retried with exponential backoff. ``rate`` limits the number of
+    requests per second issued by this loader. With a ``cache`` only the gaps
+    that are not on disk yet are requested; cache reads and writes run in the
+    default executor.
+    """
+
+    def __init__(  # pylint: disable=R0913
+        self,
+        client: Any,
+        concurrency: int = 4,
+        rate: Optional[float] = None,
+        retries: int = 3,
+        retry_delay: float = 1,
+        cache: Optional[CandlesCache] = None,
+    ) -> None:
+        if concurrency <= 0:
+            raise ValueError(f'concurrency must be positive, got {concurrency}')
+        self._api = MarketApi(client)
+        self._concurrency = concurrency
+        self._rate = rate
+        self._retries = retries
+        self._retry_delay = retry_delay
+        self._cache = cache
+
+    async def load(
+        self, figi: str, from_: datetime, to: datetime, interval: CandleResolution
+    ) -> List[Candle]:
+        return (await self.load_many([figi], from_, to, interval))[figi]
+
+    async def load_many(
+        self,
+        figis: Iterable[str],
+        from_: datetime,
+        to: datetime,
+        interval: CandleResolution,
+    ) -> Dict[str, List[Candle]]:
+        figis = list(dict.fromkeys(figis))
+        from_, to = utc_aware(from_), utc_aware(to)
+        interval = CandleResolution(interval)
+        semaphore = asyncio.Semaphore(self._concurrency)
+        pacer = _Pacer(self._rate)
+
+        async def fetch(figi: str, window: Window) -> List[Candle]:
+            async with semaphore:
+                return await self._fetch(pacer, figi, window, interval)
+
+        results = await asyncio.gather(
+            *[self._load(fetch, figi, from_, to, interval) for figi in figis]
+        )
+        return dict(zip(figis, results))
+
+    async def _load(  # pylint: disable=R0913
+        self,
+        fetch: _Fetch,
+        figi: str,
+        from_: datetime,
+        to: datetime,
+        interval: CandleResolution,
+    ) -> List[Candle]:
+        if self._cache is None:
+            windows = split_range(from_, to, interval)
+            results = await asyncio.gather(*[fetch(figi, window) for window in windows])
+            return merge_candles(chain.from_iterable(results))
+
+        cache = self._cache
+        # sqlite calls block, keep them off the event loop
+        run = asyncio.get_event_loop().run_in_executor
+        # The current candle is still changing, so it is never marked as covered.
+        complete = candle_start(datetime.now(timezone.utc), interval)
+
+        async def fill(gap: Window) -> None:
+            windows = split_range(*gap, interval)
+            results = await asyncio.gather(*[fetch(figi, window) for window in windows])
+            end = min(gap[1], max(gap[0], complete))
+            candles = list(chain.from_iterable(results))
+            await run(None, cache.put, figi, interval, gap[0], end, candles)
+
+        gaps = await run(None, cache.missing, figi, interval, from_, to)
+        await asyncio.gather(*map(fill, gaps))
+        return await run(None, cache.get, figi, interval, from_, to)
+
+    async def _fetch(
+        self, pacer: _Pacer, figi: str, window: Window, interval: CandleResolution
+    ) -> List[Candle]:
+        from_, to = format_datetime(window[0]), format_datetime(window[1])
+        resolution: Any = CandleResolution(interval).value
+
+        async def fetch() -> List[Candle]:
+            await pacer.wait()
+            async with self._api.market_candles_get(
+                figi, from_, to, resolution
+            ) as response:
+                response.raise_for_status()
+                return (await response.parse_json()).payload.candles
+
+        what = f'Candles {figi} {from_}-{to}'
+        return await with_retries(fetch, self._retries, self._retry_delay, what)
+
+
+def merge_candles(candles: Iterable[Candle]) -> List[Candle]:
+    """De-duplicate candles by time, later ones win, and order them by time."""
+    by_time = {candle.time: candle for candle in candles}
+    return sorted(by_time.values(), key=lambda candle: parse_datetime(candle.time))
@@ -0,0 +1,231 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from .apis import MarketApi
+from .shemas import InstrumentType, MarketInstrument
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_VERSION = 1
+
+_Snapshot = Tuple[Dict[InstrumentType, List[MarketInstrument]], Optional[float]]
+
+
+class InstrumentRegistry:
+    """In-memory index of ``MarketInstrument`` by figi, ticker and isin.
+
+    ``refresh`` loads the stock, bond, etf and currency lists concurrently on an
+    ``AsyncClient`` and applies only the differences to the index, ``start``
+    repeats it in the background. ``save``/``restore`` keep a JSON snapshot so
+    a cold start does not have to wait for the API.
+    """
+
+    def __init__(self, client: Any = None) -> None:
+        self._api = MarketApi(client) if client is not None else None
+        self._by_figi: Dict[str, MarketInstrument] = {}
+        self._by_ticker: Dict[str, MarketInstrument] = {}
+        self._by_isin: Dict[str, MarketInstrument] = {}
+        self._types: Dict[str, InstrumentType] = {}
+        self._tickers: List[Tuple[str, str]] = []
+        self._names: List[Tuple[str, str]] = []
+        self._dirty = False
+        self._task: Optional['asyncio.Future[None]'] = None
+        self.updated_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._by_figi)
+
+    def __contains__(self, figi: object) -> bool:
+        return figi in self._by_figi
+
+    def __iter__(self) -> Iterator[MarketInstrument]:
+        return iter(list(self._by_figi.values()))
+
+    def by_figi(self, figi: str) -> Optional[MarketInstrument]:
+        return self._by_figi.get(figi)
+
+    def by_ticker(self, ticker: str) -> Optional[MarketInstrument]:
+        return self._by_ticker.get(ticker.upper())
+
+    def by_isin(self, isin: str) -> Optional[MarketInstrument]:
+        return self._by_isin.get(isin.upper())
+
+    def type_of(self, figi: str) -> Optional[InstrumentType]:
+        return self._types.get(figi)
+
+    def search(
+        self, prefix: str, limit: Optional[int] = None
+    ) -> List[MarketInstrument]:
+        """Case-insensitive prefix search on ticker and name, tickers first."""
+        if self._dirty:
+            self._reindex()
+        prefix = prefix.lower()
+        figis: Dict[str, None] = {}
+        tickers = _prefixed(self._tickers, prefix)
+        for figi in chain(tickers, _prefixed(self._names, prefix)):
+            if limit and len(figis) >= limit:
+                break
+            figis[figi] = None
+        return [self._by_figi[figi] for figi in figis]
+
+    def update(
+        self,
+        instrument_type: InstrumentType,
+        instruments: Iterable[MarketInstrument],
+    ) -> int:
+        """Replace the ``instrument_type`` list, return the number of changes."""
+        instrument_type = InstrumentType(instrument_type)
+        current = {
+            figi for figi, type_ in self._types.items() if type_ == instrument_type
+        }
+        changes = 0
+        for instrument in instruments:
+            current.discard(instrument.figi)
+            if self._by_figi.get(instrument.figi) != instrument:
+                self._add(instrument_type, instrument)
+                changes += 1
+        for figi in current:
+            self._remove(figi)
+            changes += 1
+        self.updated_at = time.time()
+        return changes
+
+    async def refresh(self) -> int:
+        if self._api is None:
+            raise ValueError('refresh requires a client')
+        api = self._api
+        lists = (
+            (InstrumentType.stock, api.market_stocks_get),
+            (InstrumentType.bond, api.market_bonds_get),
+            (InstrumentType.etf, api.market_etfs_get),
+            (InstrumentType.currency, api.market_currencies_get),
+        )
+
+        async def fetch(method: Any) -> List[MarketInstrument]:
+            async with method() as response:
+                response.raise_for_status()
+                return (await response.parse_json()).payload.instruments
+
+        results = await asyncio.gather(*[fetch(method) for _, method in lists])
+        return sum(
+            self.update(instrument_type, instruments)
+            for (instrument_type, _), instruments in zip(lists, results)
+        )
+
+    def start(self, interval: float = 3600) -> 'asyncio.Future[None]':
+        """Refresh every ``interval`` seconds until ``stop``."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._refresh_forever(interval))
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _refresh_forever(self, interval: float) -> None:
+        while True:
+            try:
+                changes = await self.refresh()
+                logger.debug('Instruments refreshed: %s changes', changes)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # pylint: disable=W0703
+                logger.error('Instruments refresh failed: %s', e)
+            await asyncio.sleep(interval)
+
+    def save(self, path: str) -> None:
+        snapshot = {
+            'version': _SNAPSHOT_VERSION,
+            'updated_at': self.updated_at,
+            'instruments': [
+                dict(instrument.dict(by_alias=True), type=self._types[figi].value)
+                for figi, instrument in self._by_figi.items()
+            ],
+        }
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def restore(self, path: str) -> bool:
+        """Load a snapshot written by ``save``, False if there is none.
+
+        A missing, corrupt or outdated snapshot is ignored and the index is
+        left unchanged, so the caller can ``refresh`` instead.
+        """
+        try:
+            with open(path, encoding='utf-8') as f:
+                snapshot = _parse_snapshot(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError, ValidationError) as e:
+            logger.warning('Instruments snapshot %s ignored: %s', path, e)
+            return False
+        if snapshot is None:
+            return False
+
+        lists, updated_at = snapshot
+        for instrument_type, instruments in lists.items():
+            self.update(instrument_type, instruments)
+        self.updated_at = updated_at
+        return True
+
+    def _add(
+        self, instrument_type: InstrumentType, instrument: MarketInstrument
+    ) -> None:
+        if instrument.figi in self._by_figi:
+            self._remove(instrument.figi)
+        self._by_figi[instrument.figi] = instrument
+        self._by_ticker[instrument.ticker.upper()] = instrument
+        if instrument.isin:
+            self._by_isin[instrument.isin.upper()] = instrument
+        self._types[instrument.figi] = instrument_type
+        self._dirty = True
+
+    def _remove(self, figi: str) -> None:
+        instrument = self._by_figi.pop(figi)
+        del self._types[figi]
+        if self._by_ticker.get(instrument.ticker.upper()) is instrument:
+            del self._by_ticker[instrument.ticker.upper()]
+        if instrument.isin and self._by_isin.get(instrument.isin.upper()) is instrument:
+            del self._by_isin[instrument.isin.upper()]
+        self._dirty = True
+
+    def _reindex(self) -> None:
+        instruments = self._by_figi.values()
+        self._tickers = sorted((i.ticker.lower(), i.figi) for i in instruments)
+        self._names = sorted((i.name.lower(), i.figi) for i in instruments)
+        self._dirty = False
+
+
+def _prefixed(keys: List[Tuple[str, str]], prefix: str) -> Iterator[str]:
+    for key, figi in keys[bisect_left(keys, (prefix, '')) :]:
+        if not key.startswith(prefix):
+            return
+        yield figi
+
+
+def _parse_snapshot(snapshot: Any) -> Optional[_Snapshot]:
+    """Instruments by type and the update time, None for another version."""
+    if not isinstance(snapshot, dict) or snapshot.get('version') != _SNAPSHOT_VERSION:
+        return None
+    lists: Dict[InstrumentType, List[MarketInstrument]] = {
+        instrument_type: [] for instrument_type in InstrumentType
+    }
+    for item in snapshot['instruments']:
+        item = dict(item)
+        instrument_type = InstrumentType(item.pop('type'))
+        lists[instrument_type].append(MarketInstrument.parse_obj(item))
+    return lists, snapshot['updated_at']
@@ -0,0 +1,108 @@
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator, List, Tuple
+
+from pydantic.fields import SHAPE_LIST
+
+_WHITESPACE = re.compile(r'[\s,]*')
+# what a number or literal cut by the end of a chunk can look like
+_PARTIAL = re.compile(r'[-+.\deE]*|t(r(ue?)?)?|f(a(l(se?)?)?)?|n(u(ll?)?)?')
+
+
+class ArrayItemDecoder:
+    """Incremental decoder for the items of the JSON array stored under ``key``.
+
+    Chunks of the document are passed to ``feed`` as they arrive and every
+    complete item is returned as soon as it is decoded, so only one item and
+    the undecoded tail of the last chunk are held in memory. The array is the
+    first ``"key": [`` of the text. The key is matched textually, not by a
+    string-aware scan; as quotes inside JSON strings are escaped, only an
+    earlier key ending in ``\\"key`` can be mistaken for it. A malformed item
+    raises ValueError with its character offset as soon as it is read.
+    """
+
+    def __init__(self, key: str) -> None:
+        self._start = re.compile(rf'"{re.escape(key)}"\s*:\s*\[')
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._offset = 0
+        self._found = False
+        self.done = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        if self.done:
+            return []
+        self._buffer += self._text.decode(chunk)
+        if not self._found:
+            match = self._start.search(self._buffer)
+            if match is None:
+                # keep enough of the tail to match a key split between chunks
+                self._skip(len(self._buffer) - len(self._start.pattern) - 64)
+                return []
+            self._found = True
+            self._skip(match.end())
+        return self._decode()
+
+    def close(self) -> None:
+        if not self.done:
+            raise ValueError('JSON document ended before the end of the array')
+
+    def _skip(self, size: int) -> None:
+        size = max(size, 0)
+        self._buffer = self._buffer[size:]
+        self._offset += size
+
+    def _decode(self) -> List[Any]:
+        items = []
+        buffer = self._buffer
+        pos = 0
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()  # type: ignore
+            if pos == len(buffer):
+                break
+            if buffer[pos] == ']':
+                self.done = True
+                pos += 1
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if _incomplete(buffer, e):
+                    break
+                raise ValueError(f'{e.msg} at character {self._offset + e.pos}') from e
+            if _PARTIAL.fullmatch(buffer, end):
+                # a number or literal may continue in the next chunk
+                break
+            items.append(item)
+            pos = end
+        self._skip(pos)
+        return items
+
+
+def _incomplete(buffer: str, error: json.JSONDecodeError) -> bool:
+    """Whether ``error`` may only mean the item continues in the next chunk."""
+    if error.msg.startswith('Unterminated string'):
+        return True
+    if error.msg.startswith('Invalid \\uXXXX'):
+        return len(buffer) - error.pos < 6
+    return _PARTIAL.fullmatch(buffer, error.pos) is not None
+
+
+def iter_array_items(chunks: Iterable[bytes], key: str) -> Iterator[Any]:
+    decoder = ArrayItemDecoder(key)
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+        if decoder.done:
+            return
+    decoder.close()
+
+
+def list_field(response_model: Any) -> Tuple[str, Any]:
+    """``OperationsResponse`` -> ('operations', Operation)"""
+    payload = response_model.__fields__['payload'].type_
+    for field in payload.__fields__.values():
+        if field.shape == SHAPE_LIST:
+            return field.alias, field.type_
+    raise ValueError(f'{response_model.__name__} payload has no list field')
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+from enum import Enum
+from typing import Dict, Optional, Tuple
+
+
+class EndpointGroup(str, Enum):
+    market = 'market'
+    orders = 'orders'
+    portfolio = 'portfolio'
+    operations = 'operations'
+    sandbox = 'sandbox'
+
+
+# requests per period in seconds
+Limit = Tuple[int, float]
+
+DEFAULT_LIMITS: Dict[str, Limit] = {
+    EndpointGroup.market: (240, 60),
+    EndpointGroup.orders: (100, 60),
+    EndpointGroup.portfolio: (120, 60),
+    EndpointGroup.operations: (120, 60),
+    EndpointGroup.sandbox: (120, 60),
+}
+
+
+def endpoint_group(path: str) -> str:
+    """'/market/orderbook' -> 'market'"""
+    return path.lstrip('/').split('/', 1)[0]
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of rejecting calls.
+
+    A reservation may drive the bucket into debt; the caller then sleeps for the
+    returned delay, so concurrent callers are spaced out in arrival order.
+    """
+
+    def __init__(self, requests: int, period: float) -> None:
+        if requests <= 0 or period <= 0:
+            raise ValueError(f'invalid limit {requests} per {period}s')
+        self.capacity = float(requests)
+        self.rate = requests / period
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+
+class RateLimiter:
+    """Client-side per endpoint group limits.
+
+    One instance can be passed to any number of ``SyncClient``/``AsyncClient``
+    objects; reservations are taken under a lock so the limits hold across
+    threads and tasks. Paths of groups without a limit are not throttled.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Limit]] = None) -> None:
+        if limits is None:
+            limits = DEFAULT_LIMITS
+        self._buckets = {
+            getattr(group, 'value', group): TokenBucket(*limit)
+            for group, limit in limits.items()
+        }
+        self._lock = threading.Lock()
+
+    def reserve(self, path: str) -> float:
+        """Take a token for ``path`` and return how long to wait before sending."""
+        bucket = self._buckets.get(endpoint_group(path))
+        if bucket is None:
+            return 0.0
+        with self._lock:
+            return bucket.reserve(time.monotonic())
+
+    def acquire(self, path: str) -> None:
+        delay = self.reserve(path)
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self, path: str) -> None:
+        delay = self.reserve(path)
+        if delay:
+            await asyncio.sleep(delay)
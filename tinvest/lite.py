@@ -0,0 +1,201 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .shemas import (
+    Candle,
+    CandleResolution,
+    Currency,
+    InstrumentType,
+    MoneyAmount,
+    Operation,
+    OperationStatus,
+    OperationTrade,
+    OperationTypeWithCommission,
+    OrderbookStreamingSchema,
+    OrderResponse,
+)
+
+
+class MoneyAmountLite(NamedTuple):
+    currency: Currency
+    value: float
+
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any]) -> 'MoneyAmountLite':
+        return cls(Currency(obj['currency']), obj['value'])
+
+    @classmethod
+    def from_model(cls, model: MoneyAmount) -> 'MoneyAmountLite':
+        return cls(model.currency, model.value)
+
+    def to_model(self) -> MoneyAmount:
+        return MoneyAmount.construct(currency=self.currency, value=self.value)
+
+
+class OrderResponseLite(NamedTuple):
+    price: float
+    quantity: int
+
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any]) -> 'OrderResponseLite':
+        return cls(obj['price'], obj['quantity'])
+
+    @classmethod
+    def from_model(cls, model: OrderResponse) -> 'OrderResponseLite':
+        return cls(model.price, model.quantity)
+
+    def to_model(self) -> OrderResponse:
+        return OrderResponse.construct(price=self.price, quantity=self.quantity)
+
+
+class CandleLite(NamedTuple):
+    figi: str
+    interval: CandleResolution
+    time: str
+    o: float
+    h: float
+    l: float
+    c: float
+    v: int
+
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any]) -> 'CandleLite':
+        return cls(
+            obj['figi'],
+            CandleResolution(obj['interval']),
+            obj['time'],
+            obj['o'],
+            obj['h'],
+            obj['l'],
+            obj['c'],
+            obj['v'],
+        )
+
+    @classmethod
+    def from_model(cls, model: Candle) -> 'CandleLite':
+        return cls(
+            model.figi,
+            model.interval,
+            model.time,
+            model.o,
+            model.h,
+            model.l,
+            model.c,
+            model.v,
+        )
+
+    def to_model(self) -> Candle:
+        return Candle.construct(**self._asdict())
+
+
+class OrderbookLite(NamedTuple):
+    figi: str
+    depth: int
+    bids: List[Tuple[float, float]]
+    asks: List[Tuple[float, float]]
+
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any]) -> 'OrderbookLite':
+        return cls(obj['figi'], obj['depth'], obj['bids'], obj['asks'])
+
+    @classmethod
+    def from_model(cls, model: OrderbookStreamingSchema) -> 'OrderbookLite':
+        return cls(model.figi, model.depth, model.bids, model.asks)
+
+    def to_model(self) -> OrderbookStreamingSchema:
+        return OrderbookStreamingSchema.construct(**self._asdict())
+
+
+class OperationTradeLite(NamedTuple):
+    date: str
+    price: float
+    quantity: int
+    trade_id: str
+
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any]) -> 'OperationTradeLite':
+        return cls(obj['date'], obj['price'], obj['quantity'], obj['tradeId'])
+
+    @classmethod
+    def from_model(cls, model: OperationTrade) -> 'OperationTradeLite':
+        return cls(model.date, model.price, model.quantity, model.trade_id)
+
+    def to_model(self) -> OperationTrade:
+        return OperationTrade.construct(**self._asdict())
+
+
+class OperationLite(NamedTuple):
+    id: str
+    status: OperationStatus
+    currency: Currency
+    payment: float
+    date: str
+    is_margin_call: bool
+    figi: Optional[str] = None
+    instrument_type: Optional[InstrumentType] = None
+    operation_type: Optional[OperationTypeWithCommission] = None
+    price: Optional[float] = None
+    quantity: Optional[int] = None
+    commission: Optional[MoneyAmountLite] = None
+    trades: Optional[List[OperationTradeLite]] = None
+
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any]) -> 'OperationLite':
+        instrument_type = obj.get('instrumentType')
+        operation_type = obj.get('operationType')
+        commission = obj.get('commission')
+        trades = obj.get('trades')
+        return cls(
+            obj['id'],
+            OperationStatus(obj['status']),
+            Currency(obj['currency']),
+            obj['payment'],
+            obj['date'],
+            obj['isMarginCall'],
+            obj.get('figi'),
+            InstrumentType(instrument_type) if instrument_type else None,
+            OperationTypeWithCommission(operation_type) if operation_type else None,
+            obj.get('price'),
+            obj.get('quantity'),
+            MoneyAmountLite.from_dict(commission) if commission else None,
+            [OperationTradeLite.from_dict(trade) for trade in trades]
+            if trades is not None
+            else None,
+        )
+
+    @classmethod
+    def from_model(cls, model: Operation) -> 'OperationLite':
+        values = dict(model)
+        if model.commission is not None:
+            values['commission'] = MoneyAmountLite.from_model(model.commission)
+        if model.trades is not None:
+            values['trades'] = [OperationTradeLite.from_model(t) for t in model.trades]
+        return cls(**values)
+
+    def to_model(self) -> Operation:
+        values = self._asdict()
+        if self.commission is not None:
+            values['commission'] = self.commission.to_model()
+        if self.trades is not None:
+            values['trades'] = [trade.to_model() for trade in self.trades]
+        return Operation.construct(**values)
+
+
+# Named tuples have no per-instance __dict__ or __fields_set__, so millions of
+# them take a fraction of the memory of the models. ParseMode.lite returns them
+# in place of these models from the clients and Streaming.
+LITE_MODELS: Dict[Any, Any] = {
+    MoneyAmount: MoneyAmountLite,
+    OrderResponse: OrderResponseLite,
+    Candle: CandleLite,
+    OrderbookStreamingSchema: OrderbookLite,
+    Operation: OperationLite,
+    OperationTrade: OperationTradeLite,
+}
+
+
+def to_lite(model: Any) -> Any:
+    return LITE_MODELS[type(model)].from_model(model)
+
+
+def from_lite(lite: Any) -> Any:
+    return lite.to_model()
@@ -0,0 +1,448 @@
+import asyncio
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from aiohttp import WSMsgType, web
+
+from .shemas import CandleResolution
+from .synthetic_market import MARKETS, SyntheticMarket
+from .typedefs import AnyDict
+from .utils import format_datetime, parse_datetime
+
+REST_PATH = '/openapi'
+SANDBOX_PATH = '/openapi/sandbox'
+STREAMING_PATH = '/openapi/md/v1/md-openapi/ws'
+
+MAX_CANDLES = 1000
+
+INTERVALS: Dict[str, timedelta] = {
+    CandleResolution.min1: timedelta(minutes=1),
+    CandleResolution.min2: timedelta(minutes=2),
+    CandleResolution.min3: timedelta(minutes=3),
+    CandleResolution.min5: timedelta(minutes=5),
+    CandleResolution.min10: timedelta(minutes=10),
+    CandleResolution.min15: timedelta(minutes=15),
+    CandleResolution.min30: timedelta(minutes=30),
+    CandleResolution.hour: timedelta(hours=1),
+    CandleResolution.day: timedelta(days=1),
+    CandleResolution.week: timedelta(weeks=1),
+    CandleResolution.month: timedelta(days=30),
+}
+
+_Key = Tuple[str, str, Any]
+
+
+def _now() -> str:
+    return format_datetime(datetime.now(timezone.utc))
+
+
+def _query(request: web.Request, name: str) -> str:
+    value = request.query.get(name)
+    if value is None:
+        raise web.HTTPBadRequest(reason=f'Missing parameter {name}')
+    return value
+
+
+class MockServerConfig(NamedTuple):
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: Optional[float] = None
+    instruments: int = 100
+    stream_interval: float = 0.1
+    seed: Optional[int] = None
+
+
+class MockServerStats(NamedTuple):
+    requests: int
+    errors: int
+    throttled: int
+    connections: int
+    messages: int
+
+
+class _Counters:
+    __slots__ = ('requests', 'errors', 'throttled', 'connections', 'messages')
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.connections = 0
+        self.messages = 0
+
+
+class MockServer:
+    """Local aiohttp server of the OpenAPI REST routes and streaming websocket.
+
+    REST responses are built from a ``SyntheticMarket`` after ``latency`` plus
+    up to ``jitter`` seconds; ``throttle_rate`` and ``error_rate`` of them are
+    answered 429 and 500 instead. Unknown figis and orders are answered 404,
+    missing or malformed parameters 400. Every ``stream_interval`` each websocket
+    subscription receives a synthetic event. Point the clients at ``url``,
+    ``sandbox_url`` and ``streaming_url``::
+
+        async with MockServer(MockServerConfig(latency=0.01)) as server:
+            client = AsyncClient('token', base_url=server.url)
+    """
+
+    def __init__(
+        self,
+        config: Optional[MockServerConfig] = None,
+        host: str = '127.0.0.1',
+        port: int = 0,
+    ) -> None:
+        self.config = config or MockServerConfig()
+        self.market = SyntheticMarket(self.config.instruments, self.config.seed)
+        self._random = random.Random(self.config.seed)
+        self._host = host
+        self._port = port
+        self._runner: Optional[web.AppRunner] = None
+        self._orders: Dict[str, AnyDict] = {}
+        self._counters = _Counters()
+        self.app = self._make_app()
+
+    @property
+    def url(self) -> str:
+        return f'http://{self._host}:{self._port}{REST_PATH}'
+
+    @property
+    def sandbox_url(self) -> str:
+        return f'http://{self._host}:{self._port}{SANDBOX_PATH}'
+
+    @property
+    def streaming_url(self) -> str:
+        return f'ws://{self._host}:{self._port}{STREAMING_PATH}'
+
+    def stats(self) -> MockServerStats:
+        counters = self._counters
+        return MockServerStats(
+            counters.requests,
+            counters.errors,
+            counters.throttled,
+            counters.connections,
+            counters.messages,
+        )
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        self._port = self._runner.addresses[0][1]
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> 'MockServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    def _make_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get(STREAMING_PATH, self._streaming)
+        app.router.add_head(REST_PATH, self._head)
+        app.router.add_head(SANDBOX_PATH, self._head)
+        routes = [
+            ('GET', '/market/orderbook', self._orderbook),
+            ('GET', '/market/candles', self._candles),
+            ('GET', '/market/{market}', self._market),
+            ('GET', '/market/search/by-figi', self._by_figi),
+            ('GET', '/market/search/by-ticker', self._by_ticker),
+            ('GET', '/portfolio', self._portfolio),
+            ('GET', '/portfolio/currencies', self._currencies),
+            ('GET', '/operations', self._operations),
+            ('GET', '/orders', self._orders_get),
+            ('POST', '/orders/limit-order', self._limit_order),
+            ('POST', '/orders/cancel', self._cancel_order),
+            ('POST', '/sandbox/register', self._empty),
+            ('POST', '/sandbox/currencies/balance', self._empty),
+            ('POST', '/sandbox/positions/balance', self._empty),
+            ('POST', '/sandbox/clear', self._empty),
+        ]
+        for prefix in (REST_PATH, SANDBOX_PATH):
+            for method, path, handler in routes:
+                app.router.add_route(method, prefix + path, handler)
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Any) -> Any:
+        if request.path == STREAMING_PATH:
+            return await handler(request)
+        self._counters.requests += 1
+        await self._sleep_latency()
+        response = _check_auth(request)
+        if response is None:
+            response = self._inject_fault()
+        if response is not None:
+            return response
+        try:
+            return await handler(request)
+        except web.HTTPClientError as e:
+            return _error(e.status, e.reason)
+        except (KeyError, ValueError) as e:
+            return _error(400, f'Bad request: {e}')
+
+    async def _sleep_latency(self) -> None:
+        delay = self.config.latency + self.config.jitter * self._random.random()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def _inject_fault(self) -> Optional[web.Response]:
+        config = self.config
+        chance = self._random.random()
+        if chance < config.throttle_rate:
+            self._counters.throttled += 1
+            headers = {}
+            if config.retry_after is not None:
+                headers['Retry-After'] = str(config.retry_after)
+            return _error(429, 'Too many requests', headers)
+        if chance < config.throttle_rate + config.error_rate:
+            self._counters.errors += 1
+            return _error(500, 'Internal error')
+        return None
+
+    def _figi(self, request: web.Request) -> str:
+        figi = _query(request, 'figi')
+        if figi not in self.market.instruments:
+            raise web.HTTPNotFound(reason=f'Unknown figi {figi}')
+        return figi
+
+    async def _head(self, _request: web.Request) -> web.Response:
+        return web.Response()
+
+    async def _empty(self, _request: web.Request) -> web.Response:
+        return _ok({})
+
+    async def _market(self, request: web.Request) -> web.Response:
+        types = dict(MARKETS)
+        market = request.match_info['market']
+        if market not in types:
+            raise web.HTTPNotFound()
+        instruments = self.market.market(types[market])
+        return _ok({'instruments': instruments, 'total': len(instruments)})
+
+    async def _orderbook(self, request: web.Request) -> web.Response:
+        figi = self._figi(request)
+        depth = int(request.query.get('depth', 1))
+        book = self.market.orderbook(figi, depth)
+        price = (book['bids'][0][0] + book['asks'][0][0]) / 2 if depth else None
+        return _ok(
+            {
+                'figi': figi,
+                'depth': depth,
+                'bids': [{'price': p, 'quantity': q} for p, q in book['bids']],
+                'asks': [{'price': p, 'quantity': q} for p, q in book['asks']],
+                'tradeStatus': 'NormalTrading',
+                'minPriceIncrement': 0.01,
+                'lastPrice': price,
+                'closePrice': price,
+            }
+        )
+
+    async def _candles(self, request: web.Request) -> web.Response:
+        figi = self._figi(request)
+        interval = _query(request, 'interval')
+        if interval not in INTERVALS:
+            raise web.HTTPBadRequest(reason=f'Unknown interval {interval}')
+        step = INTERVALS[interval]
+        time = parse_datetime(_query(request, 'from'))
+        to = parse_datetime(_query(request, 'to'))
+        candles: List[AnyDict] = []
+        while time < to and len(candles) < MAX_CANDLES:
+            candles.append(self.market.candle(figi, interval, time))
+            time += step
+        return _ok({'figi': figi, 'interval': interval, 'candles': candles})
+
+    async def _by_figi(self, request: web.Request) -> web.Response:
+        return _ok(self.market.instruments[self._figi(request)])
+
+    async def _by_ticker(self, request: web.Request) -> web.Response:
+        ticker = _query(request, 'ticker')
+        instruments = [
+            i for i in self.market.instruments.values() if i['ticker'] == ticker
+        ]
+        return _ok({'instruments': instruments, 'total': len(instruments)})
+
+    async def _portfolio(self, _request: web.Request) -> web.Response:
+        positions = []
+        for figi, instrument in list(self.market.instruments.items())[:10]:
+            price = {'currency': 'RUB', 'value': self.market.price(figi)}
+            positions.append(
+                {
+                    'figi': figi,
+                    'ticker': instrument['ticker'],
+                    'isin': instrument['isin'],
+                    'instrumentType': self.market.type_of(figi),
+                    'balance': 10,
+                    'lots': 10,
+                    'averagePositionPrice': price,
+                    'expectedYield': {'currency': 'RUB', 'value': 0},
+                }
+            )
+        return _ok({'positions': positions})
+
+    async def _currencies(self, _request: web.Request) -> web.Response:
+        currencies = [
+            {'currency': 'RUB', 'balance': 100000},
+            {'currency': 'USD', 'balance': 1000},
+        ]
+        return _ok({'currencies': currencies})
+
+    async def _operations(self, request: web.Request) -> web.Response:
+        """A buy of every instrument (or ``figi``) at noon of every day."""
+        from_ = parse_datetime(_query(request, 'from'))
+        to = parse_datetime(_query(request, 'to'))
+        day = from_.replace(hour=12, minute=0, second=0, microsecond=0)
+        if day < from_:
+            day += timedelta(days=1)
+        figi = request.query.get('figi')
+        figis = [self._figi(request)] if figi else list(self.market.instruments)[:10]
+        operations: List[AnyDict] = []
+        while day < to:
+            operations.extend(_operation(f, day) for f in figis)
+            day += timedelta(days=1)
+        return _ok({'operations': operations})
+
+    async def _orders_get(self, _request: web.Request) -> web.Response:
+        return _ok(list(self._orders.values()))
+
+    async def _limit_order(self, request: web.Request) -> web.Response:
+        figi = self._figi(request)
+        body = await request.json()
+        order_id = uuid.uuid4().hex
+        placed = {
+            'orderId': order_id,
+            'operation': body['operation'],
+            'status': 'New',
+            'requestedLots': body['lots'],
+            'executedLots': 0,
+        }
+        self._orders[order_id] = dict(
+            placed, figi=figi, type='Limit', price=body['price']
+        )
+        return _ok(placed)
+
+    async def _cancel_order(self, request: web.Request) -> web.Response:
+        order_id = _query(request, 'orderId')
+        if self._orders.pop(order_id, None) is None:
+            raise web.HTTPNotFound(reason=f'Unknown order {order_id}')
+        return _ok({})
+
+    async def _streaming(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._counters.connections += 1
+        subscriptions: Dict[_Key, AnyDict] = {}
+        publisher = asyncio.ensure_future(self._publish(ws, subscriptions))
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT:
+                    await self._subscribe(ws, subscriptions, json.loads(msg.data))
+        finally:
+            publisher.cancel()
+            self._counters.connections -= 1
+        return ws
+
+    async def _subscribe(
+        self,
+        ws: web.WebSocketResponse,
+        subscriptions: Dict[_Key, AnyDict],
+        message: AnyDict,
+    ) -> None:
+        name, _, action = message.get('event', '').partition(':')
+        figi = message.get('figi', '')
+        interval = message.get('interval', '')
+        error = None
+        if figi not in self.market.instruments:
+            error = f'Unknown figi {figi}'
+        elif name == 'candle' and interval not in INTERVALS:
+            error = f'Unknown interval {interval}'
+        elif name not in ('candle', 'orderbook', 'instrument_info'):
+            error = f'Unknown event {name}'
+        if error is not None:
+            payload = {'error': error, 'request_id': message.get('request_id')}
+            await ws.send_json({'event': 'error', 'payload': payload, 'time': _now()})
+            return
+        key = name, figi, message.get('interval', message.get('depth'))
+        if action == 'subscribe':
+            subscriptions[key] = message
+        else:
+            subscriptions.pop(key, None)
+
+    async def _publish(
+        self,
+        ws: web.WebSocketResponse,
+        subscriptions: Dict[_Key, AnyDict],
+    ) -> None:
+        while not ws.closed:
+            await asyncio.sleep(self.config.stream_interval)
+            minute = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+            for name, figi, param in list(subscriptions):
+                payload = self._payload(name, figi, param, minute)
+                message = {'event': name, 'payload': payload, 'time': _now()}
+                await ws.send_str(json.dumps(message))
+                self._counters.messages += 1
+
+    def _payload(self, name: str, figi: str, param: Any, minute: datetime) -> AnyDict:
+        if name == 'candle':
+            return self.market.candle(figi, param, minute)
+        if name == 'orderbook':
+            return self.market.orderbook(figi, param or 2)
+        return self.market.instrument_info(figi)
+
+
+def _operation(figi: str, day: datetime) -> AnyDict:
+    date = format_datetime(day)
+    return {
+        'id': f'{figi}-{date}',
+        'figi': figi,
+        'date': date,
+        'status': 'Done',
+        'operationType': 'Buy',
+        'instrumentType': 'Stock',
+        'currency': 'RUB',
+        'payment': -10.0,
+        'price': 10.0,
+        'quantity': 1,
+        'isMarginCall': False,
+        'commission': {'currency': 'RUB', 'value': -0.05},
+        'trades': [
+            {'tradeId': f'{figi}-{date}', 'date': date, 'price': 10.0, 'quantity': 1}
+        ],
+    }
+
+
+def _check_auth(request: web.Request) -> Optional[web.Response]:
+    if not request.headers.get('Authorization', '').startswith('Bearer '):
+        return _error(401, 'Unauthorized')
+    return None
+
+
+def _ok(payload: Any) -> web.Response:
+    return web.json_response(
+        {'trackingId': uuid.uuid4().hex, 'status': 'Ok', 'payload': payload}
+    )
+
+
+def _error(
+    status: int, message: str, headers: Optional[Dict[str, str]] = None
+) -> web.Response:
+    return web.json_response(
+        {
+            'trackingId': uuid.uuid4().hex,
+            'status': 'Error',
+            'payload': {'message': message, 'code': str(status)},
+        },
+        status=status,
+        headers=headers,
+    )
@@ -0,0 +1,244 @@
+import asyncio
+import csv
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import IO, Any, Callable, Dict, Iterable, List, Optional, Set
+
+from .apis import OperationsApi
+from .history import Window, split_windows
+from .shemas import Operation
+from .utils import format_datetime, utc_aware, with_retries
+
+logger = logging.getLogger(__name__)
+
+CSV_COLUMNS = (
+    'id',
+    'date',
+    'operationType',
+    'status',
+    'figi',
+    'instrumentType',
+    'currency',
+    'payment',
+    'price',
+    'quantity',
+    'commission',
+    'commissionCurrency',
+    'isMarginCall',
+    'trades',
+)
+
+
+class ExportFormat(str, Enum):
+    jsonl = 'jsonl'
+    csv = 'csv'
+
+
+def _csv_row(operation: Operation) -> Dict[str, Any]:
+    row = operation.dict(by_alias=True, exclude={'commission', 'trades'})
+    if operation.commission is not None:
+        row['commission'] = operation.commission.value
+        row['commissionCurrency'] = operation.commission.currency.value
+    if operation.trades:
+        row['trades'] = json.dumps(
+            [trade.dict(by_alias=True) for trade in operation.trades]
+        )
+    return {key: getattr(value, 'value', value) for key, value in row.items()}
+
+
+class OperationsExporter:
+    """Exports ``OperationsApi.operations_get`` history to a JSONL or CSV file.
+
+    The range is split into ``window`` sized requests fetched concurrently on an
+    ``AsyncClient``; operations are written as soon as their window arrives and
+    de-duplicated by ``Operation.id``. Finished windows are recorded in
+    ``<path>.state``, so an interrupted export resumes where it stopped.
+    """
+
+    def __init__(  # pylint: disable=R0913
+        self,
+        client: Any,
+        window: timedelta = timedelta(days=30),
+        concurrency: int = 4,
+        retries: int = 3,
+        retry_delay: float = 1,
+    ) -> None:
+        if concurrency <= 0:
+            raise ValueError(f'concurrency must be positive, got {concurrency}')
+        if window <= timedelta(0):
+            raise ValueError(f'window must be positive, got {window}')
+        self._api = OperationsApi(client)
+        self._window = window
+        self._concurrency = concurrency
+        self._retries = retries
+        self._retry_delay = retry_delay
+
+    async def export(  # pylint: disable=R0913
+        self,
+        path: str,
+        from_: datetime,
+        to: datetime,
+        figi: Optional[str] = None,
+        fmt: ExportFormat = ExportFormat.jsonl,
+    ) -> int:
+        """Write the operations of ``[from_, to)``, return the number written."""
+        fmt = ExportFormat(fmt)
+        run = _ExportRun(
+            path,
+            {
+                'from': format_datetime(utc_aware(from_)),
+                'to': format_datetime(utc_aware(to)),
+                'figi': figi,
+                'format': fmt.value,
+                'window': self._window.total_seconds(),
+            },
+        )
+        mode = 'a' if run.resume(fmt) else 'w'
+        finished = set(run.done)
+        pending = [
+            window
+            for window in split_windows(from_, to, self._window)
+            if format_datetime(window[0]) not in finished
+        ]
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        with open(path, mode, encoding='utf-8', newline='') as f:
+            run.start(f, _writer(f, fmt, header=f.tell() == 0))
+            tasks = [
+                asyncio.ensure_future(self._export_window(run, semaphore, window))
+                for window in pending
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # nothing may write to the file after it is closed
+                for task in tasks:
+                    task.cancel()
+        return run.written
+
+    async def _export_window(
+        self, run: '_ExportRun', semaphore: asyncio.Semaphore, window: Window
+    ) -> None:
+        async with semaphore:
+            operations = await self._fetch(window, run.state['figi'])
+        run.write(operations)
+        run.finish(window)
+
+    async def _fetch(self, window: Window, figi: Optional[str]) -> List[Operation]:
+        from_, to = format_datetime(window[0]), format_datetime(window[1])
+
+        async def fetch() -> List[Operation]:
+            async with self._api.operations_get(from_, to, figi) as response:
+                response.raise_for_status()
+                return [item async for item in response.iter_items()]
+
+        what = f'Operations {from_}-{to}'
+        return await with_retries(fetch, self._retries, self._retry_delay, what)
+
+
+class _ExportRun:
+    """Progress of one export: windows done and operation ids written.
+
+    The done windows are saved to ``<path>.state`` after every window.
+    """
+
+    def __init__(self, path: str, state: Dict[str, Any]) -> None:
+        self.path = path
+        self.state = state
+        self.done: List[str] = []
+        self.seen: Set[str] = set()
+        self.written = 0
+        self._file: Optional[IO[str]] = None
+        self._writer: Callable[[Operation], Any] = lambda operation: None
+
+    def resume(self, fmt: ExportFormat) -> bool:
+        """Load the progress of an interrupted export of the same range."""
+        previous = _read_json(f'{self.path}.state')
+        if previous is None or not os.path.exists(self.path):
+            return False
+        if not _same_export(previous, self.state):
+            return False
+        self.done = previous['done']
+        self.seen = _read_ids(self.path, fmt)
+        return True
+
+    def start(self, f: IO[str], writer: Callable[[Operation], Any]) -> None:
+        self._file = f
+        self._writer = writer
+        self.save()
+
+    def write(self, operations: Iterable[Operation]) -> None:
+        for operation in operations:
+            if operation.id not in self.seen:
+                self.seen.add(operation.id)
+                self._writer(operation)
+                self.written += 1
+
+    def finish(self, window: Window) -> None:
+        if self._file is not None:
+            self._file.flush()
+        self.done.append(format_datetime(window[0]))
+        self.save()
+
+    def save(self) -> None:
+        _write_json(f'{self.path}.state', dict(self.state, done=self.done))
+
+
+def _writer(f: IO[str], fmt: ExportFormat, header: bool) -> Any:
+    if fmt == ExportFormat.jsonl:
+        return lambda operation: f.write(operation.json(by_alias=True) + '\n')
+
+    writer = csv.DictWriter(f, CSV_COLUMNS)
+    if header:
+        writer.writeheader()
+    return lambda operation: writer.writerow(_csv_row(operation))
+
+
+def _same_export(previous: Dict[str, Any], state: Dict[str, Any]) -> bool:
+    return all(previous.get(key) == value for key, value in state.items())
+
+
+def _read_ids(path: str, fmt: ExportFormat) -> Set[str]:
+    _trim_partial_line(path)
+    with open(path, encoding='utf-8', newline='') as f:
+        if fmt == ExportFormat.csv:
+            return {row['id'] for row in csv.DictReader(f)}
+        return {json.loads(line)['id'] for line in f if line.strip()}
+
+
+def _trim_partial_line(path: str) -> None:
+    """Cut a last line left unfinished by an interrupted write.
+
+    Its window was not recorded as done, so the line is written again.
+    """
+    with open(path, 'rb+') as f:
+        size = end = f.seek(0, os.SEEK_END)
+        while end:
+            start = max(0, end - 4096)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b'\n')
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+        if end < size:
+            logger.warning('Dropping a truncated last line of %s', path)
+            f.truncate(end)
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_json(path: str, obj: Any) -> None:
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
@@ -0,0 +1,277 @@
+from array import array
+from itertools import accumulate
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+MAX_DEPTH = 20
+
+_Levels = Sequence[Sequence[float]]
+
+
+class OrderbookSide:
+    """Preallocated price/quantity columns of one side of an orderbook.
+
+    Backed by a ``(depth, 2)`` NumPy buffer when NumPy is installed, otherwise by
+    two ``array('d')`` columns. ``prices`` and ``quantities`` return views of the
+    filled levels, best level first.
+    """
+
+    __slots__ = ('size', '_levels', '_prices', '_quantities')
+
+    def __init__(self, capacity: int = MAX_DEPTH, use_numpy: bool = True) -> None:
+        self.size = 0
+        self._levels: Any = None
+        self._prices: Any = None
+        self._quantities: Any = None
+        if use_numpy and np is not None:
+            self._levels = np.zeros((capacity, 2))
+        else:
+            self._prices = array('d', bytes(8 * capacity))
+            self._quantities = array('d', bytes(8 * capacity))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        return zip(self.prices, self.quantities)
+
+    @property
+    def capacity(self) -> int:
+        if self._levels is not None:
+            return len(self._levels)
+        return len(self._prices)
+
+    @property
+    def prices(self) -> Any:
+        if self._levels is not None:
+            return self._levels[: self.size, 0]
+        return self._prices[: self.size]
+
+    @property
+    def quantities(self) -> Any:
+        if self._levels is not None:
+            return self._levels[: self.size, 1]
+        return self._quantities[: self.size]
+
+    @property
+    def best(self) -> Optional[float]:
+        if not self.size:
+            return None
+        if self._levels is not None:
+            return float(self._levels[0, 0])
+        return self._prices[0]
+
+    def copy(self) -> 'OrderbookSide':
+        use_numpy = self._levels is not None
+        side = OrderbookSide(self.capacity, use_numpy)
+        side.update(self._levels[: self.size] if use_numpy else list(self))
+        return side
+
+    def update(self, levels: _Levels) -> None:
+        size = min(len(levels), self.capacity)
+        if self._levels is not None:
+            if size:
+                self._levels[:size] = levels[:size]
+        else:
+            for i in range(size):
+                self._prices[i], self._quantities[i] = levels[i]
+        self.size = size
+
+    def volume(self, levels: Optional[int] = None) -> float:
+        quantities = self.quantities[:levels]
+        if self._levels is not None:
+            return float(quantities.sum())
+        return sum(quantities)
+
+    def cumulative_depth(self) -> Any:
+        if self._levels is not None:
+            return np.cumsum(self.quantities)
+        return array('d', accumulate(self.quantities))
+
+    def vwap(self, size: float) -> Optional[float]:
+        """Average price of taking ``size`` from this side, None if too thin."""
+        if size <= 0:
+            raise ValueError(f'size must be positive, got {size}')
+        if self._levels is not None:
+            return self._vwap_numpy(size)
+
+        left, cost = size, 0.0
+        for price, quantity in self:
+            taken = min(left, quantity)
+            cost += taken * price
+            left -= taken
+            if not left:
+                return cost / size
+        return None
+
+    def _vwap_numpy(self, size: float) -> Optional[float]:
+        prices, quantities = self.prices, self.quantities
+        filled = np.minimum(np.cumsum(quantities), size)
+        if not filled.size or filled[-1] < size:
+            return None
+        taken = np.diff(filled, prepend=0.0)
+        return float(np.dot(taken, prices) / size)
+
+
+class ColumnarOrderbook:
+    """Orderbook that is updated in place instead of reallocated per event."""
+
+    __slots__ = ('figi', 'depth', 'bids', 'asks', 'updates')
+
+    def __init__(
+        self, figi: str, depth: int = MAX_DEPTH, use_numpy: bool = True
+    ) -> None:
+        if not 0 < depth <= MAX_DEPTH:
+            raise ValueError(f'not 0 < {depth} <= {MAX_DEPTH}')
+        self.figi = figi
+        self.depth = depth
+        self.bids = OrderbookSide(depth, use_numpy)
+        self.asks = OrderbookSide(depth, use_numpy)
+        self.updates = 0
+
+    def __repr__(self) -> str:
+        return (
+            f'ColumnarOrderbook(figi={self.figi!r}, depth={self.depth}, '
+            f'bid={self.bids.best}, ask={self.asks.best})'
+        )
+
+    def update(self, bids: _Levels, asks: _Levels) -> 'ColumnarOrderbook':
+        self.bids.update(bids)
+        self.asks.update(asks)
+        self.updates += 1
+        return self
+
+    def copy(self) -> 'ColumnarOrderbook':
+        """Independent snapshot that later updates of this book do not touch."""
+        book = ColumnarOrderbook.__new__(ColumnarOrderbook)
+        book.figi = self.figi
+        book.depth = self.depth
+        book.bids = self.bids.copy()
+        book.asks = self.asks.copy()
+        book.updates = self.updates
+        return book
+
+    def mid(self) -> Optional[float]:
+        bid, ask = self.bids.best, self.asks.best
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    def spread(self) -> Optional[float]:
+        bid, ask = self.bids.best, self.asks.best
+        if bid is None or ask is None:
+            return None
+        return ask - bid
+
+    def imbalance(self, levels: Optional[int] = None) -> Optional[float]:
+        """(bid volume - ask volume) / total volume over the top ``levels``."""
+        bid_volume = self.bids.volume(levels)
+        ask_volume = self.asks.volume(levels)
+        total = bid_volume + ask_volume
+        if not total:
+            return None
+        return (bid_volume - ask_volume) / total
+
+
+class ColumnarOrderbooks:
+    """Per (figi, depth) registry of reused ColumnarOrderbook instances.
+
+    Pass it to ``StreamingOptions(orderbooks=...)`` to have orderbook handlers receive
+    the reused book instead of a freshly validated ``OrderbookStreamingSchema``.
+    With a dispatcher configured handlers run later or in other threads, so
+    they receive a ``copy()`` of the book instead.
+    """
+
+    def __init__(self, use_numpy: bool = True) -> None:
+        self._use_numpy = use_numpy
+        self._books: Dict[Tuple[str, int], ColumnarOrderbook] = {}
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def __iter__(self) -> Iterator[ColumnarOrderbook]:
+        return iter(self._books.values())
+
+    def get(self, figi: str, depth: int) -> Optional[ColumnarOrderbook]:
+        return self._books.get((figi, depth))
+
+    def update(self, payload: Any) -> ColumnarOrderbook:
+        if not isinstance(payload, dict):
+            payload = payload.dict()
+        key = payload['figi'], payload['depth']
+        book = self._books.get(key)
+        if book is None:
+            book = self._books[key] = ColumnarOrderbook(*key, self._use_numpy)
+        return book.update(payload['bids'], payload['asks'])
+
+
+class LevelChange(NamedTuple):
+    side: str
+    level: int
+    old: Optional[Sequence[float]]
+    new: Optional[Sequence[float]]
+
+
+class OrderbookDelta(NamedTuple):
+    figi: str
+    depth: int
+    changes: Tuple[LevelChange, ...]
+
+    @property
+    def top_changed(self) -> bool:
+        return any(change.level == 0 for change in self.changes)
+
+    def changed_within(self, levels: int) -> bool:
+        return any(change.level < levels for change in self.changes)
+
+
+class OrderbookStore:
+    """Latest orderbook per (figi, depth) with level-wise change detection.
+
+    ``update`` returns the delta against the previous snapshot, or None when
+    nothing changed within the top ``watch_depth`` levels. Passed as
+    ``StreamingOptions(orderbook_store=...)`` it suppresses orderbook handler calls for
+    such updates; handlers can read the delta with ``store.delta(figi, depth)``.
+    """
+
+    def __init__(self, watch_depth: int = 1) -> None:
+        if not 0 < watch_depth <= MAX_DEPTH:
+            raise ValueError(f'not 0 < {watch_depth} <= {MAX_DEPTH}')
+        self.watch_depth = watch_depth
+        self._books: Dict[Tuple[str, int], Tuple[_Levels, _Levels]] = {}
+        self._deltas: Dict[Tuple[str, int], OrderbookDelta] = {}
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def get(self, figi: str, depth: int) -> Optional[Tuple[_Levels, _Levels]]:
+        return self._books.get((figi, depth))
+
+    def delta(self, figi: str, depth: int) -> Optional[OrderbookDelta]:
+        return self._deltas.get((figi, depth))
+
+    def update(self, payload: Any) -> Optional[OrderbookDelta]:
+        if not isinstance(payload, dict):
+            payload = payload.dict()
+        key = payload['figi'], payload['depth']
+        bids, asks = payload['bids'], payload['asks']
+        old_bids, old_asks = self._books.get(key, ((), ()))
+        self._books[key] = bids, asks
+
+        changes = (*_diff('bids', old_bids, bids), *_diff('asks', old_asks, asks))
+        delta = self._deltas[key] = OrderbookDelta(*key, changes)
+        if not delta.changed_within(self.watch_depth):
+            return None
+        return delta
+
+
+def _diff(side: str, old: _Levels, new: _Levels) -> Iterator[LevelChange]:
+    for level in range(max(len(old), len(new))):
+        old_level = old[level] if level < len(old) else None
+        new_level = new[level] if level < len(new) else None
+        if old_level is None or new_level is None or old_level != new_level:
+            yield LevelChange(side, level, old_level, new_level)
@@ -0,0 +1,146 @@
+import copy
+import json
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON, ModelField
+
+from .lite import LITE_MODELS
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+JsonLoads = Callable[[Union[str, bytes]], Any]
+
+json_loads: JsonLoads = orjson.loads if orjson is not None else json.loads
+
+
+class ParseMode(str, Enum):
+    validate = 'validate'
+    construct = 'construct'
+    lazy = 'lazy'
+    lite = 'lite'
+
+
+class LazyModel:
+    """Holds a raw payload and validates it on first attribute access.
+
+    Handlers that only route on ``figi`` or skip the event never pay for
+    validation. ``raw`` returns the payload without validating it.
+    """
+
+    __slots__ = ('_model', '_obj', '_instance')
+
+    def __init__(self, model: Any, obj: Any) -> None:
+        self._model = model
+        self._obj = obj
+        self._instance = None
+
+    def __getattr__(self, name: str) -> Any:
+        # slots are looked up here before they are set, e.g. on copies
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.validate(), name)
+
+    def __repr__(self) -> str:
+        return f'LazyModel({self._model.__name__}, {self._obj!r})'
+
+    def __reduce__(self) -> Tuple[Any, Tuple[Any, Any]]:
+        return LazyModel, (self._model, self._obj)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'LazyModel':
+        lazy = LazyModel(self._model, copy.deepcopy(self._obj, memo))
+        lazy._instance = copy.deepcopy(self._instance, memo)
+        return lazy
+
+    @property
+    def raw(self) -> Any:
+        return self._obj
+
+    def validate(self) -> Any:
+        if self._instance is None:
+            self._instance = self._model.parse_obj(self._obj)
+        return self._instance
+
+
+def parse_obj(model: Any, obj: Any, mode: ParseMode = ParseMode.validate) -> Any:
+    if mode == ParseMode.validate:
+        return model.parse_obj(obj)
+    if mode == ParseMode.construct:
+        return compile_model(model)(obj)
+    if mode == ParseMode.lite:
+        return compile_model(model, lite=True)(obj)
+    return LazyModel(model, obj)
+
+
+_compiled: Dict[Tuple[Any, bool], Callable[[Any], Any]] = {}
+
+
+def compile_model(model: Any, lite: bool = False) -> Callable[[Any], Any]:
+    """Parser building ``model`` from trusted data without validation.
+
+    The parser is generated once per model: aliases are resolved up front and
+    nested models, lists of models and enums are converted by straight-line
+    code. Other values are stored as they are and missing fields get their
+    default, or None when they are required. With ``lite`` the models that have
+    a variant in ``LITE_MODELS`` are built as these named tuples.
+    """
+    parser = _compiled.get((model, lite))
+    if parser is None:
+        parser = _compiled[model, lite] = _compile(model, lite)
+    return parser
+
+
+def _compile(model: Any, lite: bool) -> Callable[[Any], Any]:
+    if lite and model in LITE_MODELS:
+        return LITE_MODELS[model].from_dict
+    namespace: Dict[str, Any] = {
+        '_new': object.__new__,
+        '_setattr': object.__setattr__,
+        '_model': model,
+    }
+    lines = ['def parse(obj):', '    get = obj.get']
+    values = []
+    fields_set = []
+    for i, field in enumerate(model.__fields__.values()):
+        namespace[f'd{i}'] = field.default
+        value = f'get({field.alias!r}, d{i})'
+        convert = _converter(field, i, namespace, lite)
+        if convert is not None:
+            lines.append(f'    v{i} = {value}')
+            value = f'None if v{i} is None else {convert}'
+        values.append(f'{field.name!r}: {value}')
+        fields_set.append(f'{field.name!r} if {field.alias!r} in obj else None')
+    lines += [
+        '    m = _new(_model)',
+        f'    _setattr(m, "__dict__", {{{", ".join(values)}}})',
+        f'    fields_set = {{{", ".join(fields_set)}}}',
+        '    fields_set.discard(None)',
+        '    _setattr(m, "__fields_set__", fields_set)',
+        '    return m',
+    ]
+    exec('\n'.join(lines), namespace)  # pylint: disable=W0122
+    return namespace['parse']
+
+
+def _converter(
+    field: ModelField, i: int, namespace: Dict[str, Any], lite: bool
+) -> Optional[str]:
+    type_ = field.type_
+    if not isinstance(type_, type) or field.shape not in (SHAPE_SINGLETON, SHAPE_LIST):
+        return None
+    if issubclass(type_, BaseModel):
+        namespace[f'c{i}'] = compile_model(type_, lite)
+        item = f'c{i}({{}})'
+    elif issubclass(type_, Enum):
+        namespace[f'e{i}'] = type_._value2member_map_  # pylint: disable=W0212
+        item = f'e{i}.get({{0}}, {{0}})'
+    else:
+        return None
+    if field.shape == SHAPE_LIST:
+        return f'[{item.format("x")} for x in v{i}]'
+    return item.format(f'v{i}')
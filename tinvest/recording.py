@@ -0,0 +1,156 @@
+import asyncio
+import itertools
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple
+
+import aiohttp
+
+# file: MAGIC + start time in epoch ns, then blocks of
+#   BLOCK (compressed size, frame count) + zlib((FRAME (offset ns, size) + utf-8)*)
+MAGIC = b'TINVREC1'
+_START = struct.Struct('<q')
+_BLOCK = struct.Struct('<II')
+_FRAME = struct.Struct('<QI')
+HEADER_SIZE = len(MAGIC) + _START.size
+
+Frame = Tuple[int, str]
+
+
+class StreamRecorder:
+    """Appends websocket text frames and their receive time to ``path``.
+
+    Frames are buffered into blocks of about ``block_size`` bytes, each written
+    zlib compressed with one ``write``, so a crash loses at most the last block
+    and the file stays readable. Offsets are nanoseconds since the recording
+    was created, monotonic within a session; an existing recording is appended
+    to. Pass the recorder to ``StreamingOptions(recorder=...)``.
+    """
+
+    def __init__(
+        self, path: str, block_size: int = 256 * 1024, compression: int = 1
+    ) -> None:
+        created = time.time_ns()
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE:
+            with open(path, 'rb') as f:
+                header = f.read(HEADER_SIZE)
+            _check_magic(header[: len(MAGIC)], path)
+            (created,) = _START.unpack_from(header, len(MAGIC))
+        self._file = open(path, 'ab')  # pylint: disable=R1732
+        if self._file.tell() < HEADER_SIZE:
+            self._file.truncate(0)
+            self._file.write(MAGIC + _START.pack(created))
+            self._file.flush()
+        self._block_size = block_size
+        self._compression = compression
+        self._started = time.monotonic_ns() - max(0, time.time_ns() - created)
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self.frames = 0
+
+    def write(self, text: str) -> None:
+        data = text.encode()
+        self._buffer.append(_FRAME.pack(time.monotonic_ns() - self._started, len(data)))
+        self._buffer.append(data)
+        self._buffered += _FRAME.size + len(data)
+        self.frames += 1
+        if self._buffered >= self._block_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        data = zlib.compress(b''.join(self._buffer), self._compression)
+        self._file.write(_BLOCK.pack(len(data), len(self._buffer) // 2) + data)
+        self._file.flush()
+        self._buffer = []
+        self._buffered = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> 'StreamRecorder':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def read_frames(path: str) -> Iterator[Frame]:
+    """Yield the (offset ns, text) frames of a recording, one block in memory.
+
+    The file is memory-mapped; a block cut short by a crash ends the recording.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= HEADER_SIZE:
+            _check_magic(f.read(len(MAGIC)), path)
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            _check_magic(data[: len(MAGIC)], path)
+            pos = HEADER_SIZE
+            while pos + _BLOCK.size <= len(data):
+                size, count = _BLOCK.unpack_from(data, pos)
+                pos += _BLOCK.size
+                if pos + size > len(data):
+                    return
+                block = zlib.decompress(data[pos : pos + size])
+                pos += size
+                offset = 0
+                for _ in range(count):
+                    received, length = _FRAME.unpack_from(block, offset)
+                    offset += _FRAME.size
+                    yield received, block[offset : offset + length].decode()
+                    offset += length
+
+
+def _check_magic(magic: bytes, path: str) -> None:
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a streaming recording')
+
+
+class StreamReplay:
+    """Websocket stand-in that plays a recording back to ``Streaming.replay``.
+
+    Frames are delivered with their recorded spacing divided by ``speed``;
+    ``speed=None`` delivers them as fast as the handlers consume them.
+    Subscribe messages sent by handlers are ignored.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0) -> None:
+        if speed is not None and speed <= 0:
+            raise ValueError(f'speed must be positive, got {speed}')
+        self._path = path
+        self._speed = speed
+        self.frames = 0
+
+    async def send_json(self, data: Any) -> None:
+        pass
+
+    def __aiter__(self) -> AsyncIterator[aiohttp.WSMessage]:
+        return self._play()
+
+    async def _play(self) -> AsyncIterator[aiohttp.WSMessage]:
+        loop = asyncio.get_event_loop()
+        frames = read_frames(self._path)
+        first = next(frames, None)
+        if first is None:
+            return
+        started = loop.time() - first[0] / 1e9 / (self._speed or 1)
+        for received, text in itertools.chain([first], frames):
+            await self._wait(loop, started, received)
+            self.frames += 1
+            yield aiohttp.WSMessage(aiohttp.WSMsgType.TEXT, text, None)
+
+    async def _wait(self, loop: Any, started: float, received: int) -> None:
+        if self._speed is None:
+            if self.frames % 256 == 0:
+                # let dispatcher workers and other tasks run
+                await asyncio.sleep(0)
+            return
+        delay = started + received / 1e9 / self._speed - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,110 @@
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Collection, NamedTuple, Optional
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+class RetryStats(NamedTuple):
+    requests: int
+    retries: int
+    gave_up: int
+    delay: float
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, either delta-seconds or a date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter for the client request paths.
+
+    Only idempotent methods are retried, so ``orders_limit_order_post`` is sent
+    once while ``market_orderbook_get`` is retried on 429/5xx responses and
+    connection errors. A Retry-After header overrides the computed backoff, up
+    to ``max_backoff``.
+    ``stats`` reports how many retries happened and how long they slept.
+    """
+
+    def __init__(  # pylint: disable=R0913
+        self,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30,
+        jitter: float = 0.5,
+        statuses: Collection[int] = RETRY_STATUSES,
+        methods: Collection[str] = IDEMPOTENT_METHODS,
+    ) -> None:
+        if retries < 0:
+            raise ValueError(f'retries must not be negative, got {retries}')
+        if not 0 <= jitter <= 1:
+            raise ValueError(f'not 0 <= {jitter} <= 1')
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+        self._lock = threading.Lock()
+        self._stats = RetryStats(0, 0, 0, 0.0)
+
+    def stats(self) -> RetryStats:
+        with self._lock:
+            return self._stats
+
+    def next_delay(
+        self,
+        method: str,
+        attempt: int,
+        status: Optional[int] = None,
+        retry_after: Optional[str] = None,
+    ) -> Optional[float]:
+        """Delay before retrying ``attempt`` (0-based), None to stop.
+
+        ``status`` is None when the attempt failed with a connection error.
+        """
+        retryable = status is None or status in self.statuses
+        if attempt == 0:
+            self._count(requests=1)
+        if not retryable or method.upper() not in self.methods:
+            return None
+        if attempt >= self.retries:
+            self._count(gave_up=1)
+            return None
+
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+            delay *= 1 - self.jitter * random.random()
+        else:
+            delay = min(delay, self.max_backoff)
+        self._count(retries=1, delay=delay)
+        return delay
+
+    def _count(
+        self, requests: int = 0, retries: int = 0, gave_up: int = 0, delay: float = 0
+    ) -> None:
+        with self._lock:
+            stats = self._stats
+            self._stats = RetryStats(
+                stats.requests + requests,
+                stats.retries + retries,
+                stats.gave_up + gave_up,
+                stats.delay + delay,
+            )
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Runs one call per key at a time, concurrent callers share its result.
+
+    Callers that arrive while a call for the same key is running wait for it
+    and get the same result or exception instead of starting their own call.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, 'Future[Any]'] = {}
+        self.shared = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if future is None:
+                future = self._calls[key] = Future()
+            else:
+                self.shared += 1
+        if leader:
+            self._call(key, future, func)
+        return future.result()
+
+    def _call(
+        self, key: Hashable, future: 'Future[Any]', func: Callable[[], Any]
+    ) -> None:
+        try:
+            future.set_result(func())
+        except BaseException as e:  # pylint: disable=W0703
+            # even KeyboardInterrupt: the leader and every waiter re-raise it
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """``SingleFlight`` for coroutines running on one event loop."""
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, 'asyncio.Future[Any]'] = {}
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+            # a cancelled waiter must not cancel the call of the other waiters
+            return await asyncio.shield(future)
+
+        future = self._calls[key] = asyncio.ensure_future(func())
+        future.add_done_callback(partial(self._done, key))
+        return await asyncio.shield(future)
+
+    def _done(self, key: Hashable, future: 'asyncio.Future[Any]') -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            # the waiters re-raise it, this only marks it as retrieved
+            future.exception()
@@ -1,43 +1,77 @@
 import asyncio
 import logging
-from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import random
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import aiohttp
 
+from .candles import CandleAggregator
 from .constants import STREAMING
+from .dispatcher import Dispatcher
+from .limiter import Limit, TokenBucket
+from .orderbook import ColumnarOrderbooks, OrderbookStore
+from .parsing import JsonLoads, ParseMode, json_loads, parse_obj
+from .recording import StreamRecorder, StreamReplay
 from .shemas import (
-    CandleResolution,
     CandleStreamingSchema,
     ErrorStreamingSchema,
     InstrumentInfoStreamingSchema,
     OrderbookStreamingSchema,
 )
+from .subscriptions import (
+    SUBSCRIBE_LIMIT,
+    Acknowledgements,
+    CandleEvent,
+    EventName,
+    InstrumentInfoEvent,
+    OrderbookEvent,
+    Subscriptions,
+)
 from .typedefs import AnyDict
 from .utils import Func
 
 logger = logging.getLogger(__name__)
 
 
-_Handler = Tuple[str, Callable]
+Handler = Union[Tuple[str, Callable], Tuple[str, Callable, Tuple[str, ...]]]
+_Routes = Tuple[Func, ...]
+
 
+class ReconnectInfo(NamedTuple):
+    """Passed to ``reconnect`` handlers; no events were received in the gap."""
 
-class EventName(str, Enum):
-    candle = 'candle'
-    orderbook = 'orderbook'
-    instrument_info = 'instrument_info'
-    error = 'error'
+    attempts: int
+    gap_start: datetime
+    gap_end: datetime
+    resubscribed: int
 
+    @property
+    def downtime(self) -> float:
+        return (self.gap_end - self.gap_start).total_seconds()
 
-def _retry(func):
-    async def wrapper(self):
-        while True:
-            await func(self)
 
-    return wrapper
+class StreamingOptions(NamedTuple):
+    """Optional components a ``Streaming`` feeds every received frame through."""
 
+    dispatcher: Optional[Dispatcher] = None
+    orderbooks: Optional[ColumnarOrderbooks] = None
+    orderbook_store: Optional[OrderbookStore] = None
+    candle_aggregator: Optional[CandleAggregator] = None
+    recorder: Optional[StreamRecorder] = None
 
-class Streaming:
+
+class Streaming:  # pylint: disable=R0902
 
     schemas: Dict[EventName, Any] = {
         EventName.candle: CandleStreamingSchema,
@@ -55,32 +89,83 @@ class Streaming:
         ws_close_timeout: float = 0,
         receive_timeout: Optional[float] = 5,
         heartbeat: Optional[float] = 3,
+        parse_mode: ParseMode = ParseMode.validate,
+        loads: JsonLoads = json_loads,
+        max_reconnect_timeout: float = 30,
+        reconnect_jitter: float = 0.5,
+        url: str = STREAMING,
+        options: StreamingOptions = StreamingOptions(),
+        subscribe_limit: Limit = SUBSCRIBE_LIMIT,
     ) -> None:
         super().__init__()
         if not token:
             raise ValueError('Token cannot be empty')
-        self._api: str = STREAMING
+        self._api: str = url
         self._token: str = token
         self._session: aiohttp.ClientSession = session or aiohttp.ClientSession()
-        self._handlers: List[_Handler] = []
+        self._handlers: List[Handler] = []
+        self._routes: Dict[str, _Routes] = {}
+        self._figi_routes: Dict[Tuple[str, str], _Routes] = {}
         self._state = state
         self._reconnect_timeout = reconnect_timeout
         self._ws_close_timeout = ws_close_timeout
         self._receive_timeout = receive_timeout
         self._heartbeat = heartbeat
+        self._parse_mode = ParseMode(parse_mode)
+        self._loads = loads
+        self._max_reconnect_timeout = max_reconnect_timeout
+        self._reconnect_jitter = reconnect_jitter
+        self.options = options
+        self.subscriptions = Subscriptions()
+        self.acknowledgements = Acknowledgements()
+        # paces the *_many messages of all connections and handlers
+        self.bucket = TokenBucket(*subscribe_limit)
+        self._attempts = 0
+        self._disconnected_at: Optional[datetime] = None
 
     def add_handlers(
-        self, handlers: Union[List[_Handler], 'StreamingEvents']
+        self, handlers: Union[List[Handler], 'StreamingEvents']
     ) -> 'Streaming':
         if isinstance(handlers, list):
             self._handlers.extend(handlers)
         else:
             self._handlers.extend(handlers.handlers)
+        self._compile_routes()
 
         return self
 
-    @_retry
+    def _compile_routes(self) -> None:
+        routes: Dict[str, List[Func]] = {}
+        for name, func, *figis in self._handlers:
+            if not figis:
+                routes.setdefault(name, []).append(Func(func))
+
+        # handlers of a figi run after the handlers of all figis
+        figi_routes: Dict[Tuple[str, str], List[Func]] = {}
+        for name, func, *figis in self._handlers:
+            for figi in figis[0] if figis else ():
+                funcs = figi_routes.setdefault((name, figi), list(routes.get(name, ())))
+                funcs.append(Func(func))
+
+        self._routes = {name: tuple(funcs) for name, funcs in routes.items()}
+        self._figi_routes = {key: tuple(funcs) for key, funcs in figi_routes.items()}
+
     async def run(self) -> None:
+        """Receive events until cancelled, reconnecting when the connection drops.
+
+        A dropped connection is reopened at once and the active subscriptions
+        are replayed; failed attempts are retried with exponential backoff from
+        ``reconnect_timeout`` up to ``max_reconnect_timeout``, with jitter. A
+        connection that drops before delivering a frame counts as failed.
+        """
+        try:
+            while True:
+                await self._connect()
+                await self._wait_reconnect()
+        finally:
+            await self._close()
+
+    async def _connect(self) -> None:
         try:
             async with self._session.ws_connect(
                 self._api,
@@ -94,146 +179,170 @@ class Streaming:
             raise
         except Exception as e:  # pylint: disable=W0703
             logger.error('Connection error: %s. Try to reconnect', e)
-            await asyncio.sleep(self._reconnect_timeout)
 
-    async def _run(self, ws):
-        api = StreamingApi(ws, self._state)
+    async def _wait_reconnect(self) -> None:
+        if self._disconnected_at is None:
+            self._disconnected_at = datetime.now(timezone.utc)
+        delay = self._reconnect_delay(self._attempts)
+        self._attempts += 1
+        if delay:
+            await asyncio.sleep(delay)
+
+    async def replay(self, source: StreamReplay) -> None:
+        """Dispatch a recording to the handlers as if it arrived on the socket."""
         try:
-            funcs = self._get_handlers('startup')
-            await asyncio.gather(*[Func(func, api)() for func in funcs])
+            await self._run(source)
+        finally:
+            await self._close()
+
+    def _reconnect_delay(self, attempt: int) -> float:
+        if attempt == 0:
+            return 0.0
+        delay = min(
+            self._max_reconnect_timeout, self._reconnect_timeout * 2 ** (attempt - 1)
+        )
+        return delay * (1 - self._reconnect_jitter * random.random())
+
+    def _make_api(self, ws) -> Any:
+        return StreamingApi(
+            ws, self._state, self.subscriptions, self.acknowledgements, self.bucket
+        )
 
+    async def _run(self, ws):
+        api = self._make_api(ws)
+        recorder = self.options.recorder
+        # the handlers run beside the reads, so they can await the answers to
+        # their subscribes
+        connected = asyncio.ensure_future(self._connected(api, ws))
+        connected.add_done_callback(_log_startup_error)
+        await asyncio.sleep(0)
+        try:
             async for msg in ws:
                 if msg.type == aiohttp.WSMsgType.TEXT:
-                    data = msg.json()
-                    event_name = data['event']
-                    payload = data['payload']
-                    funcs = self._get_handlers(event_name)
-                    if event_name in self.schemas:
-                        data = self.schemas[event_name].parse_obj(payload)
-                    else:
-                        data = payload
-                    await asyncio.gather(*[Func(func, api, data)() for func in funcs])
+                    # the connection works, so the next drop reconnects at once
+                    self._attempts = 0
+                    if recorder is not None:
+                        recorder.write(msg.data)
+                    await self._handle_message(api, msg.data)
                 elif msg.type == aiohttp.WSMsgType.CLOSED:
                     break
                 elif msg.type == aiohttp.WSMsgType.ERROR:
                     break
-            await self._cleanup(api)
         except asyncio.CancelledError:
             await self._cleanup(api)
             raise
+        finally:
+            connected.cancel()
+            await asyncio.gather(connected, return_exceptions=True)
+
+    async def _connected(self, api, ws) -> None:
+        messages = self.subscriptions.reset()
+        for message in messages:
+            await ws.send_json(message)
+
+        funcs = self._get_handlers('startup')
+        await asyncio.gather(*[func(api) for func in funcs])
+
+        if self._disconnected_at is not None:
+            info = ReconnectInfo(
+                self._attempts,
+                self._disconnected_at,
+                datetime.now(timezone.utc),
+                len(messages),
+            )
+            logger.info('Reconnected after %.3fs', info.downtime)
+            funcs = self._get_handlers('reconnect')
+            await asyncio.gather(*[func(api, info) for func in funcs])
+        self._disconnected_at = None
+
+    async def _handle_message(self, api, text) -> None:
+        message = self._loads(text)
+        event_name = message['event']
+        payload = message['payload']
+        if self.acknowledgements:
+            self.acknowledgements.received(event_name, payload)
+        store = self.options.orderbook_store
+        if event_name == EventName.orderbook and store is not None:
+            if store.update(payload) is None:
+                return
+        figi = payload.get('figi') if isinstance(payload, dict) else None
+        funcs = self._get_handlers(event_name, figi)
+        if funcs:
+            data = self._parse(event_name, payload)
+            await self._dispatch(event_name, funcs, (api, data), _stream_key(payload))
+        aggregator = self.options.candle_aggregator
+        if event_name == EventName.candle and aggregator is not None:
+            await self._handle_aggregated(api, aggregator, payload)
+
+    async def _handle_aggregated(self, api, aggregator, payload) -> None:
+        for candle in aggregator.update(payload):
+            funcs = self._get_handlers(EventName.candle, candle.figi)
+            if funcs:
+                # keyed by bucket so coalescing never drops a closed candle
+                key = candle.figi, (candle.interval, candle.time)
+                await self._dispatch(EventName.candle, funcs, (api, candle), key)
+
+    def _parse(self, event_name, payload) -> Any:
+        orderbooks = self.options.orderbooks
+        if event_name == EventName.orderbook and orderbooks is not None:
+            book = orderbooks.update(payload)
+            # queued or threaded handlers must not see later in-place updates
+            return book if self.options.dispatcher is None else book.copy()
+        if event_name in self.schemas:
+            return parse_obj(self.schemas[event_name], payload, self._parse_mode)
+        return payload
+
+    async def _dispatch(self, event_name, funcs, args, key) -> None:
+        dispatcher = self.options.dispatcher
+        if dispatcher is None:
+            await asyncio.gather(*[func(*args) for func in funcs])
+        else:
+            await dispatcher.put(event_name, funcs, *args, key=key)
 
-    def _get_handlers(self, event_name):
-        return [func for name, func in self._handlers if name == event_name]
+    def _get_handlers(self, event_name: str, figi: Optional[str] = None) -> _Routes:
+        if figi is not None and self._figi_routes:
+            funcs = self._figi_routes.get((event_name, figi))
+            if funcs is not None:
+                return funcs
+        return self._routes.get(event_name, ())
 
     async def _cleanup(self, api) -> None:
         funcs = self._get_handlers('cleanup')
-        await asyncio.gather(*[Func(func, api)() for func in funcs])
-        await self._session.close()
-
-
-class _BaseEvent:
-    def __init__(self, ws):
-        self.ws = ws
+        await asyncio.gather(*[func(api) for func in funcs])
 
-    async def _send(self, payload):
-        await self.ws.send_json(payload)
-
-
-class CandleEvent(_BaseEvent):
-    INTERVALS = tuple(c.value for c in CandleResolution)
-
-    def subscribe(
-        self, figi: str, interval: CandleResolution, request_id: Optional[str] = None,
-    ):
-        return self._send(
-            {
-                'event': f'{EventName.candle}:subscribe',
-                **self._get_payload(figi, interval, request_id),
-            }
-        )
-
-    def unsubscribe(
-        self, figi: str, interval: CandleResolution, request_id: Optional[str] = None,
-    ):
-        return self._send(
-            {
-                'event': f'{EventName.candle}:unsubscribe',
-                **self._get_payload(figi, interval, request_id),
-            }
-        )
-
-    def _get_payload(
-        self, figi: str, interval: CandleResolution, request_id: Optional[str] = None,
-    ):
-        if interval not in self.INTERVALS:
-            raise ValueError(f'{interval} not in {self.INTERVALS}')
-
-        data = {'figi': figi, 'interval': interval}
-        if request_id:
-            data['request_id'] = request_id
-        return data
-
-
-class OrderbookEvent(_BaseEvent):
-    def subscribe(self, figi: str, depth: int = 2, request_id: Optional[str] = None):
-        return self._send(
-            {
-                'event': f'{EventName.orderbook}:subscribe',
-                **self._get_payload(figi, depth, request_id),
-            }
-        )
-
-    def unsubscribe(self, figi: str, depth: int = 2, request_id: Optional[str] = None):
-        return self._send(
-            {
-                'event': f'{EventName.orderbook}:unsubscribe',
-                **self._get_payload(figi, depth, request_id),
-            }
-        )
+    async def _close(self) -> None:
+        if self.options.recorder is not None:
+            self.options.recorder.flush()
+        if self.options.dispatcher is not None:
+            await self.options.dispatcher.close()
+        await self._session.close()
 
-    @staticmethod
-    def _get_payload(figi: str, depth: int = 2, request_id: Optional[str] = None):
-        if not 0 < depth <= 20:
-            raise ValueError(f'not 0 < {depth} <= 20')
-        data = {'figi': figi, 'depth': depth}
-        if request_id:
-            data['request_id'] = request_id
-        return data
-
-
-class InstrumentInfoEvent(_BaseEvent):
-    def subscribe(self, figi: str, request_id: Optional[str] = None):
-        return self._send(
-            {
-                'event': f'{EventName.instrument_info}:subscribe',
-                **self._get_payload(figi, request_id),
-            }
-        )
 
-    def unsubscribe(self, figi: str, request_id: Optional[str] = None):
-        return self._send(
-            {
-                'event': f'{EventName.instrument_info}:unsubscribe',
-                **self._get_payload(figi, request_id),
-            }
-        )
+def _log_startup_error(task: 'asyncio.Future[None]') -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error('Startup error: %s', task.exception())
 
-    @staticmethod
-    def _get_payload(figi: str, request_id: Optional[str] = None):
-        data = {'figi': figi}
-        if request_id:
-            data['request_id'] = request_id
 
-        return data
+def _stream_key(payload: Any) -> Any:
+    if not isinstance(payload, dict) or 'figi' not in payload:
+        return None
+    return payload['figi'], payload.get('interval', payload.get('depth'))
 
 
 class StreamingEvents:
     def __init__(self) -> None:
-        self.handlers: List[_Handler] = []
+        self.handlers: List[Handler] = []
 
-    def _decorator_wrapper(self, event_name: str):
+    def _decorator_wrapper(
+        self, event_name: str, figis: Union[str, Iterable[str], None] = None
+    ):
         def decorator(func):
-            self.handlers.append((event_name, func))
+            if figis is None:
+                self.handlers.append((event_name, func))
+            elif isinstance(figis, str):
+                self.handlers.append((event_name, func, (figis,)))
+            else:
+                self.handlers.append((event_name, func, tuple(figis)))
             return func
 
         return decorator
@@ -241,27 +350,40 @@ class StreamingEvents:
     def startup(self):
         return self._decorator_wrapper('startup')
 
-    def candle(self):
-        return self._decorator_wrapper(EventName.candle)
+    def candle(self, figis: Union[str, Iterable[str], None] = None):
+        return self._decorator_wrapper(EventName.candle, figis)
 
-    def orderbook(self):
-        return self._decorator_wrapper(EventName.orderbook)
+    def orderbook(self, figis: Union[str, Iterable[str], None] = None):
+        return self._decorator_wrapper(EventName.orderbook, figis)
 
-    def instrument_info(self):
-        return self._decorator_wrapper(EventName.instrument_info)
+    def instrument_info(self, figis: Union[str, Iterable[str], None] = None):
+        return self._decorator_wrapper(EventName.instrument_info, figis)
 
     def error(self):
         return self._decorator_wrapper(EventName.error)
 
+    def reconnect(self):
+        return self._decorator_wrapper('reconnect')
+
     def cleanup(self):
         return self._decorator_wrapper('cleanup')
 
 
 class StreamingApi:
-    def __init__(self, ws, state: Optional[AnyDict] = None) -> None:
-        self.candle = CandleEvent(ws)
-        self.orderbook = OrderbookEvent(ws)
-        self.instrument_info = InstrumentInfoEvent(ws)
+    def __init__(  # pylint: disable=R0913
+        self,
+        ws,
+        state: Optional[AnyDict] = None,
+        subscriptions: Optional[Subscriptions] = None,
+        acknowledgements: Optional[Acknowledgements] = None,
+        bucket: Optional[TokenBucket] = None,
+    ) -> None:
+        # one bucket paces the *_many messages of all events
+        bucket = bucket or TokenBucket(*SUBSCRIBE_LIMIT)
+        args = ws, subscriptions, acknowledgements, bucket
+        self.candle = CandleEvent(*args)
+        self.orderbook = OrderbookEvent(*args)
+        self.instrument_info = InstrumentInfoEvent(*args)
         self._state = state
 
     def __getitem__(self, key: str) -> Any:
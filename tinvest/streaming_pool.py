@@ -0,0 +1,425 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import time
+from bisect import bisect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Union
+
+from .parsing import JsonLoads, json_loads
+from .streaming import Handler, ReconnectInfo, Streaming, StreamingEvents
+from .subscriptions import (
+    CandleEvent,
+    InstrumentInfoEvent,
+    OrderbookEvent,
+    SubscribeSummary,
+)
+from .typedefs import AnyDict
+from .utils import Func, parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# Streaming options that are sent to shard processes, the others are applied
+# to the events in the parent process.
+_CONNECTION_OPTIONS = frozenset(
+    {
+        'reconnect_timeout',
+        'max_reconnect_timeout',
+        'reconnect_jitter',
+        'ws_close_timeout',
+        'receive_timeout',
+        'heartbeat',
+        'url',
+    }
+)
+_POOL_EVENTS = frozenset({'startup', 'cleanup'})
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent hashing of figis onto ``nodes`` shards.
+
+    Changing the number of shards only moves about ``1 / nodes`` of the figis.
+    """
+
+    def __init__(self, nodes: int, replicas: int = 64) -> None:
+        if nodes <= 0:
+            raise ValueError(f'nodes must be positive, got {nodes}')
+        points = sorted(
+            (_hash(f'{node}:{replica}'), node)
+            for node in range(nodes)
+            for replica in range(replicas)
+        )
+        self._points = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+        self._cache: Dict[str, int] = {}
+
+    def node(self, key: str) -> int:
+        node = self._cache.get(key)
+        if node is None:
+            index = bisect(self._points, _hash(key)) % len(self._points)
+            node = self._cache[key] = self._nodes[index]
+        return node
+
+
+class ShardStats(NamedTuple):
+    shard: int
+    connected: bool
+    subscriptions: int
+    messages: int
+    reconnects: int
+    lag: Optional[float]
+    idle: Optional[float]
+
+
+class _Shard(Streaming):
+    """``Streaming`` of one shard, counts messages and keeps the live socket."""
+
+    def __init__(
+        self,
+        token: str,
+        pool_api: Any = None,
+        loads: JsonLoads = json_loads,
+        **kwargs: Any,
+    ) -> None:
+        self.pool_api = pool_api
+        self.ws: Any = None
+        self.connected = False
+        self.messages = 0
+        self.reconnects = 0
+        self.last_time: Optional[str] = None
+        self.last_received: Optional[float] = None
+
+        def counting_loads(data: Any) -> Any:
+            message = loads(data)
+            self.messages += 1
+            self.last_time = message.get('time')
+            self.last_received = time.time()
+            return message
+
+        super().__init__(token, loads=counting_loads, **kwargs)
+
+    def _make_api(self, ws) -> Any:
+        if self.pool_api is not None:
+            return self.pool_api
+        return super()._make_api(ws)
+
+    async def _run(self, ws):
+        self.ws = ws
+        try:
+            await super()._run(ws)
+        finally:
+            self.ws = None
+            self.connected = False
+
+    async def _connected(self, api, ws) -> None:
+        if self._disconnected_at is not None:
+            self.reconnects += 1
+        self.connected = True
+        await super()._connected(api, ws)
+
+    async def send_json(self, message: AnyDict) -> None:
+        """Subscribe/unsubscribe now or, when disconnected, on the next connect."""
+        if self.subscriptions.track(message) and self.ws is not None:
+            await self.ws.send_json(message)
+
+    def stats(self, index: int) -> ShardStats:
+        lag = idle = None
+        if self.last_received is not None:
+            idle = time.time() - self.last_received
+            if self.last_time:
+                sent = parse_datetime(self.last_time).timestamp()
+                lag = self.last_received - sent
+        return ShardStats(
+            index,
+            self.connected,
+            len(self.subscriptions),
+            self.messages,
+            self.reconnects,
+            lag,
+            idle,
+        )
+
+    async def handle_frame(self, api: Any, text: str) -> None:
+        """Handle a frame read by the shard process."""
+        recorder = self.options.recorder
+        if recorder is not None:
+            recorder.write(text)
+        await self._handle_message(api, text)
+
+    async def close(self) -> None:
+        await self._close()
+
+
+class _ProcessSink:
+    """Sends (un)subscribe messages to a shard process."""
+
+    def __init__(self, shard: _Shard, commands: Any) -> None:
+        self._shard = shard
+        self._commands = commands
+        self.acknowledgements = shard.acknowledgements
+        self.bucket = shard.bucket
+
+    async def send_json(self, message: AnyDict) -> None:
+        # the process de-duplicates, this only keeps ``stats`` up to date
+        self._shard.subscriptions.track(message)
+        self._commands.put(message)
+
+
+class _PoolEvent:
+    def __init__(self, pool: 'StreamingPool', event: Any) -> None:
+        self._pool = pool
+        self._event = event
+
+    def subscribe(self, figi: str, *args: Any, **kwargs: Any) -> Any:
+        return self._for(figi).subscribe(figi, *args, **kwargs)
+
+    def unsubscribe(self, figi: str, *args: Any, **kwargs: Any) -> Any:
+        return self._for(figi).unsubscribe(figi, *args, **kwargs)
+
+    def subscribe_many(self, figis: Iterable[str], *args: Any, **kwargs: Any) -> Any:
+        return self._many('subscribe_many', figis, *args, **kwargs)
+
+    def unsubscribe_many(self, figis: Iterable[str], *args: Any, **kwargs: Any) -> Any:
+        return self._many('unsubscribe_many', figis, *args, **kwargs)
+
+    async def _many(
+        self, method: str, figis: Iterable[str], *args: Any, **kwargs: Any
+    ) -> SubscribeSummary:
+        groups: Dict[int, List[str]] = {}
+        for figi in dict.fromkeys(figis):
+            groups.setdefault(self._pool.shard_for(figi), []).append(figi)
+        calls = []
+        for shard, group in groups.items():
+            sink = self._pool.sink(shard)
+            event = self._event(sink, None, sink.acknowledgements, sink.bucket)
+            calls.append(getattr(event, method)(group, *args, **kwargs))
+        summaries = await asyncio.gather(*calls)
+        return SubscribeSummary([r for summary in summaries for r in summary.results])
+
+    def _for(self, figi: str) -> Any:
+        return self._event(self._pool.sink(self._pool.shard_for(figi)))
+
+
+class PoolApi:
+    """``StreamingApi`` of a pool, (un)subscribes on the shard owning the figi."""
+
+    def __init__(self, pool: 'StreamingPool', state: Optional[AnyDict]) -> None:
+        self.candle = _PoolEvent(pool, CandleEvent)
+        self.orderbook = _PoolEvent(pool, OrderbookEvent)
+        self.instrument_info = _PoolEvent(pool, InstrumentInfoEvent)
+        self._state = state
+
+    def __getitem__(self, key: str) -> Any:
+        if self._state and key in self._state:
+            return self._state[key]
+        raise IndexError
+
+
+class StreamingPool:
+    """Spreads streaming subscriptions over ``shards`` websocket connections.
+
+    Figis are assigned to shards by consistent hashing, subscriptions made
+    through ``api`` go to the shard of the figi. Event handlers receive ``api``
+    whatever shard the event came from; startup and cleanup handlers run once
+    for the pool. With ``processes`` every connection is read in its own
+    process and the frames are handled in this one, which moves the socket
+    reads, TLS and heartbeats off this event loop. ``stats`` reports the
+    health and lag of every shard.
+    """
+
+    def __init__(  # pylint: disable=R0913
+        self,
+        token: str,
+        shards: int = 4,
+        processes: bool = False,
+        replicas: int = 64,
+        state: Optional[AnyDict] = None,
+        **kwargs: Any,
+    ) -> None:
+        if not token:
+            raise ValueError('Token cannot be empty')
+        self._token = token
+        self._ring = HashRing(shards, replicas)
+        self._processes = processes
+        self._kwargs = kwargs
+        self.api = PoolApi(self, state)
+        self._shards = [
+            _Shard(token, state=state, pool_api=self.api, **kwargs)
+            for _ in range(shards)
+        ]
+        self._handlers: List[Handler] = []
+        self._commands: List[Any] = []
+        self._frames: List[Any] = []
+        self._sinks: List[Any] = list(self._shards)
+        if processes:
+            context = multiprocessing.get_context('spawn')
+            self._commands = [context.Queue() for _ in self._shards]
+            self._frames = [context.Queue() for _ in self._shards]
+            self._sinks = [
+                _ProcessSink(shard, commands)
+                for shard, commands in zip(self._shards, self._commands)
+            ]
+
+    def add_handlers(
+        self, handlers: Union[List[Handler], StreamingEvents]
+    ) -> 'StreamingPool':
+        if not isinstance(handlers, list):
+            handlers = handlers.handlers
+        self._handlers.extend(handlers)
+        shard_handlers = [h for h in handlers if h[0] not in _POOL_EVENTS]
+        for shard in self._shards:
+            shard.add_handlers(shard_handlers)
+        return self
+
+    def shard_for(self, figi: str) -> int:
+        return self._ring.node(figi)
+
+    def stats(self) -> List[ShardStats]:
+        return [shard.stats(index) for index, shard in enumerate(self._shards)]
+
+    def sink(self, shard: int) -> Any:
+        """Where the (un)subscribe messages of ``shard`` are sent."""
+        return self._sinks[shard]
+
+    async def run(self) -> None:
+        if self._processes:
+            await self._run_processes()
+        else:
+            await self._run_shards(
+                [asyncio.ensure_future(shard.run()) for shard in self._shards]
+            )
+
+    async def _run_shards(self, tasks: List[Any]) -> None:
+        try:
+            await self._call_handlers('startup')
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._call_handlers('cleanup')
+
+    async def _run_processes(self) -> None:
+        options = {k: v for k, v in self._kwargs.items() if k in _CONNECTION_OPTIONS}
+        context = multiprocessing.get_context('spawn')
+        processes = [
+            context.Process(
+                target=_shard_process,
+                args=(self._token, options, commands, frames),
+                daemon=True,
+            )
+            for commands, frames in zip(self._commands, self._frames)
+        ]
+        for process in processes:
+            process.start()
+        executor = ThreadPoolExecutor(len(processes))
+        tasks = [
+            asyncio.ensure_future(self._read_frames(executor, shard, frames))
+            for shard, frames in zip(self._shards, self._frames)
+        ]
+        try:
+            await self._run_shards(tasks)
+        finally:
+            await self._stop_processes(processes, executor)
+
+    async def _stop_processes(self, processes: List[Any], executor: Any) -> None:
+        for commands, frames in zip(self._commands, self._frames):
+            commands.put(None)
+            frames.put(None)
+        for process in processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+        executor.shutdown(wait=False)
+        for shard in self._shards:
+            await shard.close()
+
+    async def _read_frames(self, executor: Any, shard: _Shard, frames: Any) -> None:
+        loop = asyncio.get_event_loop()
+        items = await loop.run_in_executor(executor, frames.get)
+        while items is not None:
+            for item in items:
+                await self._handle_item(shard, item)
+            items = await loop.run_in_executor(executor, frames.get)
+
+    async def _handle_item(self, shard: _Shard, item: Any) -> None:
+        if not isinstance(item, str):
+            await self._handle_control(shard, *item)
+            return
+        try:
+            await shard.handle_frame(self.api, item)
+        except Exception as e:  # pylint: disable=W0703
+            logger.error('Shard message error: %s', e)
+
+    async def _handle_control(self, shard: _Shard, kind: str, value: Any) -> None:
+        if kind == 'connected':
+            shard.connected = value
+        elif kind == 'reconnect':
+            shard.reconnects += 1
+            await self._call_handlers('reconnect', value)
+
+    async def _call_handlers(self, event_name: str, *args: Any) -> None:
+        funcs = [Func(func) for name, func, *_ in self._handlers if name == event_name]
+        await asyncio.gather(*[func(self.api, *args) for func in funcs])
+
+
+class _ForwardingShard(_Shard):
+    """Shard of a process, sends frames and connection events to the parent."""
+
+    def __init__(self, frames: Any, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._frames = frames
+        self._buffer: List[Any] = []
+        self.add_handlers([('reconnect', self._forward_reconnect)])
+
+    async def _handle_message(self, api, text) -> None:
+        self._put(text)
+
+    async def _connected(self, api, ws) -> None:
+        await super()._connected(api, ws)
+        self._put(('connected', True))
+
+    async def _run(self, ws):
+        try:
+            await super()._run(ws)
+        finally:
+            self._put(('connected', False))
+
+    async def _forward_reconnect(self, _api: Any, info: ReconnectInfo) -> None:
+        # a coroutine, so the item is buffered on the loop and not in a thread
+        self._put(('reconnect', info))
+
+    def _put(self, item: Any) -> None:
+        # frames received in one loop iteration are sent to the parent together
+        if not self._buffer:
+            asyncio.get_event_loop().call_soon(self._flush)
+        self._buffer.append(item)
+
+    def _flush(self) -> None:
+        items, self._buffer = self._buffer, []
+        self._frames.put(items)
+
+
+def _shard_process(token: str, options: AnyDict, commands: Any, frames: Any) -> None:
+    asyncio.run(_run_shard_process(token, options, commands, frames))
+
+
+async def _run_shard_process(
+    token: str, options: AnyDict, commands: Any, frames: Any
+) -> None:
+    shard = _ForwardingShard(frames, token, **options)
+    task = asyncio.ensure_future(shard.run())
+    loop = asyncio.get_event_loop()
+    with ThreadPoolExecutor(1) as executor:
+        while True:
+            message = await loop.run_in_executor(executor, commands.get)
+            if message is None:
+                break
+            await shard.send_json(message)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
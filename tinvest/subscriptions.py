@@ -0,0 +1,376 @@
+import asyncio
+import time
+import uuid
+from enum import Enum
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from .limiter import Limit, TokenBucket
+from .shemas import CandleResolution
+from .typedefs import AnyDict
+
+
+class EventName(str, Enum):
+    candle = 'candle'
+    orderbook = 'orderbook'
+    instrument_info = 'instrument_info'
+    error = 'error'
+
+
+_SubscriptionKey = Tuple[str, str, Any]
+
+# subscribe/unsubscribe messages per period in seconds sent by *_many
+SUBSCRIBE_LIMIT: Limit = (50, 1.0)
+
+
+def _subscription_key(name: str, message: AnyDict) -> _SubscriptionKey:
+    return name, message['figi'], message.get('interval', message.get('depth'))
+
+
+class Subscriptions:
+    """Subscriptions made through ``StreamingApi`` on the current connection.
+
+    ``Streaming`` replays them in one batch after a reconnect. A subscribe that
+    was already sent on the current connection is not sent again, so startup
+    handlers that subscribe on every connect do not double the traffic.
+    """
+
+    def __init__(self) -> None:
+        self._active: Dict[_SubscriptionKey, AnyDict] = {}
+        self._sent: Set[_SubscriptionKey] = set()
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def __iter__(self):
+        return iter(list(self._active.values()))
+
+    def track(self, message: AnyDict) -> bool:
+        """Record a (un)subscribe ``message``, False if it need not be sent."""
+        name, _, action = message['event'].partition(':')
+        key = _subscription_key(name, message)
+        if action == 'subscribe':
+            self._active[key] = {k: v for k, v in message.items() if k != 'request_id'}
+            if key in self._sent:
+                return False
+            self._sent.add(key)
+        elif action == 'unsubscribe':
+            self._active.pop(key, None)
+            self._sent.discard(key)
+        return True
+
+    def reset(self) -> List[AnyDict]:
+        """Start a new connection, return the subscribe messages to replay."""
+        self._sent = set(self._active)
+        return list(self._active.values())
+
+
+class SubscribeResult(NamedTuple):
+    """Outcome of one request; ``timed_out`` if nothing answered it in time."""
+
+    figi: str
+    request_id: str
+    error: Optional[str] = None
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+
+
+class SubscribeSummary(NamedTuple):
+    results: List[SubscribeResult]
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.results)
+
+    @property
+    def errors(self) -> Dict[str, str]:
+        return {r.figi: r.error for r in self.results if r.error is not None}
+
+    @property
+    def timed_out(self) -> List[str]:
+        return [r.figi for r in self.results if r.timed_out]
+
+
+class Acknowledgements:
+    """Outcome of subscribe messages sent with a ``request_id``.
+
+    The server only answers failed requests, with an error event carrying the
+    ``request_id``. A subscribe is confirmed by the first event of its stream.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Dict[str, 'asyncio.Future[Optional[str]]'] = {}
+        self._streams: Dict[_SubscriptionKey, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def expect(self, message: AnyDict) -> 'asyncio.Future[Optional[str]]':
+        future = asyncio.get_event_loop().create_future()
+        request_id = message['request_id']
+        self._pending[request_id] = future
+        name, _, action = message['event'].partition(':')
+        if action == 'subscribe':
+            self._streams[_subscription_key(name, message)] = request_id
+        return future
+
+    def received(self, event_name: str, payload: Any) -> None:
+        if not isinstance(payload, dict):
+            return
+        if event_name == EventName.error:
+            self._resolve(payload.get('request_id'), payload.get('error', ''))
+        elif 'figi' in payload:
+            key = _subscription_key(event_name, payload)
+            self._resolve(self._streams.get(key), None)
+
+    def discard(self, request_ids: Iterable[str]) -> None:
+        discarded = set(request_ids)
+        for request_id in discarded:
+            self._pending.pop(request_id, None)
+        self._streams = {k: v for k, v in self._streams.items() if v not in discarded}
+
+    def _resolve(self, request_id: Optional[str], error: Optional[str]) -> None:
+        future = self._pending.get(request_id) if request_id else None
+        if future is not None and not future.done():
+            future.set_result(error)
+
+
+async def send_many(  # pylint: disable=R0913
+    send: Callable[[AnyDict], Awaitable[None]],
+    acknowledgements: Optional[Acknowledgements],
+    event: str,
+    figis: Iterable[str],
+    params: AnyDict,
+    bucket: TokenBucket,
+    confirm_timeout: float,
+) -> SubscribeSummary:
+    """Send one ``event`` message per figi, paced by ``bucket``.
+
+    Subscribes wait up to ``confirm_timeout`` after the last send for their
+    error or first stream event, those without either are ``timed_out``.
+    Unsubscribes are only answered on failure, so nothing is awaited for them
+    and their errors reach the ``error`` handlers. Without
+    ``acknowledgements`` nothing is awaited.
+    """
+    prefix = uuid.uuid4().hex[:8]
+    messages = [
+        {'event': event, **params, 'figi': figi, 'request_id': f'{prefix}-{i}'}
+        for i, figi in enumerate(dict.fromkeys(figis))
+    ]
+    if not event.endswith(':subscribe'):
+        acknowledgements = None
+    futures: List['asyncio.Future[Optional[str]]'] = []
+    if acknowledgements is not None:
+        futures = [acknowledgements.expect(message) for message in messages]
+    try:
+        for message in messages:
+            await _send_paced(send, bucket, message)
+        if futures:
+            await asyncio.wait(futures, timeout=confirm_timeout)
+    finally:
+        if acknowledgements is not None:
+            acknowledgements.discard(m['request_id'] for m in messages)
+    return _summary(messages, futures)
+
+
+async def _send_paced(
+    send: Callable[[AnyDict], Awaitable[None]], bucket: TokenBucket, message: AnyDict
+) -> None:
+    delay = bucket.reserve(time.monotonic())
+    if delay:
+        await asyncio.sleep(delay)
+    await send(message)
+
+
+def _summary(
+    messages: List[AnyDict], futures: List['asyncio.Future[Optional[str]]']
+) -> SubscribeSummary:
+    results = [SubscribeResult(m['figi'], m['request_id']) for m in messages]
+    for i, future in enumerate(futures):
+        if future.done():
+            results[i] = results[i]._replace(error=future.result())
+        else:
+            results[i] = results[i]._replace(timed_out=True)
+    return SubscribeSummary(results)
+
+
+class _BaseEvent:
+    name: EventName
+
+    def __init__(
+        self,
+        ws,
+        subscriptions: Optional[Subscriptions] = None,
+        acknowledgements: Optional[Acknowledgements] = None,
+        bucket: Optional[TokenBucket] = None,
+    ):
+        self.ws = ws
+        self.subscriptions = subscriptions
+        self.acknowledgements = acknowledgements
+        self.bucket = bucket or TokenBucket(*SUBSCRIBE_LIMIT)
+
+    async def _send(self, payload):
+        if self.subscriptions is None or self.subscriptions.track(payload):
+            await self.ws.send_json(payload)
+
+    def _send_many(
+        self, action: str, figis: Iterable[str], params: AnyDict, confirm_timeout: float
+    ) -> Awaitable[SubscribeSummary]:
+        event = f'{self.name.value}:{action}'
+        return send_many(
+            self._send,
+            self.acknowledgements,
+            event,
+            figis,
+            params,
+            self.bucket,
+            confirm_timeout,
+        )
+
+
+class CandleEvent(_BaseEvent):
+    name = EventName.candle
+    INTERVALS = tuple(c.value for c in CandleResolution)
+
+    def subscribe(
+        self, figi: str, interval: CandleResolution, request_id: Optional[str] = None,
+    ):
+        return self._send(
+            {
+                'event': f'{EventName.candle.value}:subscribe',
+                **self._get_payload(figi, interval, request_id),
+            }
+        )
+
+    def unsubscribe(
+        self, figi: str, interval: CandleResolution, request_id: Optional[str] = None,
+    ):
+        return self._send(
+            {
+                'event': f'{EventName.candle.value}:unsubscribe',
+                **self._get_payload(figi, interval, request_id),
+            }
+        )
+
+    def subscribe_many(
+        self,
+        figis: Iterable[str],
+        interval: CandleResolution,
+        confirm_timeout: float = 2,
+    ):
+        params = self._params(interval)
+        return self._send_many('subscribe', figis, params, confirm_timeout)
+
+    def unsubscribe_many(
+        self,
+        figis: Iterable[str],
+        interval: CandleResolution,
+        confirm_timeout: float = 2,
+    ):
+        params = self._params(interval)
+        return self._send_many('unsubscribe', figis, params, confirm_timeout)
+
+    def _get_payload(
+        self, figi: str, interval: CandleResolution, request_id: Optional[str] = None,
+    ):
+        data = {'figi': figi, **self._params(interval)}
+        if request_id:
+            data['request_id'] = request_id
+        return data
+
+    def _params(self, interval: CandleResolution) -> AnyDict:
+        if interval not in self.INTERVALS:
+            raise ValueError(f'{interval} not in {self.INTERVALS}')
+        return {'interval': interval}
+
+
+class OrderbookEvent(_BaseEvent):
+    name = EventName.orderbook
+
+    def subscribe(self, figi: str, depth: int = 2, request_id: Optional[str] = None):
+        return self._send(
+            {
+                'event': f'{EventName.orderbook.value}:subscribe',
+                **self._get_payload(figi, depth, request_id),
+            }
+        )
+
+    def unsubscribe(self, figi: str, depth: int = 2, request_id: Optional[str] = None):
+        return self._send(
+            {
+                'event': f'{EventName.orderbook.value}:unsubscribe',
+                **self._get_payload(figi, depth, request_id),
+            }
+        )
+
+    def subscribe_many(
+        self, figis: Iterable[str], depth: int = 2, confirm_timeout: float = 2,
+    ):
+        params = self._params(depth)
+        return self._send_many('subscribe', figis, params, confirm_timeout)
+
+    def unsubscribe_many(
+        self, figis: Iterable[str], depth: int = 2, confirm_timeout: float = 2,
+    ):
+        params = self._params(depth)
+        return self._send_many('unsubscribe', figis, params, confirm_timeout)
+
+    @staticmethod
+    def _get_payload(figi: str, depth: int = 2, request_id: Optional[str] = None):
+        data = {'figi': figi, **OrderbookEvent._params(depth)}
+        if request_id:
+            data['request_id'] = request_id
+        return data
+
+    @staticmethod
+    def _params(depth: int) -> AnyDict:
+        if not 0 < depth <= 20:
+            raise ValueError(f'not 0 < {depth} <= 20')
+        return {'depth': depth}
+
+
+class InstrumentInfoEvent(_BaseEvent):
+    name = EventName.instrument_info
+
+    def subscribe(self, figi: str, request_id: Optional[str] = None):
+        return self._send(
+            {
+                'event': f'{EventName.instrument_info.value}:subscribe',
+                **self._get_payload(figi, request_id),
+            }
+        )
+
+    def unsubscribe(self, figi: str, request_id: Optional[str] = None):
+        return self._send(
+            {
+                'event': f'{EventName.instrument_info.value}:unsubscribe',
+                **self._get_payload(figi, request_id),
+            }
+        )
+
+    def subscribe_many(self, figis: Iterable[str], confirm_timeout: float = 2):
+        return self._send_many('subscribe', figis, {}, confirm_timeout)
+
+    def unsubscribe_many(self, figis: Iterable[str], confirm_timeout: float = 2):
+        return self._send_many('unsubscribe', figis, {}, confirm_timeout)
+
+    @staticmethod
+    def _get_payload(figi: str, request_id: Optional[str] = None):
+        data = {'figi': figi}
+        if request_id:
+            data['request_id'] = request_id
+
+        return data
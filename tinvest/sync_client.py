@@ -1,37 +1,69 @@
-from typing import Any
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Iterator, Optional, Union, cast
 
-from requests import Response, Session, session
+from requests import RequestException, Response, Session
+from requests.exceptions import ConnectionError as HTTPConnectionError
+from requests.exceptions import Timeout
 
-from .base_client import BaseClient
+from .base_client import BaseClient, BaseResponseWrapper
+from .cache import BufferedResponse, CacheKey, ResponseData, SyncBufferedResponse
+from .connection import make_session
+from .jsonstream import iter_array_items, list_field
+from .parsing import ParseMode, parse_obj
 from .shemas import Error
+from .singleflight import SingleFlight
 from .utils import set_default_headers
 
+logger = logging.getLogger(__name__)
 
-class ResponseWrapper:
-    def __init__(self, response: Response, response_model: Any):
-        self._response = response
-        self._response_model = response_model
 
-    def __getattr__(self, name):
-        return getattr(self._response, name)
+class ResponseWrapper(BaseResponseWrapper):
+    _response: Union[Response, SyncBufferedResponse]
 
-    def parse_json(self, **kwargs: Any) -> Any:
-        return self._parse_json(self._response_model, **kwargs)
+    def parse_json(self, *, mode: Optional[ParseMode] = None, **kwargs: Any) -> Any:
+        """``mode`` overrides the ``parse_mode`` of the client for this call."""
+        return self._parse_json(self._response_model, mode, **kwargs)
 
-    def parse_error(self, **kwargs: Any) -> Any:
-        return self._parse_json(Error, **kwargs)
+    def parse_error(self, *, mode: Optional[ParseMode] = None, **kwargs: Any) -> Any:
+        return self._parse_json(Error, mode, **kwargs)
 
-    def _parse_json(self, response_model: Any, **kwargs: Any) -> Any:
+    def iter_items(
+        self, mode: Optional[ParseMode] = None, chunk_size: int = 65536
+    ) -> Iterator[Any]:
+        """Yield the items of the payload list, e.g. ``Operation``, one by one.
+
+        The body is decoded while it is read, with ``stream=True`` passed to the
+        request only one chunk and one item are held in memory.
+        """
+        key, model = list_field(self._response_model)
+        mode = mode or self._parse_mode
+        if isinstance(self._response, BufferedResponse):
+            chunks: Any = [self._response.content]
+        else:
+            chunks = self._response.iter_content(chunk_size)
+        for item in iter_array_items(chunks, key):
+            yield parse_obj(model, item, mode)
+
+    def _parse_json(
+        self, response_model: Any, mode: Optional[ParseMode], **kwargs: Any
+    ) -> Any:
+        mode = mode or self._parse_mode
         if response_model is None:
             return self._response.json(**kwargs)
-        return response_model.parse_obj(self._response.json(**kwargs))
+        if not kwargs and isinstance(self._response, BufferedResponse):
+            return self._response.parse_model(response_model, mode)
+        return parse_obj(response_model, self._response.json(**kwargs), mode)
 
 
 class SyncClient(BaseClient[Session]):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if self._session is None:
-            self._session = session()
+            self._session = make_session(self._connection)
+        self._single_flight = SingleFlight() if self._coalesce else None
 
     def request(
         self,
@@ -44,11 +76,86 @@ class SyncClient(BaseClient[Session]):
         url = self._base_url + path
         set_default_headers(kwargs, self._token)
 
-        response = ResponseWrapper(
-            self.session.request(method, url, **kwargs), response_model
-        )
+        ttl = self._cache_ttl(method, path)
+        raw: Union[Response, SyncBufferedResponse]
+        if self._is_shared(method, ttl):
+            raw = self._shared(method, path, url, ttl, **kwargs)
+        else:
+            raw = self._send(method, path, url, **kwargs)
+        response = ResponseWrapper(raw, response_model, self._parse_mode)
 
         if raise_for_status:
             response.raise_for_status()
 
         return response
+
+    def _shared(  # pylint: disable=R0913
+        self, method: str, path: str, url: str, ttl: Optional[float], **kwargs: Any
+    ) -> SyncBufferedResponse:
+        """Response from the cache or shared with identical in-flight requests."""
+        key, cached = self._cached(method, url, ttl, kwargs)
+        if cached is not None:
+            return cast(SyncBufferedResponse, cached)
+        fetch = partial(self._fetch, key, ttl, method, path, url, **kwargs)
+        if self._single_flight is None:
+            return fetch()
+        return self._single_flight.do(key, fetch)
+
+    def _fetch(  # pylint: disable=R0913
+        self,
+        key: CacheKey,
+        ttl: Optional[float],
+        method: str,
+        path: str,
+        url: str,
+        **kwargs: Any,
+    ) -> SyncBufferedResponse:
+        response = self._send(method, path, url, **kwargs)
+        data = ResponseData(
+            response.status_code, response.headers, response.content, response.url
+        )
+        buffered = SyncBufferedResponse(data, response)
+        self._store(key, ttl, buffered)
+        return buffered
+
+    def warm_up(self, connections: int = 4) -> int:
+        """Open up to ``connections`` keep-alive connections to the API host.
+
+        Returns the number of 2xx/3xx HEAD responses, errors are only logged.
+        """
+        if connections <= 0:
+            raise ValueError(f'connections must be positive, got {connections}')
+        with ThreadPoolExecutor(connections) as executor:
+            return sum(executor.map(lambda _: self._touch(), range(connections)))
+
+    def _touch(self) -> bool:
+        try:
+            response = self.session.head(self._base_url)
+        except RequestException as e:
+            logger.warning('Warm up failed: %s', e)
+            return False
+        response.close()
+        if response.status_code >= 400:
+            logger.warning('Warm up failed: HTTP %s', response.status_code)
+            return False
+        return True
+
+    def _send(self, method: str, path: str, url: str, **kwargs: Any) -> Response:
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire(path)
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (HTTPConnectionError, Timeout) as e:
+                time.sleep(self._error_delay(method, attempt, e))
+                attempt += 1
+                continue
+            delay = self._retry_delay(
+                method, attempt, response.status_code, response.headers
+            )
+            if delay is None:
+                return response
+            response.close()
+            time.sleep(delay)
+            attempt += 1
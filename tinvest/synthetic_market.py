@@ -0,0 +1,83 @@
+import random
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .typedefs import AnyDict
+from .utils import format_datetime
+
+MARKETS = (
+    ('stocks', 'Stock'),
+    ('bonds', 'Bond'),
+    ('etfs', 'Etf'),
+    ('currencies', 'Currency'),
+)
+
+
+class SyntheticMarket:
+    """Random walk prices of ``instruments`` made-up instruments.
+
+    Instruments cycle through the stock, bond, etf and currency markets and
+    are named ``BBG000000000``, ``BBG000000001``, ...
+    """
+
+    def __init__(self, instruments: int = 100, seed: Optional[int] = None) -> None:
+        self._random = random.Random(seed)
+        self.instruments: Dict[str, AnyDict] = {}
+        self._types: Dict[str, str] = {}
+        self._prices: Dict[str, float] = {}
+        for i in range(instruments):
+            figi = f'BBG{i:09d}'
+            self.instruments[figi] = {
+                'figi': figi,
+                'ticker': f'TCK{i}',
+                'isin': f'RU{i:010d}',
+                'minPriceIncrement': 0.01,
+                'lot': 1,
+                'currency': 'RUB',
+                'name': f'Instrument {i}',
+            }
+            self._types[figi] = MARKETS[i % len(MARKETS)][1]
+            self._prices[figi] = 10.0 + i
+
+    def market(self, instrument_type: str) -> List[AnyDict]:
+        return [
+            instrument
+            for figi, instrument in self.instruments.items()
+            if self._types[figi] == instrument_type
+        ]
+
+    def type_of(self, figi: str) -> str:
+        return self._types[figi]
+
+    def price(self, figi: str) -> float:
+        price = self._prices[figi] * (1 + self._random.gauss(0, 0.001))
+        price = self._prices[figi] = round(max(price, 0.01), 2)
+        return price
+
+    def orderbook(self, figi: str, depth: int) -> AnyDict:
+        price = self.price(figi)
+        bids = [[round(price - 0.01 * (i + 1), 2), 1 + i] for i in range(depth)]
+        asks = [[round(price + 0.01 * (i + 1), 2), 1 + i] for i in range(depth)]
+        return {'figi': figi, 'depth': depth, 'bids': bids, 'asks': asks}
+
+    def candle(self, figi: str, interval: str, time: datetime) -> AnyDict:
+        o = self.price(figi)
+        c = self.price(figi)
+        return {
+            'figi': figi,
+            'interval': interval,
+            'time': format_datetime(time),
+            'o': o,
+            'c': c,
+            'h': max(o, c) + 0.01,
+            'l': max(min(o, c) - 0.01, 0.01),
+            'v': self._random.randint(1, 1000),
+        }
+
+    def instrument_info(self, figi: str) -> AnyDict:
+        return {
+            'figi': figi,
+            'trade_status': 'normal_trading',
+            'min_price_increment': 0.01,
+            'lot': 1,
+        }
@@ -1,9 +1,14 @@
 import asyncio
 import functools
+import logging
+import re
 import typing
+from datetime import datetime, timezone
 
 from .typedefs import AnyDict
 
+logger = logging.getLogger(__name__)
+
 try:
     import contextvars  # Python 3.7+ only.
 except ImportError:  # pragma: no cover
@@ -17,6 +22,40 @@ def set_default_headers(data: AnyDict, token: str) -> None:
     data['headers'] = headers
 
 
+_FRACTION = re.compile(r'\.(\d+)')
+
+
+def parse_datetime(value: str) -> datetime:
+    """Parse API timestamps like 2019-08-07T15:35:00.029721253Z."""
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    match = _FRACTION.search(value)
+    if match and len(match.group(1)) != 6:
+        fraction = match.group(1)[:6].ljust(6, '0')
+        value = f'{value[:match.start()]}.{fraction}{value[match.end():]}'
+    return datetime.fromisoformat(value)
+
+
+def format_datetime(value: datetime) -> str:
+    return value.isoformat().replace('+00:00', 'Z')
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def utc_aware(value: datetime) -> datetime:
+    """``value`` with naive datetimes taken as UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def epoch_ns(value: datetime) -> int:
+    """Nanoseconds since the epoch, naive datetimes are taken as UTC."""
+    delta = utc_aware(value) - _EPOCH
+    return ((delta.days * 86400 + delta.seconds) * 10 ** 6 + delta.microseconds) * 1000
+
+
 T = typing.TypeVar('T')
 
 
@@ -29,11 +68,13 @@ class Func:
         self.kwargs = kwargs
         self.is_async = asyncio.iscoroutinefunction(func)
 
-    async def __call__(self) -> None:
+    async def __call__(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        args = self.args + args
+        kwargs = {**self.kwargs, **kwargs} if kwargs else self.kwargs
         if self.is_async:
-            await self.func(*self.args, **self.kwargs)
+            await self.func(*args, **kwargs)
         else:
-            await run_in_threadpool(self.func, *self.args, **self.kwargs)
+            await run_in_threadpool(self.func, *args, **kwargs)
 
 
 async def run_in_threadpool(
@@ -50,3 +91,24 @@ async def run_in_threadpool(
         # loop.run_in_executor doesn't accept 'kwargs', so bind them in here
         func = functools.partial(func, **kwargs)
     return await loop.run_in_executor(None, func, *args)
+
+
+async def with_retries(
+    call: typing.Callable[[], typing.Awaitable[T]],
+    retries: int,
+    retry_delay: float,
+    what: str,
+) -> T:
+    """Await ``call()``, retrying failures with exponential backoff."""
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:  # pylint: disable=W0703
+            if attempt >= retries:
+                raise
+            logger.warning('%s failed: %s. Retry', what, e)
+        await asyncio.sleep(retry_delay * 2 ** attempt)
+        attempt += 1